@@ -38,6 +38,53 @@ def sort_multiple(fields):
 class ODMOrderingFilter(OrderingFilter):
     """Adaptation of rest_framework.filters.OrderingFilter to work with modular-odm."""
 
+    def get_field_sources(self, view):
+        """Map the names of the view's serializer fields to the attributes they are read from."""
+        serializer_class = getattr(view, 'serializer_class', None)
+        if serializer_class is None:
+            return {}
+        return {
+            field_name: field.source or field_name
+            for field_name, field in serializer_class._declared_fields.items()
+            if not getattr(field, 'write_only', False) and field.source != '*'
+        }
+
+    def to_sources(self, ordering, view, sources=None):
+        """Sort on the attributes that fields are read from."""
+        if sources is None:
+            sources = self.get_field_sources(view)
+        return [
+            ('-' if term.startswith('-') else '') + sources.get(term.lstrip('-'), term.lstrip('-'))
+            for term in ordering
+        ]
+
+    def to_stored_sources(self, ordering, view):
+        """Sort database queries on the stored fields given by the serializer's `ordering_sources` in place of
+        computed attributes, so that e.g. ordering nodes by `date_modified` sorts on their indexed `last_logged`
+        field.
+        """
+        sources = getattr(getattr(view, 'serializer_class', None), 'ordering_sources', None)
+        if not sources:
+            return ordering
+        return self.to_sources(ordering, view, sources=sources)
+
+    # override
+    def remove_invalid_fields(self, queryset, fields, view):
+        if getattr(view, 'ordering_fields', self.ordering_fields) is None:
+            sources = self.get_field_sources(view)
+            valid_fields = set(sources.keys()) | set(sources.values())
+            fields = [term for term in fields if term.lstrip('-') in valid_fields]
+        else:
+            fields = super(ODMOrderingFilter, self).remove_invalid_fields(queryset, fields, view)
+        return self.to_sources(fields, view)
+
+    # override
+    def get_default_ordering(self, view):
+        ordering = super(ODMOrderingFilter, self).get_default_ordering(view)
+        if ordering:
+            return self.to_sources(ordering, view)
+        return ordering
+
     # override
     def filter_queryset(self, request, queryset, view):
         ordering = self.get_ordering(request, queryset, view)
@@ -45,7 +92,7 @@ class ODMOrderingFilter(OrderingFilter):
             if not isinstance(queryset, modularodm_queryset.BaseQuerySet) and isinstance(ordering, (list, tuple)):
                 sorted_list = sorted(queryset, cmp=sort_multiple(ordering))
                 return sorted_list
-            return queryset.sort(*ordering)
+            return queryset.sort(*self.to_stored_sources(ordering, view))
         return queryset
 
 
@@ -186,6 +233,17 @@ class FilterMixin(object):
                     })
         return query
 
+    def filters_to_odm_query(self, filters):
+        """Compile the output of `parse_query_params` into a modularodm Query object, or `None` if there are no filters."""
+        query_parts = [
+            Q(field_name, group['op'], group['value'])
+            for field_name, params in filters.iteritems()
+            for group in params
+        ]
+        if not query_parts:
+            return None
+        return functools.reduce(operator.and_, query_parts)
+
     def convert_key(self, field_name, field):
         """Used so that that queries on fields with the source attribute set will work
         :param basestring field_name: text representation of the field name
@@ -269,32 +327,35 @@ class ODMFilterMixin(FilterMixin):
         else:
             query = default_query
 
+        cursor_query = self.get_cursor_query()
+        if cursor_query:
+            query = query & cursor_query
+
         return query
 
+    def get_cursor_query(self):
+        """Return the keyset constraint for `page[cursor]` requests from the view's paginator, if it supports one."""
+        paginator = getattr(self, 'paginator', None)
+        if not hasattr(paginator, 'get_cursor_query'):
+            return None
+        return paginator.get_cursor_query(self.request, self)
+
     def query_params_to_odm_query(self, query_params):
         """Convert query params to a modularodm Query object."""
 
         filters = self.parse_query_params(query_params)
-        if filters:
-            query_parts = []
-            for field_name, params in filters.iteritems():
-                for group in params:
-                    query = Q(field_name, group['op'], group['value'])
-                    query_parts.append(query)
-            try:
-                query = functools.reduce(operator.and_, query_parts)
-            except TypeError:
-                query = None
-        else:
-            query = None
-        return query
+        return self.filters_to_odm_query(filters)
 
 
 class ListFilterMixin(FilterMixin):
     """View mixin that adds a get_queryset_from_request method which uses query params
     of the form `filter[field_name]=value` to filter a list of objects.
 
-    Subclasses must define `get_default_queryset()`.
+    Subclasses must define `get_default_queryset()`. Subclasses whose default queryset lives in the database
+    may also define `get_default_odm_query()`, `model_class` and `odm_filter_fields`; filters on the fields in
+    `odm_filter_fields` are then compiled into the query, and only the remaining filters are applied in memory.
+    Only list fields whose stored value is the serialized value, never ones that subclasses of `model_class`
+    compute from properties.
 
     Serializers that want to restrict which fields are used for filtering need to have a variable called
     filterable_fields which is a frozenset of strings representing the field names as they appear in the serialization.
@@ -307,6 +368,9 @@ class ListFilterMixin(FilterMixin):
         'gte': operator.ge
     }
 
+    # Names of the serializer fields whose filters may be compiled into `get_default_odm_query()`
+    odm_filter_fields = frozenset()
+
     def __init__(self, *args, **kwargs):
         super(FilterMixin, self).__init__(*args, **kwargs)
         if not self.serializer_class:
@@ -315,46 +379,89 @@ class ListFilterMixin(FilterMixin):
     def get_default_queryset(self):
         raise NotImplementedError('Must define get_default_queryset')
 
+    def get_default_odm_query(self):
+        """Return the MODM query behind `get_default_queryset`, or `None` if the default queryset is only
+        available in memory.
+        """
+        return None
+
+    def get_odm_queryset(self, query):
+        return self.model_class.find(query)
+
     def get_queryset_from_request(self):
-        default_queryset = self.get_default_queryset()
-        if not self.kwargs.get('is_embedded') and self.request.QUERY_PARAMS:
-            param_queryset = self.param_queryset(self.request.QUERY_PARAMS, default_queryset)
-            return param_queryset
+        is_filtered = not self.kwargs.get('is_embedded') and self.request.QUERY_PARAMS
+        filters = self.parse_query_params(self.request.QUERY_PARAMS) if is_filtered else {}
+
+        default_query = self.get_default_odm_query()
+        if default_query is not None:
+            odm_filters = self.pop_odm_filters(filters)
+            if odm_filters:
+                default_query = default_query & self.filters_to_odm_query(odm_filters)
+            default_queryset = self.get_odm_queryset(default_query)
         else:
-            return default_queryset
+            default_queryset = self.get_default_queryset()
+
+        if filters:
+            return self.filter_in_memory(filters, default_queryset)
+        return default_queryset
+
+    def pop_odm_filters(self, filters):
+        """Remove and return the filters on `odm_filter_fields`, to be compiled into a query on `model_class`.
+        Filters on strings match substrings whatever the operator, as they do in memory.
+        """
+        odm_filters = {}
+        for field_name in self.odm_filter_fields:
+            field = self.serializer_class._declared_fields[field_name]
+            key = self.convert_key(field_name, field)
+            if key not in filters:
+                continue
+            params = filters.pop(key)
+            if isinstance(field, ser.CharField):
+                params = [dict(group, op='icontains') for group in params]
+            odm_filters[key] = params
+        return odm_filters
 
     def param_queryset(self, query_params, default_queryset):
         """filters default queryset based on query parameters"""
         filters = self.parse_query_params(query_params)
-        queryset = set(default_queryset)
-        if filters:
-            for field_name, params in filters.iteritems():
-                for group in params:
-                    queryset = queryset.intersection(set(self.get_filtered_queryset(field_name, group, default_queryset)))
-        return list(queryset)
-
-    def get_filtered_queryset(self, field_name, params, default_queryset):
-        """filters default queryset based on the serializer field type"""
-        field = self.serializer_class._declared_fields[field_name]
+        return self.filter_in_memory(filters, default_queryset)
+
+    def filter_in_memory(self, filters, default_queryset):
+        """Apply every filter in a single, order-preserving pass over the default queryset."""
+        predicates = [
+            self.get_filter_predicate(field_name, group)
+            for field_name, params in filters.iteritems()
+            for group in params
+        ]
+        return [
+            item for item in default_queryset
+            if all(predicate(item) for predicate in predicates)
+        ]
+
+    def _get_declared_field(self, field_name):
+        declared_fields = self.serializer_class._declared_fields
+        if field_name in declared_fields:
+            return declared_fields[field_name]
+        for field in declared_fields.values():
+            if field.source == field_name and field_name != '*':
+                return field
+        raise KeyError(field_name)
+
+    def get_filter_predicate(self, field_name, params):
+        """Returns a function that checks a single item against one filter, based on the serializer field type"""
+        field = self._get_declared_field(field_name)
         field_name = self.convert_key(field_name, field)
+        value = params['value']
 
         if isinstance(field, ser.SerializerMethodField):
-            return_val = [
-                item for item in default_queryset
-                if self.FILTERS[params['op']](self.get_serializer_method(field_name)(item), params['value'])
-            ]
+            compare = self.FILTERS[params['op']]
+            serializer_method = self.get_serializer_method(field_name)
+            return lambda item: compare(serializer_method(item), value)
         elif isinstance(field, ser.CharField):
-            return_val = [
-                item for item in default_queryset
-                if params['value'] in getattr(item, field_name, {}).lower()
-            ]
+            return lambda item: value in getattr(item, field_name, {}).lower()
         else:
-            return_val = [
-                item for item in default_queryset
-                if self.FILTERS[params['op']](getattr(item, field_name, None), params['value'])
-            ]
-
-        return return_val
+            compare = self.FILTERS[params['op']]
+            return lambda item: compare(getattr(item, field_name, None), value)
 
     def get_serializer_method(self, field_name):
         """
@@ -1,6 +1,7 @@
 from pymongo.errors import OperationFailure
 from raven.contrib.django.raven_compat.models import sentry_exception_handler
 
+from framework.mongo import handlers as mongo_handlers
 from framework.transactions import commands, messages, utils
 
 from .api_globals import api_globals
@@ -15,6 +16,7 @@ class TokuTransactionsMiddleware(object):
 
     def process_request(self, request):
         """Begin a transaction if one doesn't already exist."""
+        mongo_handlers.connection_before_request()
         try:
             commands.begin()
         except OperationFailure as err:
@@ -33,7 +35,7 @@ class TokuTransactionsMiddleware(object):
             message = utils.get_error_message(err)
             if messages.NO_TRANSACTION_ERROR not in message:
                 raise
-        commands.disconnect()
+        mongo_handlers.connection_teardown_request()
         return None
 
     def process_response(self, request, response):
@@ -60,7 +62,7 @@ class TokuTransactionsMiddleware(object):
                 pass
             else:
                 raise err
-        commands.disconnect()
+        mongo_handlers.connection_teardown_request()
         return response
 
 
@@ -1,7 +1,15 @@
+import json
+import base64
+import datetime
+import itertools
+
+from dateutil import parser as date_parser
 from django.utils import six
 from collections import OrderedDict
 from django.core.urlresolvers import reverse
 from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from modularodm import Q
+from modularodm.query import queryset as modularodm_queryset
 
 from rest_framework import pagination
 from rest_framework.exceptions import NotFound
@@ -16,9 +24,19 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
     Properly handles pagination of embedded objects.
 
+    Passing `page[cursor]` (empty for the first page) switches to keyset pagination: results are ordered on
+    (sort field, _id) and the `next`/`prev` links carry opaque cursors instead of page numbers, so deep pages
+    cost the same as the first one. Lists without an ordering keep their own order, and their cursors carry
+    positions. The total count is only computed, with a separate query, when `meta=total` is requested.
     """
 
     page_size_query_param = 'page[size]'
+    cursor_query_param = 'page[cursor]'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    cursor_mode = False
+    cursor_query_applied = False
+    counting_total = False
 
     def page_number_query(self, url, page_number):
         """
@@ -55,6 +73,188 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         page_number = self.page.next_page_number()
         return self.page_number_query(url, page_number)
 
+    def is_cursor_request(self, request):
+        return (
+            self.cursor_query_param in request.query_params and
+            not request.parser_context['kwargs'].get('is_embedded')
+        )
+
+    def wants_total(self, request):
+        return request.query_params.get('meta') == 'total'
+
+    def encode_cursor(self, value, pk, reverse=False):
+        if isinstance(value, datetime.datetime):
+            value = {'$date': value.isoformat()}
+        payload = json.dumps([value, pk, int(reverse)], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload)
+
+    def decode_cursor(self, encoded):
+        """Return a `(value, pk, reverse)` tuple, or `None` for an empty (first page) cursor.
+
+        :raises NotFound: If the cursor cannot be decoded
+        """
+        if not encoded:
+            return None
+        try:
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(str(encoded)))
+            if isinstance(value, dict):
+                value = date_parser.parse(value['$date'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, bool(reverse)
+
+    def get_cursor(self, request):
+        return self.decode_cursor(request.query_params.get(self.cursor_query_param))
+
+    def has_ordering(self, request, view):
+        return bool(ODMOrderingFilter().get_ordering(request, None, view))
+
+    def get_cursor_ordering(self, request, view, model=None):
+        """Return `(sort_field, descending)` for keyset pagination.
+
+        Uses the first term of the view's ordering. If `model` is given the sort field must be stored on it,
+        otherwise results are keyed on _id alone.
+        """
+        ordering = ODMOrderingFilter().get_ordering(request, None, view) or ()
+        if ordering:
+            field_name = ordering[0].lstrip('-')
+            if model is None or field_name in model._fields:
+                return field_name, ordering[0].startswith('-')
+        return '_id', False
+
+    def get_keyset_query(self, sort_field, descending, value, pk, reverse=False):
+        op = 'lt' if descending != reverse else 'gt'
+        id_query = Q('_id', op, pk)
+        if sort_field == '_id':
+            return id_query
+        return Q(sort_field, op, value) | (Q(sort_field, 'eq', value) & id_query)
+
+    def get_cursor_query(self, request, view):
+        """Return the keyset query for a cursor request so ODM views can push it into their own query, or `None`.
+        """
+        if not self.is_cursor_request(request) or self.counting_total:
+            return None
+        self.cursor_query_applied = True
+        cursor = self.get_cursor(request)
+        if cursor is None:
+            return None
+        sort_field, descending = self.get_cursor_ordering(request, view, getattr(view, 'model_class', None))
+        return self.get_keyset_query(sort_field, descending, *cursor)
+
+    def count_total(self, view):
+        """Count the view's results without the keyset constraint, with a query of their own."""
+        self.counting_total = True
+        try:
+            queryset = view.filter_queryset(view.get_queryset())
+        finally:
+            self.counting_total = False
+        if isinstance(queryset, modularodm_queryset.BaseQuerySet):
+            return queryset.count()
+        return len(queryset)
+
+    def paginate_queryset_by_cursor(self, queryset, request, view):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        cursor = self.get_cursor(request)
+        reverse = cursor[2] if cursor else False
+        is_odm = isinstance(queryset, modularodm_queryset.BaseQuerySet)
+        model = getattr(view, 'model_class', None) or (queryset.schema if is_odm else None)
+        sort_field, descending = self.get_cursor_ordering(request, view, model)
+        backwards = descending != reverse
+
+        def sort_key(item):
+            return getattr(item, sort_field, None), item._id
+
+        if not is_odm:
+            queryset = list(queryset)
+        self.total = None
+        if self.wants_total(request):
+            if self.cursor_query_applied and cursor is not None:
+                self.total = self.count_total(view)
+            else:
+                self.total = queryset.count() if is_odm else len(queryset)
+
+        # Lists the view neither ordered nor constrained keep their own order, e.g. contributors in
+        # bibliographic order; cursors carry the position of the item they start from
+        positional = not is_odm and not self.cursor_query_applied and not self.has_ordering(request, view)
+        if is_odm:
+            prefix = '-' if backwards else ''
+            sort_keys = [prefix + sort_field] + ([prefix + '_id'] if sort_field != '_id' else [])
+            items = queryset.sort(*sort_keys)
+            if self.cursor_query_applied or cursor is None:
+                items = items.limit(page_size + 1)
+        elif positional:
+            items = queryset
+            positions = {item._id: position for position, item in enumerate(items)}
+
+            def sort_key(item):
+                return positions[item._id], item._id
+
+            if cursor:
+                position, pk = cursor[:2]
+                if not isinstance(position, six.integer_types):
+                    raise NotFound(self.invalid_cursor_message)
+                # The item the cursor starts from may have left the list since
+                position = positions.get(pk, position - 0.5)
+                if backwards:
+                    items = [item for item in items if positions[item._id] < position][::-1]
+                else:
+                    items = [item for item in items if positions[item._id] > position]
+            elif backwards:
+                items = items[::-1]
+        else:
+            items = sorted(queryset, key=sort_key, reverse=backwards)
+
+        if cursor and not (is_odm and self.cursor_query_applied) and not positional:
+            bound = cursor[:2]
+            if backwards:
+                items = itertools.ifilter(lambda item: sort_key(item) < bound, items)
+            else:
+                items = itertools.ifilter(lambda item: sort_key(item) > bound, items)
+
+        results = list(itertools.islice(items, page_size + 1))
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = cursor is not None, has_more
+
+        self.cursor_mode = True
+        self.per_page = page_size
+        self.has_cursor = cursor is not None
+        self.next_cursor = self.previous_cursor = None
+        if results and has_next:
+            self.next_cursor = self.encode_cursor(*sort_key(results[-1]))
+        if results and has_previous:
+            self.previous_cursor = self.encode_cursor(*sort_key(results[0]), reverse=True)
+        self.request = request
+        return results
+
+    def cursor_query(self, cursor):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_cursor_paginated_response(self, data):
+        meta = OrderedDict()
+        if self.total is not None:
+            meta['total'] = self.total
+        meta['per_page'] = self.per_page
+        response_dict = OrderedDict([
+            ('data', data),
+            ('links', OrderedDict([
+                ('first', self.cursor_query('') if self.has_cursor else None),
+                ('last', None),
+                ('prev', self.cursor_query(self.previous_cursor) if self.previous_cursor else None),
+                ('next', self.cursor_query(self.next_cursor) if self.next_cursor else None),
+                ('meta', meta)
+            ])),
+        ])
+        return Response(response_dict)
+
     def get_paginated_response(self, data):
         """
         Formats paginated response in accordance with JSON API.
@@ -62,6 +262,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         Creates pagination links from the view_name if embedded resource,
         rather than the location used in the request.
         """
+        if self.cursor_mode:
+            return self.get_cursor_paginated_response(data)
         kwargs = self.request.parser_context['kwargs'].copy()
         embedded = kwargs.pop('is_embedded', None)
         view_name = self.request.parser_context['view'].view_fqn
@@ -90,7 +292,9 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
         If this is an embedded resource, returns first page, ignoring query params.
         """
-        if request.parser_context['kwargs'].get('is_embedded'):
+        if self.is_cursor_request(request):
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+        elif request.parser_context['kwargs'].get('is_embedded'):
             page_size = self.get_page_size(request)
             if not page_size:
                 return None
@@ -1,10 +1,92 @@
+import json
 
+from django.utils import six
+from rest_framework.compat import SHORT_SEPARATORS, LONG_SEPARATORS
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 
+
+class StreamedList(object):
+    """List data that is serialized item by item as it is iterated rather than held in memory as a whole.
+    Renderers that stream (see `JSONAPIRenderer.streaming`) encode each item as it is produced;
+    any other renderer encodes it as a regular sequence.
+    """
+
+    def __init__(self, items, serialize):
+        self.items = items
+        self.serialize = serialize
+
+    def __iter__(self):
+        for item in self.items:
+            yield self.serialize(item)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def is_streamed(data):
+    """Whether `data`, or its top-level `data` member, is a `StreamedList`."""
+    if isinstance(data, StreamedList):
+        return True
+    return isinstance(data, dict) and isinstance(data.get('data'), StreamedList)
+
+
 class JSONAPIRenderer(JSONRenderer):
     format = "jsonapi"
     media_type = 'application/vnd.api+json'
 
+    # Views may hand this renderer `StreamedList`s instead of fully serialized lists
+    streaming = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON. If the response (or its top-level `data` member) is a `StreamedList`
+        and no indentation was requested, return a generator of bytestrings that encodes one item at a time,
+        so only a single serialized item is held in memory alongside the output.
+        """
+        renderer_context = renderer_context or {}
+        if is_streamed(data) and self.get_indent(accepted_media_type, renderer_context) is None:
+            return self.render_chunks(data)
+        return super(JSONAPIRenderer, self).render(data, accepted_media_type, renderer_context)
+
+    def encode(self, value):
+        ret = json.dumps(
+            value, cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        )
+        # See JSONRenderer.render
+        if isinstance(ret, six.text_type):
+            ret = ret.replace(u'\u2028', u'\\u2028').replace(u'\u2029', u'\\u2029')
+            return bytes(ret.encode('utf-8'))
+        return ret
+
+    def render_list_chunks(self, items):
+        item_separator = SHORT_SEPARATORS[0] if self.compact else LONG_SEPARATORS[0]
+        yield b'['
+        for index, item in enumerate(items):
+            if index:
+                yield item_separator
+            yield self.encode(item)
+        yield b']'
+
+    def render_chunks(self, data):
+        if isinstance(data, StreamedList):
+            for chunk in self.render_list_chunks(data):
+                yield chunk
+            return
+
+        item_separator, key_separator = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        yield b'{'
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                yield item_separator
+            yield self.encode(key) + key_separator
+            if isinstance(value, StreamedList):
+                for chunk in self.render_list_chunks(value):
+                    yield chunk
+            else:
+                yield self.encode(value)
+        yield b'}'
+
 
 class BrowsableAPIRendererNoForms(BrowsableAPIRenderer):
     """
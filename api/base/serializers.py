@@ -1,12 +1,13 @@
 import re
+import functools
 import collections
 
 from rest_framework import exceptions
 from rest_framework import serializers as ser
-from django.core.urlresolvers import resolve, reverse
 from rest_framework.fields import SkipField
 
 from framework.auth import core as auth_core
+from framework.mongo.utils import prefetch
 from website import settings
 from website.util.sanitize import strip_html
 from website import util as website_utils
@@ -14,6 +15,7 @@ from rest_framework.fields import get_attribute as get_nested_attributes
 
 from api.base import utils
 from api.base.settings import BULK_SETTINGS
+from api.base.renderers import StreamedList
 from api.base.exceptions import InvalidQueryStringError, Conflict, JSONAPIException, TargetNotSupportedError
 
 def format_relationship_links(related_link=None, self_link=None, rel_meta=None, self_meta=None):
@@ -289,12 +291,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
         Resolves the view when embedding.
         """
         kwargs = {attr_name: self.lookup_attribute(resource, attr) for (attr_name, attr) in self.lookup_url_kwarg.items()}
-        return resolve(
-            reverse(
-                self.view_name,
-                kwargs=kwargs
-            )
-        )
+        return utils.resolve_view(self.view_name, kwargs)
 
     def get_meta_information(self, meta_data, value):
         """
@@ -363,7 +360,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 if kwargs is None:
                     urls[view_name] = {}
                 else:
-                    urls[view_name] = self.reverse(view, kwargs=kwargs, request=request, format=format)
+                    urls[view_name] = utils.reverse_view(view, kwargs, request=request, format=format)
 
         if not urls['self'] and not urls['related']:
             urls = None
@@ -423,12 +420,7 @@ class TargetField(ser.Field):
         embed_value = resource.target._id
 
         kwargs = {view_info['lookup_kwarg']: embed_value}
-        return resolve(
-            reverse(
-                view_info['view'],
-                kwargs=kwargs
-            )
-        )
+        return utils.resolve_view(view_info['view'], kwargs)
 
     def to_representation(self, value):
         """
@@ -586,12 +578,50 @@ class NodeFileHyperLinkField(RelationshipField):
 
 class JSONAPIListSerializer(ser.ListSerializer):
 
+    def prepare(self, data):
+        """Do the page-level work for serializing `data` up front and return it as a list."""
+        # Batch-load references the child serializer dereferences per item,
+        # as declared by `Meta.prefetch` and `Meta.field_prefetch` on the child serializer
+        prefetch_paths = self.child.get_prefetch_paths()
+        if prefetch_paths:
+            data = list(data)
+            if data:
+                prefetch(data, *prefetch_paths)
+        # Expose the page so per-item fields can batch their work across it
+        data = list(data)
+        self.context['page'] = data
+        # Let embeds plan their work for the whole page rather than item by item
+        embeds = self.context.get('embed', {})
+        if embeds:
+            readable = set(field.field_name for field in self.child.get_readable_fields())
+            for field_name, embed in embeds.items():
+                if field_name in readable and hasattr(embed, 'prepare'):
+                    embed.prepare(data)
+        return data
+
     def to_representation(self, data):
+        data = self.prepare(data)
         # Don't envelope when serializing collection
         return [
             self.child.to_representation(item, envelope=None) for item in data
         ]
 
+    # overrides ListSerializer
+    @property
+    def data(self):
+        """If the view asked for a streamed response, return a `StreamedList` that serializes each item as the
+        renderer encodes it, so the whole page is never held in memory as nested dicts.
+        """
+        if not self.context.get('stream') or self.instance is None or hasattr(self, 'initial_data'):
+            return super(JSONAPIListSerializer, self).data
+        if not hasattr(self, '_data'):
+            items = self.prepare(self.instance)
+            if items:
+                # Raise invalid query string errors while the view can still handle them
+                self.child.validate_embeds(self.context.get('embed', {}))
+            self._data = StreamedList(items, functools.partial(self.child.to_representation, envelope=None))
+        return self._data
+
     # Overrides ListSerializer which doesn't support multiple update by default
     def update(self, instance, validated_data):
         if len(instance) != len(validated_data):
@@ -648,12 +678,56 @@ class JSONAPISerializer(ser.Serializer):
     Self/html links must be nested under "links".
     """
 
+    # Serialized regardless of the sparse fieldset requested
+    ALWAYS_SERIALIZED_FIELDS = ('id', 'type', 'links')
+
     # overrides Serializer
     @classmethod
     def many_init(cls, *args, **kwargs):
         kwargs['child'] = cls()
         return JSONAPIListSerializer(*args, **kwargs)
 
+    def get_sparse_fieldset(self):
+        """Return the field names requested for this serializer's type with `fields[<type>]=`,
+        or None if no sparse fieldset was requested.
+        """
+        fieldsets = self.context.get('fieldsets') or {}
+        return fieldsets.get(getattr(getattr(self, 'Meta', None), 'type_', None))
+
+    def get_readable_fields(self):
+        """Return the fields to serialize, pruned to the sparse fieldset if one was requested.
+        `id`, `type` and `links` are always serialized.
+        """
+        if getattr(self, '_readable_fields', None) is None:
+            fields = [field for field in self.fields.values() if not field.write_only]
+            fieldset = self.get_sparse_fieldset()
+            if fieldset is not None:
+                invalid_fields = fieldset - set(field.field_name for field in fields)
+                if invalid_fields:
+                    raise InvalidQueryStringError(
+                        parameter='fields[{}]'.format(self.Meta.type_),
+                        detail='The following fields are not available: {}'.format(', '.join(sorted(invalid_fields)))
+                    )
+                fields = [
+                    field for field in fields
+                    if field.field_name in fieldset or field.field_name in self.ALWAYS_SERIALIZED_FIELDS
+                ]
+            self._readable_fields = fields
+        return self._readable_fields
+
+    def get_prefetch_paths(self):
+        """Return the reference paths to batch-load for a page of objects: `Meta.prefetch`, plus the paths
+        in `Meta.field_prefetch = {field_name: (path, ...)}` for each field that will be serialized.
+        """
+        meta = getattr(self, 'Meta', None)
+        paths = list(getattr(meta, 'prefetch', ()))
+        field_prefetch = getattr(meta, 'field_prefetch', {})
+        for field in self.get_readable_fields():
+            for path in field_prefetch.get(field.field_name, ()):
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
     def invalid_embeds(self, fields, embeds):
         fields_check = fields[:]
         for index, field in enumerate(fields_check):
@@ -662,6 +736,13 @@ class JSONAPISerializer(ser.Serializer):
         invalid_embeds = set(embeds.keys()) - set([f.field_name for f in fields_check if getattr(f, 'json_api_link', False)])
         return invalid_embeds
 
+    def validate_embeds(self, embeds):
+        fields = [field for field in self.fields.values() if not field.write_only]
+        invalid_embeds = self.invalid_embeds(fields, embeds)
+        if invalid_embeds:
+            raise InvalidQueryStringError(parameter='embed',
+                                          detail='The following fields are not embeddable: {}'.format(', '.join(invalid_embeds)))
+
     # overrides Serializer
     def to_representation(self, obj, envelope='data'):
         """Serialize to final representation.
@@ -684,13 +765,9 @@ class JSONAPISerializer(ser.Serializer):
         ])
 
         embeds = self.context.get('embed', {})
-        fields = [field for field in self.fields.values() if not field.write_only]
-        invalid_embeds = self.invalid_embeds(fields, embeds)
-        if invalid_embeds:
-            raise InvalidQueryStringError(parameter='embed',
-                                          detail='The following fields are not embeddable: {}'.format(', '.join(invalid_embeds)))
+        self.validate_embeds(embeds)
 
-        for field in fields:
+        for field in self.get_readable_fields():
             try:
                 attribute = field.get_attribute(obj)
             except SkipField:
@@ -56,6 +56,12 @@ BULK_SETTINGS = {
     'DEFAULT_BULK_LIMIT': 10
 }
 
+# Seconds to cache related counts (`related_counts=true`) per node, date_modified and user; 0 disables caching
+RELATED_COUNTS_CACHE_TTL = 0
+
+# Serialize and encode list responses item by item for renderers that support streaming
+STREAM_RESPONSES = True
+
 REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
     # Order is important here because of a bug in rest_framework_swagger. For now,
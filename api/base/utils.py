@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
-from modularodm import Q
+import re
+
+from django.core.urlresolvers import (
+    NoReverseMatch, ResolverMatch, get_script_prefix, resolve, reverse as django_reverse
+)
 from modularodm.exceptions import NoResultsFound
 from rest_framework.exceptions import NotFound
 from rest_framework.reverse import reverse
@@ -43,6 +47,71 @@ def get_user_auth(request):
     return auth
 
 
+class URLTemplate(object):
+    """A view's URL compiled once into a format string, so that reversing it for new kwargs is string
+    formatting rather than a walk of the URL resolver. Also keeps the resolved view for embedding.
+    """
+    PLACEHOLDER = '__tpl__{}__tpl__'
+
+    # Only values that every URL pattern in the API accepts verbatim may be formatted in
+    SAFE_VALUE = re.compile(r'^\w+$')
+
+    def __init__(self, view_name, kwarg_names):
+        placeholders = dict((name, self.PLACEHOLDER.format(name)) for name in kwarg_names)
+        path = django_reverse(view_name, kwargs=placeholders)
+        match = resolve(path)
+        if match.kwargs != placeholders:
+            raise NoReverseMatch(view_name)
+        self.template = path.replace('%', '%%')
+        for name, placeholder in placeholders.items():
+            self.template = self.template.replace(placeholder, '%({})s'.format(name))
+        self.match = match
+
+    def reverse(self, kwargs):
+        """Return the URL path for `kwargs`, or `None` if it must be reversed the slow way."""
+        for value in kwargs.values():
+            if not isinstance(value, basestring) or not self.SAFE_VALUE.match(value):
+                return None
+        return self.template % kwargs
+
+    def resolve(self, kwargs):
+        match = self.match
+        return ResolverMatch(match.func, (), dict(kwargs), match.url_name, match.app_name, match.namespaces)
+
+
+# (view name, kwarg names, script prefix) => URLTemplate, or None if the view cannot be templated
+_url_templates = {}
+
+
+def get_url_template(view_name, kwarg_names):
+    key = (view_name, tuple(sorted(kwarg_names)), get_script_prefix())
+    if key not in _url_templates:
+        try:
+            _url_templates[key] = URLTemplate(view_name, kwarg_names)
+        except NoReverseMatch:
+            _url_templates[key] = None
+    return _url_templates[key]
+
+
+def reverse_view(view_name, kwargs, request=None, format=None):
+    """Like `rest_framework.reverse.reverse`, but formats a precompiled `URLTemplate` where possible."""
+    template = get_url_template(view_name, kwargs.keys()) if format is None else None
+    path = template.reverse(kwargs) if template else None
+    if path is None:
+        return reverse(view_name, kwargs=kwargs, request=request, format=format)
+    if request:
+        return request.build_absolute_uri(path)
+    return path
+
+
+def resolve_view(view_name, kwargs):
+    """Equivalent to `resolve(reverse(view_name, kwargs=kwargs))`, using a precompiled `URLTemplate` where possible."""
+    template = get_url_template(view_name, kwargs.keys())
+    if template and template.reverse(kwargs) is not None:
+        return template.resolve(kwargs)
+    return resolve(django_reverse(view_name, kwargs=kwargs))
+
+
 def absolute_reverse(view_name, query_kwargs=None, args=None, kwargs=None):
     """Like django's `reverse`, except returns an absolute URL. Also add query parameters."""
     relative_url = reverse(view_name, kwargs=kwargs)
@@ -54,13 +123,14 @@ def absolute_reverse(view_name, query_kwargs=None, args=None, kwargs=None):
 def get_object_or_error(model_cls, query_or_pk, display_name=None):
     display_name = display_name or None
 
-    if isinstance(query_or_pk, basestring):
-        query = Q('_id', 'eq', query_or_pk)
-    else:
-        query = query_or_pk
-
     try:
-        obj = model_cls.find_one(query)
+        if isinstance(query_or_pk, basestring):
+            # Loading by primary key can be served from the request's identity map
+            obj = model_cls.load(query_or_pk)
+            if obj is None:
+                raise NoResultsFound
+        else:
+            obj = model_cls.find_one(query_or_pk)
         if getattr(obj, 'is_deleted', False) is True:
             if display_name is None:
                 raise Gone
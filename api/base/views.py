@@ -1,3 +1,6 @@
+import re
+import collections
+
 from django.http import JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -5,12 +8,103 @@ from rest_framework import generics
 from rest_framework.mixins import ListModelMixin
 
 from api.users.serializers import UserSerializer
+from framework.mongo.utils import prefetch
 from website import settings
+from api.base import settings as api_settings
 from .utils import absolute_reverse
+from .renderers import is_streamed
 from .requests import EmbeddedRequest
 
+
+class EmbedPlanner(object):
+    """Fetches the values of one embedded field for every item of a page.
+
+    Given the page up front through `prepare`, the planner groups the embedded requests by the view they
+    resolve to. Each embedded list view loads what it needs for the whole page in `prepare_embedded`, with
+    one query per relationship, and its responses are then built in memory rather than dispatched as a
+    nested request per item. Items whose relationship resolves to the same resource share one response.
+    Requests that can't be handled that way, e.g. because they fail, are dispatched on their own, so that
+    they respond as they always have.
+    """
+
+    def __init__(self, view, field, prefetch_paths=()):
+        self.view = view
+        self.field = field
+        self.prefetch_paths = prefetch_paths
+        self.responses = {}
+
+    @staticmethod
+    def get_key(match):
+        return match.view_name, tuple(match.args), tuple(sorted(match.kwargs.items()))
+
+    def prepare(self, items):
+        """Build the embedded responses of list views for a page of items."""
+        if self.prefetch_paths and items:
+            prefetch(items, *self.prefetch_paths)
+        if self.field.always_embed:
+            return
+        views = collections.OrderedDict()
+        for item in items:
+            try:
+                match = self.field.resolve(item)
+            except Exception:
+                # E.g. no related resource; left to serializing the item
+                continue
+            key = self.get_key(match)
+            if key in views or key in self.responses or not issubclass(match.func.cls, ListModelMixin):
+                continue
+            view = self.initialize_view(match)
+            if view is not None:
+                views[key] = view
+        view_classes = collections.OrderedDict()
+        for key, view in views.items():
+            view_classes.setdefault(type(view), []).append(key)
+        for view_class, keys in view_classes.items():
+            try:
+                view_class.prepare_embedded([views[key] for key in keys])
+            except Exception:
+                continue
+            for key in keys:
+                view = views[key]
+                try:
+                    self.responses[key] = view.list(view.request).data
+                except Exception:
+                    pass
+
+    def initialize_view(self, match):
+        """Set up the view `match` resolved to as dispatching an embedded request to it would, up to running
+        the handler, or return `None` if the request is refused.
+        """
+        view_func, view_args, view_kwargs = match
+        view = view_func.cls()
+        view.args = view_args
+        view.kwargs = dict(view_kwargs, is_embedded=True)
+        view.request = view.initialize_request(EmbeddedRequest(self.view.request), *view.args, **view.kwargs)
+        view.headers = view.default_response_headers
+        try:
+            view.initial(view.request, *view.args, **view.kwargs)
+        except Exception:
+            return None
+        return view
+
+    def __call__(self, item):
+        # resolve must be implemented on the field
+        match = self.field.resolve(item)
+        view, view_args, view_kwargs = match
+        key = self.get_key(match)
+        if key not in self.responses:
+            if issubclass(view.cls, ListModelMixin) and self.field.always_embed:
+                raise Exception("Cannot auto-embed a list view.")
+            request = EmbeddedRequest(self.view.request)
+            view_kwargs = dict(view_kwargs, request=request, is_embedded=True)
+            self.responses[key] = view(*view_args, **view_kwargs).data
+        return self.responses[key]
+
+
 class JSONAPIBaseView(generics.GenericAPIView):
 
+    FIELDSET_PATTERN = re.compile(r'^fields\[(?P<type>\w+)\]$')
+
     def __init__(self, **kwargs):
         assert getattr(self, 'view_name', None), 'Must specify view_name on view.'
         assert getattr(self, 'view_category', None), 'Must specify view_category on view.'
@@ -21,25 +115,64 @@ class JSONAPIBaseView(generics.GenericAPIView):
         """Create a partial function to fetch the values of an embedded field. A basic
         example is to include a Node's children in a single response.
 
+        References to batch-load for the embed can be declared on the serializer as
+        `Meta.embed_prefetch = {field_name: (path, ...)}`.
+
         :param str field_name: Name of field of the view's serializer_class to load
         results for
-        :return function object -> dict:
+        :return EmbedPlanner: callable object -> dict
         """
         if getattr(field, 'field', None):
                 field = field.field
-        def partial(item):
-            # resolve must be implemented on the field
-            view, view_args, view_kwargs = field.resolve(item)
-            if issubclass(view.cls, ListModelMixin) and field.always_embed:
-                raise Exception("Cannot auto-embed a list view.")
-            request = EmbeddedRequest(self.request)
-            view_kwargs.update({
-                'request': request,
-                'is_embedded': True
-            })
-            response = view(*view_args, **view_kwargs)
-            return response.data
-        return partial
+        embed_prefetch = getattr(getattr(self.serializer_class, 'Meta', None), 'embed_prefetch', {})
+        return EmbedPlanner(self, field, embed_prefetch.get(field_name, ()))
+
+    @classmethod
+    def prepare_embedded(cls, views):
+        """Load what embedding this list view for a page of items needs, given the initialized views of their
+        requests, so that their responses can be built without querying per item. Views keep what is loaded
+        for `get_queryset` to use. By default, each view queries for itself.
+        """
+        pass
+
+    def get_sparse_fieldsets(self):
+        """Parse JSON API sparse fieldsets, e.g. `fields[nodes]=title,date_modified`, from the query string.
+        Embedded requests share the query string, so fieldsets apply to embedded resources of the same type.
+
+        :return dict: resource type -> set of field names
+        """
+        fieldsets = {}
+        for key, value in self.request.query_params.iteritems():
+            match = self.FIELDSET_PATTERN.match(key)
+            if match:
+                fieldsets[match.group('type')] = set(name.strip() for name in value.split(',') if name.strip())
+        return fieldsets
+
+    def should_stream(self):
+        """Whether list data can be handed to the renderer as a `StreamedList`. Only top-level GET
+        requests are streamed, and only to renderers that support it.
+        """
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        return (
+            api_settings.STREAM_RESPONSES and
+            self.request.method == 'GET' and
+            not self.kwargs.get('is_embedded') and
+            getattr(renderer, 'streaming', False)
+        )
+
+    # overrides APIView
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Render streamed list data here rather than after the view returns. Its items are serialized as it
+        is rendered, so errors serializing them, e.g. invalid query parameters, get the view's error handling.
+        """
+        response = super(JSONAPIBaseView, self).finalize_response(request, response, *args, **kwargs)
+        if is_streamed(getattr(response, 'data', None)):
+            try:
+                response.render()
+            except Exception as exc:
+                response = self.handle_exception(exc)
+                response = super(JSONAPIBaseView, self).finalize_response(request, response, *args, **kwargs)
+        return response
 
     def get_serializer_context(self):
         """Inject request into the serializer context. Additionally, inject partial functions
@@ -69,7 +202,9 @@ class JSONAPIBaseView(generics.GenericAPIView):
             embed_field = fields_check.get(embed)
             embeds_partials[embed] = self._get_embed_partial(embed, embed_field)
         context.update({
-            'embed': embeds_partials
+            'embed': embeds_partials,
+            'fieldsets': self.get_sparse_fieldsets(),
+            'stream': self.should_stream(),
         })
         return context
 
@@ -164,6 +299,16 @@ def root(request, format=None):
 
     Some endpoints are automatically embedded.
 
+    ###Sparse Fieldsets
+
+    Responses can be limited to the attributes and relationships a client needs with the `fields[{type}]` query
+    parameter, as described in the [JSON-API spec](http://jsonapi.org/format/1.0/#fetching-sparse-fieldsets).
+
+        /nodes/?fields[nodes]=title,date_modified
+
+    The `id`, `type` and `links` of each entity are always returned.  Fieldsets also apply to embedded entities of the
+    same type.
+
     ###Pagination
 
     All entity collection endpoints respond to the `page` query parameter behavior as described in the [JSON-API
@@ -18,6 +18,9 @@ class CollectionSerializer(JSONAPISerializer):
         'date_modified',
     ])
 
+    # Stored fields to sort database queries on in place of computed attributes
+    ordering_sources = {'date_modified': 'last_logged'}
+
     id = IDField(source='_id', read_only=True)
     type = TypeField()
 
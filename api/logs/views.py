@@ -1,7 +1,8 @@
 from rest_framework import generics, permissions as drf_permissions
 from rest_framework.exceptions import NotFound
+from modularodm import Q
 
-from website.models import NodeLog
+from website.models import Node, NodeLog
 
 from framework.auth.oauth_scopes import CoreScopes
 
@@ -87,7 +88,7 @@ class LogNodeList(JSONAPIBaseView, generics.ListAPIView, ODMFilterMixin):
         else:
             auth_user = get_user_auth(self.request)
             return [
-                node for node in log.node__logged
+                node for node in Node.find(Q('_id', 'in', log.node_ids))
                 if node.can_view(auth_user)
             ]
 
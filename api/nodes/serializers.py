@@ -5,7 +5,7 @@ from modularodm.exceptions import ValidationValueError
 from framework.auth.core import Auth
 from framework.exceptions import PermissionsError
 
-from website.models import Node, User, Comment
+from website.models import Node, User
 from website.exceptions import NodeStateError
 from website.util import permissions as osf_permissions
 
@@ -13,6 +13,7 @@ from api.base.utils import get_object_or_error, absolute_reverse
 from api.base.serializers import (JSONAPISerializer, WaterbutlerLink, NodeFileHyperLinkField, IDField, TypeField,
                                   TargetTypeField, JSONAPIListField, LinksField, RelationshipField, DevOnly, HideIfRegistration, HideIfRetraction)
 from api.base.exceptions import InvalidModelValueError
+from api.nodes.utils import NodeRelatedCounts
 
 
 class NodeTagField(ser.Field):
@@ -40,6 +41,9 @@ class NodeSerializer(JSONAPISerializer):
         'registration'
     ])
 
+    # Stored fields to sort database queries on in place of computed attributes
+    ordering_sources = {'date_modified': 'last_logged'}
+
     id = IDField(source='_id', read_only=True)
     type = TypeField()
 
@@ -120,6 +124,21 @@ class NodeSerializer(JSONAPISerializer):
 
     class Meta:
         type_ = 'nodes'
+        # References dereferenced per node by HideIfRetraction
+        prefetch = ('retraction', 'node__parent')
+        # References dereferenced per node by individual fields and related counts
+        field_prefetch = {
+            'children': ('nodes', ),
+            'node_links': ('nodes', ),
+            'forked_from': ('forked_from', ),
+        }
+        # References dereferenced per node by embedded views
+        embed_prefetch = {
+            'contributors': ('contributors', ),
+            'children': ('nodes', 'nodes.contributors'),
+            'parent': ('node__parent', 'node__parent.contributors'),
+            'forked_from': ('forked_from', 'forked_from.contributors'),
+        }
 
     def get_absolute_url(self, obj):
         return obj.absolute_url
@@ -134,26 +153,30 @@ class NodeSerializer(JSONAPISerializer):
             auth = Auth(user)
         return auth
 
+    def get_related_counts(self, obj):
+        """Return the `NodeRelatedCounts` for the page being serialized, or for `obj` alone if it is not on it."""
+        related_counts = self.context.get('node_related_counts')
+        if related_counts is None or not related_counts.covers(obj):
+            page = self.context.get('page') or []
+            nodes = page if obj in page else [obj]
+            related_counts = NodeRelatedCounts(nodes, self.get_user_auth(self.context['request']))
+            self.context['node_related_counts'] = related_counts
+        return related_counts
+
     def get_node_count(self, obj):
-        auth = self.get_user_auth(self.context['request'])
-        nodes = [node for node in obj.nodes if node.can_view(auth) and node.primary and not node.is_deleted]
-        return len(nodes)
+        return self.get_related_counts(obj).get('children', obj)
 
     def get_contrib_count(self, obj):
-        return len(obj.contributors)
+        return self.get_related_counts(obj).get('contributors', obj)
 
     def get_registration_count(self, obj):
-        auth = self.get_user_auth(self.context['request'])
-        registrations = [node for node in obj.node__registrations if node.can_view(auth)]
-        return len(registrations)
+        return self.get_related_counts(obj).get('registrations', obj)
 
     def get_pointers_count(self, obj):
-        return len(obj.nodes_pointer)
+        return self.get_related_counts(obj).get('pointers', obj)
 
     def get_unread_comments_count(self, obj):
-        auth = self.get_user_auth(self.context['request'])
-        user = auth.user
-        return Comment.find_unread(user=user, node=obj)
+        return self.get_related_counts(obj).get('unread_comments', obj)
 
     def create(self, validated_data):
         node = Node(**validated_data)
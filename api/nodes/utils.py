@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import time
+
+from framework.mongo.utils import prefetch
+from website.models import Comment
+
+from api.base import settings
+
+# (relationship, node id, node date_modified, user id) => (expiry timestamp, count)
+_related_counts_cache = {}
+MAX_CACHED_COUNTS = 10000
+
+
+def _prune_related_counts_cache(now):
+    for key, (expiry, _) in _related_counts_cache.items():
+        if expiry <= now:
+            del _related_counts_cache[key]
+    if len(_related_counts_cache) > MAX_CACHED_COUNTS:
+        _related_counts_cache.clear()
+
+
+def _count_children(nodes, auth):
+    prefetch(nodes, 'nodes')
+    return dict(
+        (node._id, len([
+            child for child in node.nodes
+            if child.primary and not child.is_deleted and child.can_view(auth)
+        ]))
+        for node in nodes
+    )
+
+
+def _count_contributors(nodes, auth):
+    return dict((node._id, len(node.contributors)) for node in nodes)
+
+
+def _count_registrations(nodes, auth):
+    prefetch(nodes, 'node__registrations')
+    return dict(
+        (node._id, len([each for each in node.node__registrations if each.can_view(auth)]))
+        for node in nodes
+    )
+
+
+def _count_pointers(nodes, auth):
+    prefetch(nodes, 'nodes')
+    return dict((node._id, len(node.nodes_pointer)) for node in nodes)
+
+
+def _count_unread_comments(nodes, auth):
+    return Comment.find_unread_counts(auth.user, nodes)
+
+
+class NodeRelatedCounts(object):
+    """Related-object counts for a page of nodes.
+
+    Each relationship is counted for the whole page the first time any node asks for it, with one
+    query per relationship. If `RELATED_COUNTS_CACHE_TTL` is set, counts are also cached for that many
+    seconds, keyed by node id, `date_modified` and the requesting user.
+    """
+
+    COUNTERS = {
+        'children': _count_children,
+        'contributors': _count_contributors,
+        'registrations': _count_registrations,
+        'pointers': _count_pointers,
+        'unread_comments': _count_unread_comments,
+    }
+
+    def __init__(self, nodes, auth):
+        self.nodes = list(nodes)
+        self.node_ids = set(node._id for node in self.nodes)
+        self.auth = auth
+        self.counts = {}
+
+    def covers(self, node):
+        return node._id in self.node_ids
+
+    def get(self, relationship, node):
+        if relationship not in self.counts:
+            self.counts[relationship] = self.compute(relationship)
+        return self.counts[relationship][node._id]
+
+    def compute(self, relationship):
+        ttl = settings.RELATED_COUNTS_CACHE_TTL
+        if not ttl:
+            return self.COUNTERS[relationship](self.nodes, self.auth)
+
+        now = time.time()
+        user_id = getattr(self.auth.user, '_id', None)
+        keys = dict(
+            (node._id, (relationship, node._id, node.date_modified, user_id))
+            for node in self.nodes
+        )
+        counts = {}
+        misses = []
+        for node in self.nodes:
+            cached = _related_counts_cache.get(keys[node._id])
+            if cached and cached[0] > now:
+                counts[node._id] = cached[1]
+            else:
+                misses.append(node)
+        if misses:
+            if len(_related_counts_cache) > MAX_CACHED_COUNTS:
+                _prune_related_counts_cache(now)
+            computed = self.COUNTERS[relationship](misses, self.auth)
+            for node_id, count in computed.iteritems():
+                _related_counts_cache[keys[node_id]] = (now + ttl, count)
+            counts.update(computed)
+        return counts
+
+
+def clear_related_counts_cache():
+    _related_counts_cache.clear()
@@ -1,11 +1,14 @@
+import itertools
+
 import requests
 
 from modularodm import Q
 from rest_framework import generics, permissions as drf_permissions
-from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError, NotFound
 from rest_framework.status import is_server_error
 
 from framework.auth.oauth_scopes import CoreScopes
+from framework.mongo.utils import prefetch
 
 from api.base import generic_bulk_views as bulk_views
 from api.base import permissions as base_permissions
@@ -41,6 +44,7 @@ from api.logs.serializers import NodeLogSerializer
 from website.exceptions import NodeStateError
 from website.util.permissions import ADMIN
 from website.files.models import FileNode
+from website.files.models import StoredFileNode
 from website.files.models import OsfStorageFileNode
 from website.models import Node, Pointer, Comment, NodeLog
 from framework.auth.core import User
@@ -244,12 +248,7 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
         return query
 
     def filter_non_retracted_nodes(self, query):
-        nodes = Node.find(query)
-        # Refetching because this method needs to return a queryset instead of a
-        # list comprehension for subsequent filtering on ordering.
-        non_retracted_list = [node._id for node in nodes if not node.is_retracted]
-        non_retracted_nodes = Node.find(Q('_id', 'in', non_retracted_list))
-        return non_retracted_nodes
+        return Node.find(query & Q('retracted', 'ne', True))
 
     # overrides ListBulkCreateJSONAPIView, BulkUpdateJSONAPIView
     def get_queryset(self):
@@ -541,13 +540,32 @@ class NodeContributorsList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bu
     view_category = 'nodes'
     view_name = 'node-contributors'
 
+    # overrides JSONAPIBaseView
+    @classmethod
+    def prepare_embedded(cls, views):
+        """Load the contributors of every embedding node with one query."""
+        indexes = []
+        for view in views:
+            try:
+                indexes.append(view.get_node().contributor_index)
+            except APIException:
+                # Left to the view to respond with
+                continue
+        missing = set(
+            user_id for index in indexes for user_id in index.ids
+            if not User._is_cached(user_id)
+        )
+        if missing:
+            # Iterating the results loads them into the identity map
+            list(User.find(Q('_id', 'in', list(missing))))
+
     def get_default_queryset(self):
         node = self.get_node()
-        visible_contributors = node.visible_contributor_ids
+        index = node.contributor_index
         contributors = []
-        for contributor in node.contributors:
-            contributor.bibliographic = contributor._id in visible_contributors
-            contributor.permission = node.get_permissions(contributor)[-1]
+        for contributor, record in zip(index.users(), index):
+            contributor.bibliographic = record.visible
+            contributor.permission = record.permission
             contributor.node_id = node._id
             contributors.append(contributor)
         return contributors
@@ -587,7 +605,7 @@ class NodeContributorsList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bu
     def perform_destroy(self, instance):
         auth = get_user_auth(self.request)
         node = self.get_node()
-        if len(node.visible_contributors) == 1 and node.get_visible(instance):
+        if len(node.visible_contributor_ids) == 1 and node.get_visible(instance):
             raise ValidationError("Must have at least one visible contributor")
         if instance not in node.contributors:
                 raise NotFound('User cannot be found in the list of contributors.')
@@ -703,7 +721,7 @@ class NodeContributorDetail(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIVi
     def perform_destroy(self, instance):
         node = self.get_node()
         auth = get_user_auth(self.request)
-        if len(node.visible_contributors) == 1 and node.get_visible(instance):
+        if len(node.visible_contributor_ids) == 1 and node.get_visible(instance):
             raise ValidationError("Must have at least one visible contributor")
         removed = node.remove_contributor(instance, auth)
         if not removed:
@@ -874,16 +892,40 @@ class NodeChildrenList(JSONAPIBaseView, bulk_views.ListBulkCreateJSONAPIView, No
             Q('is_folder', 'ne', True)
         )
 
-    # overrides ListBulkCreateJSONAPIView
-    def get_queryset(self):
-        node = self.get_node()
-        req_query = self.get_query_from_request()
-
+    # overrides JSONAPIBaseView
+    @classmethod
+    def prepare_embedded(cls, views):
+        """Load the children of every embedding node with one query."""
+        child_ids = {}
+        for view in views:
+            try:
+                child_ids[view] = [e._id for e in view.get_node().nodes if e.primary]
+            except APIException:
+                # Left to the view to respond with
+                continue
+        if not child_ids:
+            return
         query = (
-            Q('_id', 'in', [e._id for e in node.nodes if e.primary]) &
-            req_query
+            Q('_id', 'in', list(set(itertools.chain(*child_ids.values())))) &
+            views[0].get_query_from_request()
         )
-        nodes = Node.find(query)
+        children = dict((child._id, child) for child in Node.find(query))
+        for view, ids in child_ids.items():
+            view.embedded_children = [children[child_id] for child_id in ids if child_id in children]
+        prefetch(children.values(), *views[0].get_serializer().get_prefetch_paths())
+
+    # overrides ListBulkCreateJSONAPIView
+    def get_queryset(self):
+        nodes = getattr(self, 'embedded_children', None)
+        if nodes is None:
+            node = self.get_node()
+            req_query = self.get_query_from_request()
+
+            query = (
+                Q('_id', 'in', [e._id for e in node.nodes if e.primary]) &
+                req_query
+            )
+            nodes = Node.find(query)
         auth = get_user_auth(self.request)
         children = [each for each in nodes if each.can_view(auth)]
         return children
@@ -1316,6 +1358,25 @@ class NodeFilesList(JSONAPIBaseView, generics.ListAPIView, WaterButlerMixin, Lis
     view_category = 'nodes'
     view_name = 'node-files'
 
+    model_class = StoredFileNode
+    # `path` and `materialized_path` are computed by the providers' file classes, so are filtered in memory
+    odm_filter_fields = frozenset(['name'])
+
+    # overrides ListFilterMixin
+    def get_default_odm_query(self):
+        # Children of osfstorage folders are already in the database, so filters can be pushed into the query
+        if self.kwargs[self.provider_lookup_url_kwarg] != 'osfstorage':
+            return None
+        folder = self.fetch_from_waterbutler()
+        if folder.is_file:
+            # We should not have gotten a file here
+            raise NotFound
+        return Q('parent', 'eq', folder._id)
+
+    # overrides ListFilterMixin
+    def get_odm_queryset(self, query):
+        return list(FileNode.find(query))
+
     def get_default_queryset(self):
         # Don't bother going to waterbutler for osfstorage
         files_list = self.fetch_from_waterbutler()
@@ -108,6 +108,15 @@ class RegistrationSerializer(NodeSerializer):
 
     class Meta:
         type_ = 'registrations'
+        prefetch = ('retraction', 'node__parent')
+        field_prefetch = {
+            'children': ('nodes', ),
+            'node_links': ('nodes', ),
+            'forked_from': ('forked_from', ),
+            'pending_embargo': ('embargo', ),
+            'pending_registration_approval': ('embargo', 'registration_approval'),
+            'registered_by': ('registered_user', ),
+        }
 
 
 class RegistrationDetailSerializer(RegistrationSerializer):
@@ -129,14 +129,10 @@ class RegistrationList(JSONAPIBaseView, generics.ListAPIView, ODMFilterMixin):
     # overrides ListAPIView
     def get_queryset(self):
         query = self.get_query_from_request()
-        blacklisted = self.is_blacklisted(query)
-        nodes = Node.find(query)
         # If attempting to filter on a blacklisted field, exclude retractions.
-        if blacklisted:
-            non_retracted_list = [node._id for node in nodes if not node.is_retracted]
-            non_retracted_nodes = Node.find(Q('_id', 'in', non_retracted_list))
-            return non_retracted_nodes
-        return nodes
+        if self.is_blacklisted(query):
+            query = query & Q('retracted', 'ne', True)
+        return Node.find(query)
 
 
 class RegistrationDetail(JSONAPIBaseView, generics.RetrieveAPIView, RegistrationMixin):
@@ -8,11 +8,12 @@ import mock
 
 from rest_framework import serializers as ser
 
+from framework.auth import Auth
 from tests.base import ApiTestCase
 from tests import factories
 
 from api.base.settings.defaults import API_BASE
-from api.base.filters import FilterMixin
+from api.base.filters import FilterMixin, ListFilterMixin, ODMOrderingFilter
 
 from api.base.exceptions import (
     InvalidFilterError,
@@ -227,3 +228,91 @@ class TestFilterMixin(ApiTestCase):
         field = FakeSerializer._declared_fields['float_field']
         value = self.view.convert_value(value, field)
         assert_equal(value, 42.0)
+
+
+class FakeListView(ListFilterMixin):
+
+    serializer_class = FakeSerializer
+
+
+class FakeItem(object):
+
+    def __init__(self, string_field, int_field):
+        self.string_field = string_field
+        self.int_field = int_field
+
+
+class TestListFilterMixin(ApiTestCase):
+
+    def setUp(self):
+        super(TestListFilterMixin, self).setUp()
+        self.view = FakeListView()
+        self.items = [
+            FakeItem('foo', 3),
+            FakeItem('bar', 1),
+            FakeItem('foobar', 2),
+            FakeItem('foo', 0),
+        ]
+
+    def test_param_queryset_preserves_order(self):
+        query_params = {
+            'filter[string_field]': 'foo',
+            'filter[int_field][gt]': '0',
+        }
+        filtered = self.view.param_queryset(query_params, self.items)
+        assert_equal(filtered, [self.items[0], self.items[2]])
+
+    def test_param_queryset_without_filters(self):
+        filtered = self.view.param_queryset({}, self.items)
+        assert_equal(filtered, self.items)
+
+    def test_filters_to_odm_query(self):
+        filters = self.view.parse_query_params({'filter[int_field][gt]': '0'})
+        query = self.view.filters_to_odm_query(filters)
+        assert_equal(query.attribute, 'int_field')
+        assert_equal(query.operator, 'gt')
+        assert_equal(query.argument, 0)
+        assert_is_none(self.view.filters_to_odm_query({}))
+
+    def test_pop_odm_filters_only_takes_listed_fields(self):
+        self.view.odm_filter_fields = frozenset(['string_field'])
+        filters = self.view.parse_query_params({
+            'filter[string_field][eq]': 'foo',
+            'filter[int_field][gt]': '0',
+        })
+        odm_filters = self.view.pop_odm_filters(filters)
+        assert_equal(odm_filters, {'string_field': [{'op': 'icontains', 'value': 'foo'}]})
+        assert_equal(filters.keys(), ['int_field'])
+
+
+class FakeOrderingView(object):
+
+    serializer_class = FakeSerializer
+    ordering = ('-bool_field', )
+
+
+class TestODMOrderingFilter(ApiTestCase):
+
+    def setUp(self):
+        super(TestODMOrderingFilter, self).setUp()
+        self.filter = ODMOrderingFilter()
+        self.view = FakeOrderingView()
+
+    def test_orders_by_field_sources(self):
+        request = mock.Mock(query_params={'ordering': '-bool_field,int_field'})
+        assert_equal(self.filter.get_ordering(request, None, self.view), ['-foobar', 'int_field'])
+
+    def test_source_names_are_valid(self):
+        request = mock.Mock(query_params={'ordering': 'foobar'})
+        assert_equal(self.filter.get_ordering(request, None, self.view), ['foobar'])
+
+    def test_invalid_fields_fall_back_to_default_ordering(self):
+        request = mock.Mock(query_params={'ordering': 'not_a_field'})
+        assert_equal(self.filter.get_ordering(request, None, self.view), ['-foobar'])
+
+    def test_node_list_orders_by_last_logged(self):
+        old = factories.ProjectFactory(is_public=True)
+        new = factories.ProjectFactory(is_public=True)
+        old.add_tag('foo', auth=Auth(old.creator))
+        res = self.app.get('/{}nodes/'.format(API_BASE), params={'ordering': '-date_modified'})
+        assert_equal([node['id'] for node in res.json['data']], [old._id, new._id])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from nose.tools import *  # flake8: noqa
+
+from framework.auth.core import Auth
+
+from website.models import Node
+
+from api.base.settings.defaults import API_BASE
+from api.base.pagination import JSONAPIPagination
+
+from tests.base import ApiTestCase
+from tests.factories import ProjectFactory, AuthUserFactory
+
+
+class TestCursorEncoding(ApiTestCase):
+
+    def setUp(self):
+        super(TestCursorEncoding, self).setUp()
+        self.paginator = JSONAPIPagination()
+
+    def test_round_trips_datetimes(self):
+        now = datetime.datetime(2015, 10, 1, 12, 30, 15, 1234)
+        cursor = self.paginator.encode_cursor(now, 'abc12', reverse=True)
+        assert_equal(self.paginator.decode_cursor(cursor), (now, 'abc12', True))
+
+    def test_empty_cursor_is_first_page(self):
+        assert_is_none(self.paginator.decode_cursor(''))
+
+
+class TestCursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super(TestCursorPagination, self).setUp()
+        self.user = AuthUserFactory()
+        self.projects = [ProjectFactory(is_public=True, creator=self.user) for _ in range(5)]
+        self.url = '/{}nodes/?ordering=date_created&page[size]=2&page[cursor]='.format(API_BASE)
+
+    def tearDown(self):
+        super(TestCursorPagination, self).tearDown()
+        Node.remove()
+
+    def test_walks_every_node_once_in_order(self):
+        expected = [
+            node._id for node in
+            sorted(self.projects, key=lambda node: (node.date_created, node._id))
+        ]
+        seen = []
+        url = self.url
+        while url:
+            res = self.app.get(url)
+            assert_equal(res.status_code, 200)
+            seen.extend(each['id'] for each in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(seen, expected)
+
+    def test_skips_total_unless_requested(self):
+        res = self.app.get(self.url)
+        assert_not_in('total', res.json['links']['meta'])
+        assert_is_none(res.json['links']['last'])
+        assert_is_none(res.json['links']['prev'])
+
+        res = self.app.get(self.url + '&meta=total')
+        assert_equal(res.json['links']['meta']['total'], 5)
+
+    def test_total_with_keyset_constraint(self):
+        expected = [
+            node._id for node in
+            sorted(self.projects, key=lambda node: (node.date_created, node._id))
+        ]
+        seen = []
+        url = self.url + '&meta=total'
+        while url:
+            res = self.app.get(url)
+            assert_equal(res.json['links']['meta']['total'], 5)
+            seen.extend(each['id'] for each in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(seen, expected)
+
+    def test_prev_link_returns_previous_page(self):
+        first = self.app.get(self.url)
+        second = self.app.get(first.json['links']['next'])
+        res = self.app.get(second.json['links']['prev'])
+        assert_equal(
+            [each['id'] for each in res.json['data']],
+            [each['id'] for each in first.json['data']]
+        )
+
+    def test_invalid_cursor(self):
+        res = self.app.get(self.url + 'not-a-cursor', expect_errors=True)
+        assert_equal(res.status_code, 404)
+
+    def test_in_memory_list(self):
+        project = self.projects[0]
+        for _ in range(2):
+            project.add_contributor(AuthUserFactory(), auth=Auth(self.user), save=True)
+        url = '/{}nodes/{}/contributors/?page[size]=2&page[cursor]='.format(API_BASE, project._id)
+        seen = []
+        urls = []
+        while url:
+            urls.append(url)
+            res = self.app.get(url, auth=self.user.auth)
+            seen.extend(each['id'] for each in res.json['data'])
+            url = res.json['links']['next']
+        # Contributors keep their bibliographic order
+        assert_equal(seen, [user._id for user in project.contributors])
+
+        res = self.app.get(urls[1], auth=self.user.auth)
+        res = self.app.get(res.json['links']['prev'], auth=self.user.auth)
+        assert_equal([each['id'] for each in res.json['data']], [user._id for user in project.contributors[:2]])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+import types
+from collections import OrderedDict
+
+import mock
+from nose.tools import *  # flake8: noqa
+
+from api.base import settings as api_settings
+from api.base.settings.defaults import API_BASE
+from api.base.renderers import JSONAPIRenderer, StreamedList
+
+from tests.base import ApiTestCase
+from tests.factories import ProjectFactory
+
+
+class TestJSONAPIRenderer(ApiTestCase):
+
+    def setUp(self):
+        super(TestJSONAPIRenderer, self).setUp()
+        self.renderer = JSONAPIRenderer()
+        self.items = [{'id': 'abc12', 'title': u'Ünïcode  '}, {'id': 'xyz34', 'title': None}]
+
+    def response(self, data):
+        return OrderedDict([
+            ('data', data),
+            ('links', OrderedDict([('next', None), ('meta', {'total': 2})])),
+        ])
+
+    def test_streamed_output_matches_buffered_output(self):
+        streamed = self.renderer.render(self.response(StreamedList(self.items, dict)))
+        assert_is_instance(streamed, types.GeneratorType)
+        assert_equal(b''.join(streamed), self.renderer.render(self.response(self.items)))
+
+    def test_streams_top_level_lists(self):
+        streamed = self.renderer.render(StreamedList(self.items, dict))
+        assert_equal(b''.join(streamed), self.renderer.render(self.items))
+
+    def test_serializes_items_while_rendering(self):
+        serialize = mock.Mock(side_effect=dict)
+        chunks = self.renderer.render(self.response(StreamedList(self.items, serialize)))
+        assert_false(serialize.called)
+        list(chunks)
+        assert_equal(serialize.call_count, 2)
+
+    def test_indented_output_is_not_streamed(self):
+        rendered = self.renderer.render(
+            self.response(StreamedList(self.items, dict)),
+            accepted_media_type='application/vnd.api+json; indent=4'
+        )
+        assert_equal(json.loads(rendered)['data'], self.items)
+
+
+class TestStreamedResponses(ApiTestCase):
+
+    def setUp(self):
+        super(TestStreamedResponses, self).setUp()
+        for _ in range(3):
+            ProjectFactory(is_public=True)
+        self.url = '/{}nodes/'.format(API_BASE)
+
+    def test_streamed_response_matches_buffered_response(self):
+        streamed = self.app.get(self.url)
+        with mock.patch.object(api_settings, 'STREAM_RESPONSES', False):
+            buffered = self.app.get(self.url)
+        assert_equal(streamed.json, buffered.json)
+        assert_equal(len(streamed.json['data']), 3)
+
+    def test_invalid_embed_still_raises_bad_request(self):
+        res = self.app.get(self.url, params={'embed': 'foo'}, expect_errors=True)
+        assert_equal(res.status_code, 400)
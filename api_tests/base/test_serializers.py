@@ -118,12 +118,63 @@ class TestApiBaseSerializers(ApiTestCase):
         res = self.app.get(self.url, params={'related_counts': 'fish'}, expect_errors=True)
         assert_equal(res.status_code, http.BAD_REQUEST)
 
+    def test_invalid_related_counts_value_on_list_raises_bad_request(self):
+        # List items are serialized while the response is rendered
+        res = self.app.get('/{}nodes/'.format(API_BASE), params={'related_counts': 'fish'}, expect_errors=True)
+        assert_equal(res.status_code, http.BAD_REQUEST)
+        assert_equal(res.json['errors'][0]['source'], {'parameter': 'related_counts'})
+
     def test_invalid_embed_value_raise_bad_request(self):
         res = self.app.get(self.url, params={'embed': 'foo'}, expect_errors=True)
         assert_equal(res.status_code, http.BAD_REQUEST)
         assert_equal(res.json['errors'][0]['detail'], "The following fields are not embeddable: foo")
 
 
+class TestSparseFieldsets(ApiTestCase):
+
+    def setUp(self):
+        super(TestSparseFieldsets, self).setUp()
+        self.node = factories.ProjectFactory(is_public=True)
+        factories.ProjectFactory(is_public=True, parent=self.node)
+        self.url = '/{}nodes/'.format(API_BASE)
+
+    def test_only_requested_fields_are_serialized(self):
+        res = self.app.get(self.url, params={'fields[nodes]': 'title,date_modified'})
+        assert_equal(res.status_code, 200)
+        for data in res.json['data']:
+            assert_equal(set(data['attributes'].keys()), {'title', 'date_modified'})
+            assert_not_in('relationships', data)
+            assert_in('id', data)
+            assert_in('links', data)
+
+    def test_relationships_can_be_requested(self):
+        res = self.app.get(self.url, params={'fields[nodes]': 'children'})
+        for data in res.json['data']:
+            assert_equal(data['attributes'], {})
+            assert_equal(data['relationships'].keys(), ['children'])
+
+    def test_fieldsets_for_other_types_are_ignored(self):
+        res = self.app.get(self.url, params={'fields[users]': 'full_name'})
+        assert_in('category', res.json['data'][0]['attributes'])
+
+    def test_unselected_fields_are_not_evaluated(self):
+        with mock.patch.object(NodeSerializer, 'get_node_count') as mock_count:
+            self.app.get(self.url, params={'fields[nodes]': 'title', 'related_counts': True})
+        assert_false(mock_count.called)
+
+    def test_unselected_references_are_not_prefetched(self):
+        with mock.patch('api.base.serializers.prefetch') as mock_prefetch:
+            self.app.get(self.url, params={'fields[nodes]': 'title'})
+        paths = mock_prefetch.call_args[0][1:]
+        assert_not_in('nodes', paths)
+        assert_not_in('forked_from', paths)
+
+    def test_invalid_field_raises_bad_request(self):
+        res = self.app.get(self.url, params={'fields[nodes]': 'title,foo'}, expect_errors=True)
+        assert_equal(res.status_code, http.BAD_REQUEST)
+        assert_equal(res.json['errors'][0]['source']['parameter'], 'fields[nodes]')
+
+
 class TestRelationshipField(DbTestCase):
 
     # We need a Serializer to test the Relationship field (needs context)
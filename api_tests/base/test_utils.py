@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import mock
 from nose.tools import *  # flake8: noqa
 
+from django.core.urlresolvers import resolve, reverse
 from rest_framework import fields
 
 from api.base import utils as api_utils
@@ -18,3 +20,59 @@ class TruthyFalsyTestCase(ApiTestCase):
 
     def test_falsy(self):
         assert_equal(api_utils.FALSY, fields.BooleanField.FALSE_VALUES)
+
+
+class TestURLTemplates(ApiTestCase):
+
+    def test_reverse_view_matches_reverse(self):
+        kwargs = {'node_id': 'abc12', 'user_id': 'xyz34'}
+        assert_equal(
+            api_utils.reverse_view('nodes:node-contributor-detail', kwargs),
+            reverse('nodes:node-contributor-detail', kwargs=kwargs)
+        )
+
+    def test_resolve_view_matches_resolve(self):
+        kwargs = {'node_id': 'abc12'}
+        expected = resolve(reverse('nodes:node-children', kwargs=kwargs))
+        match = api_utils.resolve_view('nodes:node-children', kwargs)
+        assert_equal(match.func, expected.func)
+        assert_equal(match.kwargs, expected.kwargs)
+        assert_equal(match.view_name, expected.view_name)
+
+    def test_values_patterns_may_reject_are_reversed_normally(self):
+        kwargs = {'node_id': 'abc12', 'provider': 'osfstorage', 'path': '/folder/'}
+        assert_equal(
+            api_utils.reverse_view('nodes:node-files', kwargs),
+            reverse('nodes:node-files', kwargs=kwargs)
+        )
+
+    def test_cached_templates_match_reverse(self):
+        views = [
+            ('nodes:node-detail', ['node_id']),
+            ('nodes:node-contributors', ['node_id']),
+            ('nodes:node-contributor-detail', ['node_id', 'user_id']),
+            ('users:user-detail', ['user_id']),
+        ]
+        # Reversed twice with different values, the second time from the cached template
+        for values in ['abc12', 'xyz34']:
+            for view_name, kwarg_names in views:
+                kwargs = {name: values for name in kwarg_names}
+                assert_equal(api_utils.reverse_view(view_name, kwargs), reverse(view_name, kwargs=kwargs))
+
+    def test_urls_are_reversed_once_per_view(self):
+        views = [
+            ('nodes:node-detail', ['node_id']),
+            ('nodes:node-children', ['node_id']),
+            ('nodes:node-contributor-detail', ['node_id', 'user_id']),
+        ]
+        with mock.patch.dict(api_utils._url_templates, clear=True), \
+                mock.patch('api.base.utils.django_reverse', wraps=api_utils.django_reverse) as mock_django_reverse, \
+                mock.patch('api.base.utils.reverse', wraps=api_utils.reverse) as mock_reverse:
+            for count in range(100):
+                for view_name, kwarg_names in views:
+                    kwargs = {name: 'abc{}'.format(count) for name in kwarg_names}
+                    api_utils.reverse_view(view_name, kwargs)
+                    api_utils.resolve_view(view_name, kwargs)
+        assert_equal(mock_django_reverse.call_count, len(views))
+        assert_false(mock_reverse.called)
+
@@ -15,6 +15,8 @@ from tests import factories
 from api.base.settings.defaults import API_BASE
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from api.base.permissions import TokenHasScope
+from api.base.requests import EmbeddedRequest
+from api.nodes.views import NodeChildrenList, NodeContributorsList
 from website.settings import DEBUG_MODE
 
 import importlib
@@ -103,3 +105,61 @@ class TestJSONAPIBaseView(ApiTestCase):
         assert_in('request', mock_to_representation.call_args[0][0].context)
 
 
+
+
+class TestEmbedPlanner(ApiTestCase):
+
+    def setUp(self):
+        super(TestEmbedPlanner, self).setUp()
+        self.user = factories.AuthUserFactory()
+        self.project = factories.ProjectFactory(is_public=True, creator=self.user)
+        self.components = [
+            factories.NodeFactory(parent=self.project, creator=self.user, is_public=True)
+            for _ in range(3)
+        ]
+        self.url = '/{}nodes/{}/children/?embed=parent'.format(API_BASE, self.project._id)
+
+    def test_items_sharing_a_parent_share_one_embedded_request(self):
+        with mock.patch('api.base.views.EmbeddedRequest', wraps=EmbeddedRequest) as mock_request:
+            res = self.app.get(self.url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(mock_request.call_count, 1)
+        assert_equal(len(res.json['data']), 3)
+        for item in res.json['data']:
+            assert_equal(item['embeds']['parent']['data']['id'], self.project._id)
+
+    def test_embedded_references_are_loaded_for_the_whole_page(self):
+        with mock.patch('api.base.views.prefetch') as mock_prefetch:
+            self.app.get(
+                '/{}nodes/{}/children/?embed=contributors'.format(API_BASE, self.project._id),
+                auth=self.user.auth
+            )
+        assert_equal(mock_prefetch.call_count, 1)
+        items, path = mock_prefetch.call_args[0]
+        assert_equal(set(each._id for each in items), set(each._id for each in self.components))
+        assert_equal(path, 'contributors')
+
+    def test_embedded_lists_are_built_without_dispatching_per_item(self):
+        url = '/{}nodes/?embed=children&embed=contributors'.format(API_BASE)
+        with mock.patch.object(NodeChildrenList, 'dispatch') as mock_children, \
+                mock.patch.object(NodeContributorsList, 'dispatch') as mock_contributors:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_false(mock_children.called)
+        assert_false(mock_contributors.called)
+        embeds = next(item for item in res.json['data'] if item['id'] == self.project._id)['embeds']
+        assert_equal(
+            set(child['id'] for child in embeds['children']['data']),
+            set(component._id for component in self.components)
+        )
+        assert_equal(embeds['children']['links']['meta']['total'], 3)
+        assert_equal(len(embeds['contributors']['data']), 1)
+
+    def test_embedded_children_exclude_those_the_user_cannot_view(self):
+        private = factories.NodeFactory(parent=self.components[0], is_public=False)
+        url = '/{}nodes/{}/children/?embed=children'.format(API_BASE, self.project._id)
+        res = self.app.get(url)
+        assert_equal(res.status_code, 200)
+        for item in res.json['data']:
+            assert_not_in(private._id, [child['id'] for child in item['embeds']['children']['data']])
+
@@ -2,6 +2,7 @@
 from urlparse import urlparse
 
 from nose.tools import *  # flake8: noqa
+import mock
 from dateutil.parser import parse as parse_date
 
 from tests.base import DbTestCase, assert_datetime_equal
@@ -10,6 +11,7 @@ from tests.factories import UserFactory, NodeFactory, RegistrationFactory, Proje
 
 from framework.auth import Auth
 from api.nodes.serializers import NodeSerializer
+from api.nodes.utils import NodeRelatedCounts, clear_related_counts_cache
 from api.registrations.serializers import RegistrationSerializer
 from api.base.settings.defaults import API_BASE
 
@@ -55,6 +57,13 @@ class TestNodeSerializer(DbTestCase):
         # Not a fork, so forked_from is removed entirely
         assert_not_in('forked_from', relationships)
 
+    def test_date_modified_of_node_without_log_counters(self):
+        node = NodeFactory(creator=self.user)
+        node.last_logged = None
+        req = make_drf_request()
+        result = NodeSerializer(node, context={'request': req}).data
+        assert_datetime_equal(parse_date(result['data']['attributes']['date_modified']), node.date_modified)
+
     def test_fork_serialization(self):
         node = NodeFactory(creator=self.user)
         fork = node.fork_node(auth=Auth(user=node.creator))
@@ -102,3 +111,53 @@ class TestNodeRegistrationSerializer(DbTestCase):
             urlparse(registered_from).path,
             '/{}nodes/{}/'.format(API_BASE, reg.registered_from._id)
         )
+
+
+class TestNodeRelatedCounts(DbTestCase):
+
+    def setUp(self):
+        super(TestNodeRelatedCounts, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(self.user)
+        self.projects = [ProjectFactory(creator=self.user) for _ in range(3)]
+        NodeFactory(creator=self.user, parent=self.projects[0])
+        NodeFactory(creator=self.user, parent=self.projects[0])
+        RegistrationFactory(creator=self.user, project=self.projects[1])
+
+    def tearDown(self):
+        super(TestNodeRelatedCounts, self).tearDown()
+        clear_related_counts_cache()
+
+    def test_counts_every_node_on_the_page_at_once(self):
+        counts = NodeRelatedCounts(self.projects, self.auth)
+        with mock.patch.dict(NodeRelatedCounts.COUNTERS, {
+            'children': mock.Mock(wraps=NodeRelatedCounts.COUNTERS['children'])
+        }):
+            assert_equal(
+                [counts.get('children', each) for each in self.projects],
+                [2, 0, 0]
+            )
+            assert_equal(NodeRelatedCounts.COUNTERS['children'].call_count, 1)
+        assert_equal(
+            [counts.get('registrations', each) for each in self.projects],
+            [0, 1, 0]
+        )
+        assert_equal(
+            [counts.get('contributors', each) for each in self.projects],
+            [1, 1, 1]
+        )
+
+    def test_serializer_counts_match_the_page(self):
+        req = make_drf_request()
+        req.query_params['related_counts'] = 'true'
+        result = NodeSerializer(self.projects, many=True, context={'request': req}).data
+        counts = [each['relationships']['children']['links']['related']['meta']['count'] for each in result]
+        assert_equal(counts, [2, 0, 0])
+
+    @mock.patch('api.base.settings.RELATED_COUNTS_CACHE_TTL', 60)
+    def test_cached_counts_are_reused(self):
+        NodeRelatedCounts(self.projects, self.auth).get('children', self.projects[0])
+        with mock.patch.dict(NodeRelatedCounts.COUNTERS, {'children': mock.Mock()}):
+            counts = NodeRelatedCounts(self.projects, self.auth)
+            assert_equal(counts.get('children', self.projects[0]), 2)
+            assert_false(NodeRelatedCounts.COUNTERS['children'].called)
@@ -2,6 +2,7 @@ import json
 
 from nose.tools import *  # flake8: noqa
 import httpretty
+import mock
 
 from framework.auth.core import Auth
 
@@ -307,6 +308,39 @@ class TestNodeFilesListFiltering(ApiTestCase):
         assert_equal(len(res.json['data']), 1)  # filters out 'xyz'
         assert_equal(res.json['data'][0]['attributes']['name'], 'abc')
 
+    def test_osfstorage_files_are_filtered_in_the_query(self):
+        root = self.project.get_addon('osfstorage').get_root()
+        root.append_file('abc').save()
+        root.append_file('xyz').save()
+        url = '/{}nodes/{}/files/osfstorage/?filter[name]=xyz'.format(API_BASE, self.project._id)
+        with mock.patch('api.base.filters.ListFilterMixin.filter_in_memory') as mock_filter:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_false(mock_filter.called)
+        assert_equal(len(res.json['data']), 1)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'xyz')
+
+    def test_osfstorage_files_are_filterable_by_path(self):
+        root = self.project.get_addon('osfstorage').get_root()
+        abc = root.append_file('abc')
+        abc.save()
+        root.append_file('xyz').save()
+        url = '/{}nodes/{}/files/osfstorage/?filter[path]={}'.format(API_BASE, self.project._id, abc._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(len(res.json['data']), 1)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'abc')
+
+    def test_osfstorage_files_are_filterable_by_kind(self):
+        root = self.project.get_addon('osfstorage').get_root()
+        root.append_file('abc').save()
+        root.append_folder('xyz').save()
+        url = '/{}nodes/{}/files/osfstorage/?filter[kind]=folder'.format(API_BASE, self.project._id)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(len(res.json['data']), 1)
+        assert_equal(res.json['data'][0]['attributes']['name'], 'xyz')
+
 
 class TestNodeFilesListPagination(ApiTestCase):
     def setUp(self):
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
+import datetime
 import random
 
 import pymongo
 from modularodm import fields
 
-from framework.mongo import StoredObject
+from framework.mongo import ObjectId, StoredObject, bulk_insert
 
 from modularodm.storage.base import KeyExistsException
 
@@ -16,6 +17,16 @@ class BlacklistGuid(StoredObject):
     _id = fields.StringField(primary=True)
 
 
+class PooledGuid(StoredObject):
+    """An id drawn ahead of time for a new GUID, already checked against the blacklist and the existing GUIDs.
+    The pool is kept full by `framework.guid.tasks.fill_guid_pool`, and drawn from by `Guid.reserve`.
+    """
+
+    _id = fields.StringField(primary=True)
+    # Set by `Guid.reserve` on the ids of a batch it is taking, until it removes them from the pool
+    claim = fields.StringField(index=True)
+
+
 class Guid(StoredObject):
 
     __indices__ = [{
@@ -27,24 +38,128 @@ class Guid(StoredObject):
     referent = fields.AbstractForeignField()
 
     @classmethod
-    def generate(self, referent=None):
+    def generate(cls, referent=None):
+        """Create a GUID, pointing to `referent` if given, with a single write."""
         while True:
-            # Create GUID
-            guid_id = ''.join(random.sample(ALPHABET, 5))
-
-            # Check GUID against blacklist
-            blacklist_guid = BlacklistGuid.load(guid_id)
-            if not blacklist_guid:
-                try:
-                    guid = Guid(_id=guid_id)
-                    guid.save()
-                    break
-                except KeyExistsException:
-                    pass
-        if referent:
-            guid.referent = referent
-            guid.save()
-        return guid
+            guid = cls(_id=cls.reserve(1)[0], referent=referent)
+            try:
+                guid.save()
+                return guid
+            except KeyExistsException:
+                # Taken since the id was checked
+                pass
+
+    @classmethod
+    def _draw_ids(cls, count):
+        """Draw `count` distinct random ids that are neither blacklisted, nor taken, nor in the pool, checking
+        each round of candidates with one query against each collection.
+        """
+        ids = set()
+        while len(ids) < count:
+            candidates = set(''.join(random.sample(ALPHABET, 5)) for _ in range(count - len(ids))) - ids
+            query = {'_id': {'$in': list(candidates)}}
+            for collection in (BlacklistGuid, cls, PooledGuid):
+                candidates -= set(doc['_id'] for doc in collection._storage[0].store.find(query, {'_id': True}))
+            ids |= candidates
+        return list(ids)
+
+    @classmethod
+    def _take_pooled_id(cls):
+        """Remove one id from the pool with a single `findAndModify`, starting from a random point so that
+        concurrent callers take different ids.
+
+        :return: The id, or `None` if the pool is empty
+        """
+        store = PooledGuid._storage[0].store
+        start = ''.join(random.sample(ALPHABET, 5))
+        for query in ({'_id': {'$gte': start}}, {'_id': {'$lt': start}}):
+            doc = store.find_and_modify(dict(query, claim=None), remove=True, fields={'_id': True})
+            if doc is not None:
+                return doc['_id']
+        return None
+
+    @classmethod
+    def _take_pooled_ids(cls, count):
+        """Remove up to `count` ids from the pool in a few queries, whatever `count` is: the ids following a
+        random point are claimed with a token in one update, then read back and removed by the token. Ids
+        claimed meanwhile by a concurrent caller are left to it.
+
+        :return list: The ids
+        """
+        store = PooledGuid._storage[0].store
+        claim = str(ObjectId())
+        start = ''.join(random.sample(ALPHABET, 5))
+        ids = []
+        for query in ({'_id': {'$gte': start}}, {'_id': {'$lt': start}}):
+            cursor = store.find(dict(query, claim=None), {'_id': True})
+            candidates = [doc['_id'] for doc in cursor.sort('_id', pymongo.ASCENDING).limit(count - len(ids))]
+            if candidates:
+                store.update(
+                    {'_id': {'$in': candidates}, 'claim': None}, {'$set': {'claim': claim}}, multi=True
+                )
+                ids = [doc['_id'] for doc in store.find({'claim': claim}, {'_id': True}).sort('_id', pymongo.ASCENDING)]
+            if len(ids) >= count:
+                break
+        if ids:
+            store.remove({'claim': claim})
+        return ids
+
+    @classmethod
+    def reserve(cls, count):
+        """Reserve `count` unused ids for new GUIDs, taking them from the pool where possible and drawing the
+        rest. The ids are removed from the pool; the caller is expected to create GUIDs with them.
+
+        :return list: The ids
+        """
+        if count == 1:
+            guid_id = cls._take_pooled_id()
+            ids = [guid_id] if guid_id is not None else []
+        else:
+            ids = cls._take_pooled_ids(count)
+        if len(ids) < count:
+            ids.extend(cls._draw_ids(count - len(ids)))
+        return ids
+
+    @classmethod
+    def fill_pool(cls, size):
+        """Top the pool of reserved ids up to `size` unclaimed ids, first removing ids claimed over an hour ago
+        by a process that didn't get to remove them.
+
+        :return int: The number of ids added
+        """
+        store = PooledGuid._storage[0].store
+        # Claims are ObjectIds, whose string forms sort by when they were made
+        expired = str(ObjectId.from_datetime(datetime.datetime.utcnow() - datetime.timedelta(hours=1)))
+        store.remove({'claim': {'$ne': None, '$lt': expired}})
+        missing = size - store.find({'claim': None}).count()
+        if missing <= 0:
+            return 0
+        ids = cls._draw_ids(missing)
+        try:
+            store.insert([PooledGuid(_id=guid_id).to_storage() for guid_id in ids], continue_on_error=True)
+        except pymongo.errors.DuplicateKeyError:
+            # Added by a concurrent fill
+            pass
+        return len(ids)
+
+    @classmethod
+    def generate_many(cls, count, schema_name):
+        """Create `count` GUIDs for new records of `schema_name` with a single insert. Each GUID refers to the
+        record whose primary key will be the GUID's own id, as `GuidStoredObject` sets up on first save.
+        """
+        guids = [cls(_id=guid_id, referent=(guid_id, schema_name)) for guid_id in cls.reserve(count)]
+        try:
+            return bulk_insert(guids)
+        except KeyExistsException:
+            # Another process took one of the ids after they were drawn, and the insert stopped there. Keep
+            # the GUIDs of ours that made it in, and draw again for the rest
+            cls._clear_caches()
+            ids = [guid._id for guid in guids]
+            inserted = [
+                doc['_id'] for doc in cls._storage[0].store.find({'_id': {'$in': ids}})
+                if list(doc.get('referent') or []) == [doc['_id'], schema_name]
+            ]
+            return [cls.load(guid_id) for guid_id in inserted] + cls.generate_many(count - len(inserted), schema_name)
 
     def __repr__(self):
         return '<id:{0}, referent:({1}, {2})>'.format(self._id, self.referent._primary_key, self.referent._name)
@@ -81,11 +196,9 @@ class GuidStoredObject(StoredObject):
             )
             guid.save()
 
-        # Else create GUID optimistically
+        # Else create GUID, already pointing to the record's future primary key
         else:
-            guid = Guid.generate()
-            guid.referent = (guid._primary_key, self._name)
-            guid.save()
+            guid = Guid.generate_many(1, self._name)[0]
             # Set primary key to GUID key
             self._primary_key = guid._primary_key
 
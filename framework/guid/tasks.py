@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from framework.tasks import app
+from framework.guid.model import Guid
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name='guid.fill_guid_pool', max_retries=0)
+def fill_guid_pool(size=None):
+    """Top up the pool of ids that `Guid.reserve` hands out to new GUIDs."""
+    added = Guid.fill_pool(settings.GUID_POOL_SIZE if size is None else size)
+    if added:
+        logger.info('Added {0} ids to the GUID pool'.format(added))
+    return added
@@ -6,6 +6,7 @@ from modularodm.ext.concurrency import with_proxies, proxied_members
 
 from bson import ObjectId
 from .handlers import client, database, set_up_storage
+from .utils import prefetch, bulk_insert
 
 
 from api.base.api_globals import api_globals
@@ -33,7 +34,20 @@ def get_cache_key():
 
 @with_proxies(proxied_members, get_cache_key)
 class StoredObject(GenericStoredObject):
-    pass
+
+    @classmethod
+    def prefetch(cls, objects, *paths):
+        """Batch-load the records referenced by ``paths`` on ``objects`` into
+        the request identity map. See `framework.mongo.utils.prefetch`.
+
+        :raises: ValueError if a path does not start with a field or
+            back-reference of this schema
+        """
+        for path in paths:
+            field_name = path.split('.')[0]
+            if field_name not in cls._fields and '__' not in field_name:
+                raise ValueError('{0} has no reference named {1!r}'.format(cls.__name__, field_name))
+        return prefetch(objects, *paths)
 
 
 __all__ = [
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import os
 import logging
+import threading
 
 import pymongo
-from flask import g
 from werkzeug.local import LocalProxy
 
 from website import settings
@@ -12,10 +13,60 @@ from website import settings
 logger = logging.getLogger(__name__)
 
 
-def get_mongo_client():
-    """Create MongoDB client and authenticate database.
+class PoolStats(object):
+    """Thread-safe counters describing how requests use the pooled client.
+    A request "checks out" a socket when it is pinned to the connection pool
+    and returns it at teardown. pymongo doesn't report how long getting a
+    socket from the pool takes, so no wait times are counted.
     """
-    client = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.checkouts = 0
+
+    def checkout(self):
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def release(self):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'max_pool_size': settings.DB_MAX_POOL_SIZE,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'checkouts': self.checkouts,
+            }
+
+
+stats = PoolStats()
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_local = threading.local()
+
+
+def create_mongo_client():
+    """Create a pooled MongoDB client and authenticate database. Credentials
+    are cached by the client and applied to every socket in the pool.
+    """
+    client = pymongo.MongoClient(
+        settings.DB_HOST,
+        settings.DB_PORT,
+        max_pool_size=settings.DB_MAX_POOL_SIZE,
+    )
 
     db = client[settings.DB_NAME]
 
@@ -25,20 +76,48 @@ def get_mongo_client():
     return client
 
 
+def get_mongo_client():
+    """Return the process-wide pooled client. A new client is created after a
+    fork (e.g. gunicorn or celery prefork workers), since sockets inherited
+    from the parent process must not be shared.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = create_mongo_client()
+                _client_pid = pid
+                stats.reset()
+    return _client
+
+
 def connection_before_request():
-    """Attach MongoDB client to `g`.
+    """Pin a pooled socket to the current request so that all of its
+    operations, including TokuMX transaction commands, share a connection.
     """
-    g._mongo_client = get_mongo_client()
+    if getattr(_local, 'checked_out', False):
+        return
+    get_mongo_client().start_request()
+    _local.checked_out = True
+    stats.checkout()
 
 
 def connection_teardown_request(error=None):
-    """Close MongoDB client if attached to `g`.
+    """Return the request's socket to the pool.
     """
-    try:
-        g._mongo_client.close()
-    except AttributeError:
-        if not settings.DEBUG_MODE:
-            logger.error('MongoDB client not attached to request.')
+    # Teardown may run twice, e.g. after both an exception and a response
+    if not getattr(_local, 'checked_out', False):
+        return
+    get_mongo_client().end_request()
+    _local.checked_out = False
+    stats.release()
+
+
+def pool_stats():
+    """Return connection pool metrics for monitoring.
+    """
+    return stats.to_dict()
 
 
 handlers = {
@@ -47,18 +126,10 @@ handlers = {
 }
 
 
-# Set up getters for `LocalProxy` objects
-_mongo_client = get_mongo_client()
-
-
 def _get_current_client():
-    """Getter for `client` proxy. Return default client if no client attached
-    to `g` or no request context.
+    """Getter for `client` proxy.
     """
-    try:
-        return g._mongo_client
-    except (AttributeError, RuntimeError):
-        return _mongo_client
+    return get_mongo_client()
 
 
 def _get_current_database():
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 import functools
 import re
+import collections
 import httplib as http
 
 import pymongo
-from modularodm import Q
+from modularodm import Q, signals
 from modularodm.query import QueryBase
 from modularodm.exceptions import ValidationValueError, NoResultsFound, MultipleResultsFound
+from modularodm.storage.base import KeyExistsException
 
 from framework.exceptions import HTTPError
 
@@ -152,3 +154,164 @@ def paginated(model, query=None, increment=200):
             yield item
         if page:
             last_id = item._id
+
+
+def _foreign_refs(obj, field_name):
+    """Return ``(schema, primary_key)`` pairs referenced by ``field_name`` on
+    ``obj`` without loading the referenced records. ``field_name`` may be a
+    foreign field, an abstract foreign field, or a back-reference such as
+    ``node__parent``. Return ``None`` if ``obj`` has no such reference.
+    """
+    field = obj._fields.get(field_name)
+    if field is None:
+        if '__' not in field_name or field_name.startswith('__'):
+            return None
+        # Back-references are built from ``__backrefs`` and hold keys only
+        refs = getattr(obj, field_name)
+        return [(refs._base_class, key) for key in refs._to_primary_keys()]
+    if not field._is_foreign:
+        raise ValueError('Field {0!r} is not a foreign field'.format(field_name))
+    value = field._get_underlying_data(obj)
+    if value is None:
+        return []
+    # Iterating a foreign list loads its items; read the raw keys instead
+    values = value._to_data() if field._list else [value]
+    if field._is_abstract:
+        return [
+            (obj.get_collection(schema_name), key)
+            for key, schema_name in values
+            if key is not None
+        ]
+    return [(field.base_class, key) for key in values if key is not None]
+
+
+def _prefetch_level(objects, field_name):
+    refs = []
+    for obj in objects:
+        # Mixed lists (e.g. nodes and pointers) may lack the field on some items
+        refs.extend(_foreign_refs(obj, field_name) or [])
+
+    missing = collections.defaultdict(set)
+    for schema, key in refs:
+        if not schema._is_cached(key):
+            missing[schema].add(key)
+    # Iterating a queryset loads each record into the identity map
+    for schema, keys in missing.iteritems():
+        list(schema.find(Q(schema._primary_name, 'in', list(keys))))
+
+    loaded = []
+    seen = set()
+    for schema, key in refs:
+        if (schema._name, key) in seen:
+            continue
+        seen.add((schema._name, key))
+        # Dangling references are skipped rather than fetched one at a time
+        record = schema._load_from_cache(key)
+        if record is not None:
+            loaded.append(record)
+    return loaded
+
+
+def prefetch(objects, *paths):
+    """Load every record referenced along ``paths`` from ``objects`` with one
+    ``$in`` query per collection per path segment. Records land in the
+    request-local identity map, so later dereferences such as
+    ``node.contributors`` or ``node.logs[-1].user`` do not hit the database.
+
+    Example: ::
+
+        prefetch(nodes, 'contributors', 'nodes.contributors', 'node__parent')
+
+    :param list objects: Loaded `StoredObject` instances
+    :param str *paths: Dotted paths of foreign fields or back-references
+    :return list: ``objects``, for chaining
+    """
+    objects = [obj for obj in objects if obj is not None]
+    for path in paths:
+        level = objects
+        for field_name in path.split('.'):
+            if not level:
+                break
+            level = _prefetch_level(level, field_name)
+    return objects
+
+
+def _add_backref(target, backref_key, parent, parent_field_name):
+    """Record a back-reference on ``target`` in memory, without saving it."""
+    backrefs = target._StoredObject__backrefs
+    refs = backrefs.setdefault(backref_key, {}).setdefault(parent._name, {}).setdefault(parent_field_name, [])
+    if parent._primary_key not in refs:
+        refs.append(parent._primary_key)
+
+
+def bulk_insert(objects):
+    """Insert new records with one ``insert`` per collection, rather than
+    saving them one at a time. Records are validated as ``save`` would
+    validate them. Back-references are written with one ``$addToSet`` per
+    referenced record, rather than by saving the referenced record once per
+    reference; records referenced from within the batch get theirs before
+    they are inserted.
+
+    The ``save`` signal is not sent, so models that rely on post-save hooks
+    must run them separately.
+
+    :param list objects: New `StoredObject` instances, with primary keys set
+    :raises: KeyExistsException if a primary key is already taken
+    :return list: ``objects``, now loaded and in the identity map
+    """
+    batch = {}
+    for obj in objects:
+        if obj._is_loaded or obj._primary_key is None:
+            raise ValueError('Cannot bulk insert {0!r}: records must be new and have a primary key'.format(obj))
+        batch[(obj._name, obj._primary_key)] = obj
+        for field in obj._fields.values():
+            if hasattr(field, 'on_before_save'):
+                field.on_before_save(obj)
+        signals.before_save.send(obj.__class__, instance=obj)
+        for field_name, field in obj._fields.items():
+            if field._is_foreign and not field._list and not (field._required or field._unique or field._validate):
+                # Nothing to check, and reading the field would load the record it refers to
+                continue
+            field.do_validate(getattr(obj, field_name), obj)
+        obj.validate_record()
+
+    # (schema, key) => {backref path => [parent keys]}, for records outside the batch
+    external = collections.defaultdict(lambda: collections.defaultdict(list))
+    for obj in objects:
+        for field_name, field in obj._fields.items():
+            if not field._is_foreign:
+                continue
+            backref_key = getattr(field, '_field_instance', field)._backref_field_name
+            if not backref_key:
+                continue
+            for schema, key in _foreign_refs(obj, field_name):
+                target = batch.get((schema._name, key))
+                if target is None:
+                    path = '__backrefs.{0}.{1}.{2}'.format(backref_key, obj._name, field_name)
+                    external[(schema, key)][path].append(obj._primary_key)
+                    # Keep cached copies current, so saving them later doesn't drop the new references
+                    target = schema._load_from_cache(key)
+                if target is not None:
+                    _add_backref(target, backref_key, obj, field_name)
+
+    by_schema = collections.OrderedDict()
+    for obj in objects:
+        data = obj.to_storage()
+        data[obj._primary_name] = obj._storage_key
+        by_schema.setdefault(obj.__class__, []).append((obj, data))
+    for schema, records in by_schema.iteritems():
+        try:
+            schema._storage[0].store.insert([data for _, data in records])
+        except pymongo.errors.DuplicateKeyError:
+            raise KeyExistsException
+        for obj, data in records:
+            obj._stored_key = obj._primary_key
+            obj._is_loaded = True
+            schema._set_cache(obj._primary_key, obj, data)
+
+    for (schema, key), paths in external.iteritems():
+        schema._storage[0].store.update(
+            {schema._primary_name: schema._pk_to_storage(key)},
+            {'$addToSet': dict((path, {'$each': keys}) for path, keys in paths.iteritems())},
+        )
+    return objects
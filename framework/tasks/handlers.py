@@ -2,6 +2,7 @@
 
 import logging
 import functools
+from collections import OrderedDict
 
 from flask import g
 from celery import group
@@ -14,12 +15,30 @@ logger = logging.getLogger(__name__)
 
 def celery_before_request():
     g._celery_tasks = []
+    g._celery_dirty = OrderedDict()
+
+
+def flush_dirty():
+    """Run each side effect recorded with ``mark_dirty`` during the request
+    once, for everything recorded for it.
+    """
+    dirty = getattr(g, '_celery_dirty', None)
+    if not dirty:
+        return
+    g._celery_dirty = OrderedDict()
+    for flush, items in dirty.iteritems():
+        try:
+            flush(items)
+        except Exception as error:
+            logger.exception(error)
 
 
 def celery_teardown_request(error=None):
     if error is not None:
         return
     try:
+        # Side effects may enqueue tasks of their own
+        flush_dirty()
         tasks = g._celery_tasks
         if tasks:
             if settings.USE_CELERY:
@@ -44,6 +63,22 @@ def enqueue_task(signature):
         signature()
 
 
+def mark_dirty(flush, key, *values):
+    """If working in a request context, record that ``flush`` must run for
+    ``key`` after the request is complete; else run it immediately. However
+    many times a key is marked, ``flush`` runs once per request, with a
+    dict mapping each key marked for it to the set of values marked with
+    that key.
+    :param flush: Callable taking that dict
+    """
+    try:
+        dirty = g._celery_dirty
+    except (RuntimeError, AttributeError):
+        flush({key: set(values)})
+        return
+    dirty.setdefault(flush, OrderedDict()).setdefault(key, set()).update(values)
+
+
 def queued_task(task):
     """Decorator that adds the wrapped task to the queue on ``g`` if Celery is
     enabled, else runs the task synchronously. Can only be applied to Celery
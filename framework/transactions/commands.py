@@ -27,9 +27,12 @@ def show_live(database=None):
 
 
 def disconnect(database=None):
+    """Return the current request's socket to the connection pool. The pooled
+    client itself stays open for reuse by later requests.
+    """
     database = database or proxy_database
     try:
-        database.connection.close()
+        database.connection.end_request()
     except AttributeError:
         if not osfsettings.DEBUG_MODE:
             logger.error('MongoDB client not attached to request.')
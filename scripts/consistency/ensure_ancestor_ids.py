@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Check that the materialized `Node.ancestor_ids` of every node matches its `parent` backrefs, and
+rewrite the ones that don't. Also backfills the field for nodes created before it existed.
+
+Dry run: python -m scripts.consistency.ensure_ancestor_ids dry
+Real: python -m scripts.consistency.ensure_ancestor_ids
+"""
+
+import sys
+import logging
+
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    """Nodes that have a parent, or that claim to."""
+    return Node.find(
+        Q('__backrefs.parent.node.nodes.0', 'exists', True) |
+        Q('ancestor_ids.0', 'exists', True)
+    )
+
+
+def ensure_ancestor_ids(nodes):
+    count = 0
+    for node in nodes:
+        expected = node.compute_ancestor_ids()
+        if list(node.ancestor_ids) != expected:
+            logger.info('Node {}: ancestor_ids {} should be {}'.format(node._id, list(node.ancestor_ids), expected))
+            node.ancestor_ids = expected
+            node.save(update_piwik=False)
+            count += 1
+    logger.info('Fixed ancestor_ids on {} nodes.'.format(count))
+    return count
+
+
+def main(dry=True):
+    init_app(set_backends=True, routes=False)
+    with TokuTransaction():
+        ensure_ancestor_ids(get_targets())
+        if dry:
+            raise Exception('Abort Transaction - Dry Run')
+
+
+if __name__ == '__main__':
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry)
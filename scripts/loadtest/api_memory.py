@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Compare peak worker memory for large API list responses with and without streamed rendering.
+
+Each mode runs in its own process, so peak RSS is measured from a fresh high-water mark. Run against
+a database with enough public nodes to fill a page, e.g.:
+
+    PYTHONPATH=. python scripts/loadtest/api_memory.py --url '/v2/nodes/?page[size]=100&embed=contributors'
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+
+
+DEFAULT_URL = '/v2/nodes/?page[size]=100&embed=contributors&embed=children'
+
+
+def peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and bytes on OS X
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(url, stream, repeat, results):
+    from webtest_plus import TestApp
+
+    from api.base import settings as api_settings
+    from api.base.wsgi import application
+
+    api_settings.STREAM_RESPONSES = stream
+    app = TestApp(application)
+
+    # Load the app and open database connections before taking the baseline
+    app.get('/v2/')
+    baseline = peak_rss_kb()
+    for _ in range(repeat):
+        res = app.get(url)
+    results.put((stream, baseline, peak_rss_kb(), len(res.body)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    for stream in (False, True):
+        process = multiprocessing.Process(target=measure, args=(args.url, stream, args.repeat, results))
+        process.start()
+        process.join()
+
+    while not results.empty():
+        stream, baseline, peak, size = results.get()
+        print('{:<10} baseline {:>8} KB  peak {:>8} KB  growth {:>8} KB  response {:>8} KB'.format(
+            'streamed' if stream else 'buffered', baseline, peak, peak - baseline, size / 1024
+        ))
+
+
+if __name__ == '__main__':
+    main()
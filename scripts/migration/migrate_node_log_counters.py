@@ -0,0 +1,48 @@
+"""Backfill the denormalized log counters (`last_logged`, `log_count` and `contributor_log_counts`) on nodes
+created before they existed. Run after scripts/migration/migrate_node_logs.py.
+
+Dry run: python -m scripts.migration.migrate_node_log_counters dry
+Real: python -m scripts.migration.migrate_node_log_counters
+"""
+
+import sys
+import logging
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from scripts import utils as script_utils
+from website.app import init_app
+from website.project.model import Node
+
+logger = logging.getLogger(__name__)
+
+
+def main(dry=True):
+    init_app(routes=False)
+    with TokuTransaction():
+        do_migration(get_targets())
+        if dry:
+            raise Exception('Abort Transaction - Dry Run')
+
+
+def get_targets():
+    return Node.find(Q('last_logged', 'eq', None))
+
+
+def do_migration(records):
+    count = 0
+    for node in records:
+        node.refresh_log_counters()
+        if node.last_logged is None:
+            continue
+        logger.info('Node {}: {} logs, last logged {}'.format(node._id, node.log_count, node.last_logged))
+        count += 1
+    logger.info('Backfilled log counters on {} nodes'.format(count))
+    return count
+
+
+if __name__ == '__main__':
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry)
@@ -0,0 +1,92 @@
+"""Move the log ids embedded in node documents onto the logs themselves, as `NodeLog.node_ids`, then drop
+the embedded lists. Nodes are migrated in batches of `BATCH_SIZE`, each in its own transaction, so the
+migration can be interrupted and rerun; nodes that have already been migrated are skipped.
+
+Dry run: python -m scripts.migration.migrate_node_logs dry
+Real: python -m scripts.migration.migrate_node_logs
+"""
+
+import sys
+import logging
+
+from framework.mongo import database
+from framework.transactions.context import TokuTransaction
+from scripts import utils as script_utils
+from website.app import init_app
+from website.project.model import Node, NodeLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+class DryRunAbort(Exception):
+    pass
+
+
+def main(dry=True, batch_size=BATCH_SIZE):
+    init_app(routes=False)
+    nodes = logs = 0
+    last_id = None
+    while True:
+        records = get_targets(after=last_id, batch_size=batch_size)
+        if not records:
+            break
+        try:
+            with TokuTransaction():
+                logs += do_migration(records)
+                if dry:
+                    raise DryRunAbort('Abort Transaction - Dry Run')
+        except DryRunAbort:
+            pass
+        nodes += len(records)
+        last_id = records[-1]['_id']
+        logger.info('Migrated {} logs on {} nodes'.format(logs, nodes))
+    if not dry:
+        with TokuTransaction():
+            remove_log_backrefs()
+    Node._clear_caches()
+    NodeLog._clear_caches()
+
+
+def get_targets(after=None, batch_size=BATCH_SIZE):
+    """The next `batch_size` node documents that still embed their logs, in `_id` order."""
+    query = {'logs': {'$exists': True}}
+    if after is not None:
+        query['_id'] = {'$gt': after}
+    return list(database['node'].find(query, {'logs': True}).sort('_id', 1).limit(batch_size))
+
+
+def do_migration(records):
+    count = 0
+    for record in records:
+        log_ids = [log_id for log_id in record['logs'] if log_id]
+        if log_ids:
+            database['nodelog'].update(
+                {'_id': {'$in': log_ids}},
+                {'$addToSet': {'node_ids': record['_id']}},
+                multi=True,
+            )
+            count += len(log_ids)
+    database['node'].update(
+        {'_id': {'$in': [record['_id'] for record in records]}},
+        {'$unset': {'logs': True}},
+        multi=True,
+    )
+    return count
+
+
+def remove_log_backrefs():
+    """Drop the backrefs that the embedded lists kept on each log."""
+    database['nodelog'].update(
+        {'__backrefs.logged': {'$exists': True}},
+        {'$unset': {'__backrefs.logged': True}},
+        multi=True,
+    )
+
+
+if __name__ == '__main__':
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry)
@@ -0,0 +1,50 @@
+"""Set the denormalized Node.retracted flag on registrations whose retraction was approved before the flag
+existed, and on their primary descendants.
+"""
+
+import sys
+import logging
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from scripts import utils as script_utils
+from website.app import init_app
+from website.project.model import Node
+
+logger = logging.getLogger(__name__)
+
+
+def main(dry=True):
+    init_app(routes=False)
+    with TokuTransaction():
+        do_migration(get_targets())
+        if dry:
+            raise Exception('Abort Transaction - Dry Run')
+
+
+def get_targets():
+    return Node.find(
+        Q('is_registration', 'eq', True) &
+        Q('retraction', 'ne', None) &
+        Q('retracted', 'ne', True)
+    )
+
+
+def do_migration(records):
+    count = 0
+    for registration in records:
+        if not registration.is_retracted:
+            continue
+        for node in registration.node_and_primary_descendants():
+            logger.info('Marking node {} as retracted'.format(node._id))
+            node.retracted = True
+            node.save()
+            count += 1
+    logger.info('Marked {} nodes as retracted'.format(count))
+
+
+if __name__ == '__main__':
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry)
@@ -48,6 +48,9 @@ def main(dry_run=True):
                             auth=Auth(parent_registration.retraction.initiated_by),
                         )
                         retraction.save()
+                        for node in parent_registration.node_and_primary_descendants():
+                            node.retracted = True
+                            node.save()
                         parent_registration.update_search()
                         for node in parent_registration.get_descendants_recursive():
                             node.update_search()
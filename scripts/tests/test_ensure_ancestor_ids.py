@@ -0,0 +1,39 @@
+from nose.tools import *
+
+from scripts.consistency.ensure_ancestor_ids import get_targets, ensure_ancestor_ids
+from tests.base import OsfTestCase
+from tests.factories import NodeFactory, ProjectFactory
+
+
+class TestEnsureAncestorIds(OsfTestCase):
+
+    def setUp(self):
+        super(TestEnsureAncestorIds, self).setUp()
+        self.project = ProjectFactory()
+        self.component = NodeFactory(creator=self.project.creator, parent=self.project)
+        self.subcomponent = NodeFactory(creator=self.project.creator, parent=self.component)
+        self.other = ProjectFactory()
+
+    def test_get_targets(self):
+        assert_equal(
+            {node._id for node in get_targets()},
+            {self.component._id, self.subcomponent._id}
+        )
+
+    def test_consistent_nodes_are_untouched(self):
+        assert_equal(ensure_ancestor_ids(get_targets()), 0)
+
+    def test_backfills_missing_ancestor_ids(self):
+        for node in (self.component, self.subcomponent):
+            node.ancestor_ids = []
+            node.save()
+        assert_equal(ensure_ancestor_ids(get_targets()), 2)
+        self.subcomponent.reload()
+        assert_equal(self.subcomponent.ancestor_ids, [self.project._id, self.component._id])
+
+    def test_clears_stale_ancestor_ids(self):
+        self.other.ancestor_ids = [self.project._id]
+        self.other.save()
+        assert_equal(ensure_ancestor_ids(get_targets()), 1)
+        self.other.reload()
+        assert_equal(self.other.ancestor_ids, [])
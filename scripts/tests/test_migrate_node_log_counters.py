@@ -0,0 +1,33 @@
+from nose.tools import *
+
+from framework.auth import Auth
+from framework.mongo import database
+from scripts.migration.migrate_node_log_counters import get_targets, do_migration
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory
+from website.project.model import Node
+
+
+class TestMigrateNodeLogCounters(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeLogCounters, self).setUp()
+        self.project = ProjectFactory()
+        self.project.add_tag('foo', auth=Auth(self.project.creator))
+        self.migrated = ProjectFactory()
+        database['node'].update(
+            {'_id': self.project._id},
+            {'$set': {'last_logged': None, 'log_count': 0, 'contributor_log_counts': {}}}
+        )
+        Node._clear_caches()
+
+    def test_get_targets(self):
+        assert_equal([node._id for node in get_targets()], [self.project._id])
+
+    def test_do_migration(self):
+        assert_equal(do_migration(get_targets()), 1)
+        self.project.reload()
+        assert_equal(self.project.log_count, 2)
+        assert_equal(self.project.contributor_log_counts, {self.project.creator._id: 2})
+        assert_equal(self.project.last_logged, self.project.logs[-1].date)
+        assert_equal(list(get_targets()), [])
@@ -0,0 +1,49 @@
+from nose.tools import *
+
+from framework.auth import Auth
+from framework.mongo import database
+from scripts.migration.migrate_node_logs import get_targets, do_migration
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory
+from website.models import Node, NodeLog
+
+
+class TestMigrateNodeLogs(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeLogs, self).setUp()
+        self.project = ProjectFactory()
+        self.fork = self.project.fork_node(auth=Auth(self.project.creator))
+        self.other = ProjectFactory()
+        # Put the fork back the way it was stored before logs referenced their nodes
+        self.log_ids = self.fork.logs._to_primary_keys()
+        database['nodelog'].update(
+            {'_id': {'$in': self.log_ids}},
+            {'$pull': {'node_ids': self.fork._id}},
+            multi=True,
+        )
+        database['node'].update({'_id': self.fork._id}, {'$set': {'logs': self.log_ids}})
+        Node._clear_caches()
+        NodeLog._clear_caches()
+
+    def test_get_targets(self):
+        assert_equal([record['_id'] for record in get_targets()], [self.fork._id])
+
+    def test_get_targets_after(self):
+        assert_equal(get_targets(after=self.fork._id), [])
+
+    def test_unmigrated_node_reads_embedded_logs(self):
+        fork = Node.load(self.fork._id)
+        assert_equal(fork.logs._to_primary_keys(), self.log_ids)
+
+    def test_do_migration(self):
+        assert_equal(do_migration(get_targets()), len(self.log_ids))
+        assert_equal(get_targets(), [])
+        for log in NodeLog.find():
+            if log._id in self.log_ids:
+                assert_in(self.fork._id, log.node_ids)
+        Node._clear_caches()
+        fork = Node.load(self.fork._id)
+        assert_equal(fork.logs._to_primary_keys(), self.log_ids)
+        assert_false(fork.logs.legacy_ids)
+        assert_equal(len(self.project.logs), len(self.log_ids) - 1)
@@ -0,0 +1,37 @@
+from nose.tools import *
+
+from scripts.migration.migrate_retracted_flag import get_targets, do_migration
+from tests.base import OsfTestCase
+from tests.factories import (
+    NodeFactory,
+    ProjectFactory,
+    RegistrationFactory,
+    RetractedRegistrationFactory,
+)
+
+
+class TestMigrateRetractedFlag(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateRetractedFlag, self).setUp()
+        project = ProjectFactory(is_public=True)
+        NodeFactory(creator=project.creator, parent=project)
+        self.registration = RegistrationFactory(project=project, is_public=True)
+        RetractedRegistrationFactory(registration=self.registration, user=self.registration.creator)
+        # Simulate a retraction approved before the flag existed
+        for node in self.registration.node_and_primary_descendants():
+            node.retracted = False
+            node.save()
+        self.other_registration = RegistrationFactory(is_public=True)
+
+    def test_get_targets(self):
+        assert_equal([each._id for each in get_targets()], [self.registration._id])
+
+    def test_do_migration_flags_registration_and_descendants(self):
+        do_migration(get_targets())
+        for node in self.registration.node_and_primary_descendants():
+            node.reload()
+            assert_true(node.retracted)
+        self.other_registration.reload()
+        assert_false(self.other_registration.retracted)
+        assert_equal(get_targets().count(), 0)
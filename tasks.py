@@ -361,10 +361,13 @@ def elasticsearch():
         print("Your system is not recognized, you will have to start elasticsearch manually")
 
 @task
-def migrate_search(delete=False, index=settings.ELASTIC_INDEX):
-    """Migrate the search-enabled models."""
+def migrate_search(delete=False, index=settings.ELASTIC_INDEX, processes=1, resume=False):
+    """Migrate the search-enabled models.
+
+    Use --processes to index with a pool of processes, and --resume to finish an interrupted migration.
+    """
     from website.search_migration.migrate import migrate
-    migrate(delete, index=index)
+    migrate(delete, index=index, processes=int(processes), resume=resume)
 
 @task
 def rebuild_search():
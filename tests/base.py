@@ -128,6 +128,8 @@ class DbTestCase(unittest.TestCase):
 
         cls._original_bcrypt_log_rounds = settings.BCRYPT_LOG_ROUNDS
         settings.BCRYPT_LOG_ROUNDS = 1
+        cls._original_elastic_refresh_on_write = settings.ELASTIC_REFRESH_ON_WRITE
+        settings.ELASTIC_REFRESH_ON_WRITE = True
 
         teardown_database(database=database_proxy._get_current_object())
         # TODO: With `database` as a `LocalProxy`, we should be able to simply
@@ -151,6 +153,7 @@ class DbTestCase(unittest.TestCase):
         settings.PIWIK_HOST = cls._original_piwik_host
         settings.ENABLE_EMAIL_SUBSCRIPTIONS = cls._original_enable_email_subscriptions
         settings.BCRYPT_LOG_ROUNDS = cls._original_bcrypt_log_rounds
+        settings.ELASTIC_REFRESH_ON_WRITE = cls._original_elastic_refresh_on_write
 
 
 class AppTestCase(unittest.TestCase):
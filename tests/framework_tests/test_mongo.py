@@ -3,11 +3,19 @@ Tests related to functions in framework.mongo
 """
 from unittest import TestCase
 
+import mock
 from nose.tools import *  # flake8: noqa
 
 from modularodm.exceptions import ValidationError, ValidationValueError
+from modularodm.storage.base import KeyExistsException
 
-from framework.mongo import validators
+from framework.auth import User
+from framework.mongo import validators, StoredObject, bulk_insert
+from framework.mongo import handlers
+from website.models import Node, Tag
+
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeFactory, UserFactory
 
 class TestValidators(TestCase):
 
@@ -62,3 +70,166 @@ class TestValidators(TestCase):
 
         with assert_raises(ValidationError):
             new_validator({'k': 'v', 'k2': 'v2'})
+
+
+class TestPrefetch(OsfTestCase):
+
+    def setUp(self):
+        super(TestPrefetch, self).setUp()
+        self.project = ProjectFactory()
+        self.project.add_contributor(UserFactory(), save=True)
+        self.component = NodeFactory(parent=self.project)
+        self.pointer = self.project.add_pointer(ProjectFactory(), auth=None, save=True)
+        StoredObject._clear_caches()
+        self.project = Node.load(self.project._id)
+
+    def test_prefetch_loads_foreign_list_with_one_query(self):
+        with mock.patch.object(User._storage[0], 'find', wraps=User._storage[0].find) as mock_find:
+            Node.prefetch([self.project], 'contributors')
+        assert_equal(mock_find.call_count, 1)
+        with mock.patch.object(User._storage[0], 'get') as mock_get:
+            contributor_ids = [user._id for user in self.project.contributors]
+        assert_false(mock_get.called)
+        assert_equal(len(contributor_ids), 2)
+
+    def test_prefetch_follows_nested_and_abstract_paths(self):
+        Node.prefetch([self.project], 'nodes', 'nodes.node', 'nodes.contributors')
+        with mock.patch.object(Node._storage[0], 'get') as mock_node_get:
+            with mock.patch.object(User._storage[0], 'get') as mock_user_get:
+                for child in self.project.nodes:
+                    child.resolve().title
+                self.component.contributors[0].fullname
+        assert_false(mock_node_get.called)
+        assert_false(mock_user_get.called)
+
+    def test_prefetch_backref(self):
+        StoredObject._clear_caches()
+        component = Node.load(self.component._id)
+        with mock.patch.object(Node._storage[0], 'find', wraps=Node._storage[0].find) as mock_find:
+            Node.prefetch([component], 'node__parent')
+        assert_equal(mock_find.call_count, 1)
+        with mock.patch.object(Node._storage[0], 'get') as mock_get:
+            assert_equal(component.parent_node._id, self.project._id)
+        assert_false(mock_get.called)
+
+    def test_prefetch_skips_cached_records(self):
+        Node.prefetch([self.project], 'contributors')
+        with mock.patch.object(User._storage[0], 'find') as mock_find:
+            Node.prefetch([self.project], 'contributors')
+        assert_false(mock_find.called)
+
+    def test_prefetch_invalid_path(self):
+        with assert_raises(ValueError):
+            Node.prefetch([self.project], 'not_a_field')
+        with assert_raises(ValueError):
+            Node.prefetch([self.project], 'title')
+
+
+class TestBulkInsert(OsfTestCase):
+
+    def setUp(self):
+        super(TestBulkInsert, self).setUp()
+        self.user = UserFactory()
+        self.tag = Tag(_id='bulk')
+        self.tag.save()
+
+    def _make_nodes(self):
+        parent = Node(title='Parent', creator=self.user, category='project')
+        parent._id = 'bulk1'
+        child = Node(title='Child', creator=self.user, category='hypothesis')
+        child._id = 'bulk2'
+        parent.nodes.append(child)
+        parent.tags.append(self.tag)
+        return parent, child
+
+    def test_inserts_each_collection_once(self):
+        parent, child = self._make_nodes()
+        with mock.patch.object(Node._storage[0].store, 'insert', wraps=Node._storage[0].store.insert) as mock_insert:
+            bulk_insert([parent, child])
+        assert_equal(mock_insert.call_count, 1)
+        assert_true(parent._is_loaded)
+        assert_is(Node.load('bulk1'), parent)
+        StoredObject._clear_caches()
+        assert_equal(Node.load('bulk2').title, 'Child')
+
+    def test_sets_backrefs(self):
+        parent, child = self._make_nodes()
+        bulk_insert([parent, child])
+        assert_equal(child.parent_node, parent)
+        assert_in('bulk1', self.user.node__contributed._to_primary_keys())
+        StoredObject._clear_caches()
+        assert_equal(Node.load('bulk2').parent_node._id, 'bulk1')
+        assert_equal(
+            sorted(User.load(self.user._id).node__contributed._to_primary_keys()),
+            ['bulk1', 'bulk2'],
+        )
+        assert_equal(Tag.load('bulk').node__tagged[0]._id, 'bulk1')
+
+    def test_validates_records(self):
+        parent, child = self._make_nodes()
+        child.title = ''
+        with assert_raises(ValidationValueError):
+            bulk_insert([parent, child])
+        assert_is_none(Node.load('bulk1'))
+
+    def test_rejects_saved_records(self):
+        with assert_raises(ValueError):
+            bulk_insert([ProjectFactory()])
+
+    def test_duplicate_key(self):
+        project = ProjectFactory()
+        parent, child = self._make_nodes()
+        child._id = project._id
+        with assert_raises(KeyExistsException):
+            bulk_insert([parent, child])
+
+
+class TestPooledClient(TestCase):
+
+    def setUp(self):
+        super(TestPooledClient, self).setUp()
+        self.original_client = handlers._client
+        self.original_pid = handlers._client_pid
+        handlers._client = None
+        handlers.stats.reset()
+        self.create_patcher = mock.patch('framework.mongo.handlers.create_mongo_client')
+        self.mock_create = self.create_patcher.start()
+        self.mock_create.side_effect = lambda: mock.Mock()
+
+    def tearDown(self):
+        super(TestPooledClient, self).tearDown()
+        self.create_patcher.stop()
+        handlers._client = self.original_client
+        handlers._client_pid = self.original_pid
+        handlers._local.checked_out = False
+
+    def test_client_is_reused_across_calls(self):
+        client = handlers.get_mongo_client()
+        assert_is(handlers.get_mongo_client(), client)
+        assert_equal(self.mock_create.call_count, 1)
+
+    def test_client_is_recreated_after_fork(self):
+        client = handlers.get_mongo_client()
+        with mock.patch('framework.mongo.handlers.os.getpid', return_value=handlers._client_pid + 1):
+            forked_client = handlers.get_mongo_client()
+        assert_is_not(forked_client, client)
+
+    def test_request_checks_out_and_releases_socket(self):
+        client = handlers.get_mongo_client()
+        handlers.connection_before_request()
+        assert_true(client.start_request.called)
+        assert_equal(handlers.pool_stats()['checked_out'], 1)
+        handlers.connection_teardown_request()
+        assert_true(client.end_request.called)
+        stats = handlers.pool_stats()
+        assert_equal(stats['checked_out'], 0)
+        assert_equal(stats['checkouts'], 1)
+        assert_equal(stats['peak_checked_out'], 1)
+
+    def test_teardown_twice_releases_once(self):
+        client = handlers.get_mongo_client()
+        handlers.connection_before_request()
+        handlers.connection_teardown_request()
+        handlers.connection_teardown_request()
+        assert_equal(client.end_request.call_count, 1)
+        assert_equal(handlers.pool_stats()['checked_out'], 0)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Tests for website.project.contributors."""
+import mock
+from nose.tools import *  # PEP8 asserts
+
+from framework.auth import Auth, User
+from website.project.contributors import ContributorIndex, to_bits
+from website.util.permissions import ADMIN, READ, WRITE
+
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, UserFactory
+
+
+class TestContributorIndex(OsfTestCase):
+
+    def setUp(self):
+        super(TestContributorIndex, self).setUp()
+        self.project = ProjectFactory()
+        self.creator = self.project.creator
+        self.auth = Auth(self.creator)
+        self.writer = UserFactory()
+        self.reader = UserFactory()
+        self.project.add_contributor(self.writer, permissions=[READ, WRITE], auth=self.auth)
+        self.project.add_contributor(self.reader, permissions=[READ], visible=False, auth=self.auth)
+        self.project.save()
+
+    def test_records(self):
+        records = list(ContributorIndex(self.project))
+        assert_equal([record.id for record in records], [self.creator._id, self.writer._id, self.reader._id])
+        assert_equal([record.order for record in records], [0, 1, 2])
+        assert_equal([record.visible for record in records], [True, True, False])
+        assert_equal([record.permission for record in records], [ADMIN, WRITE, READ])
+        assert_equal(records[1].permission_bits, to_bits([READ, WRITE]))
+        assert_true(records[1].has_permission(WRITE))
+        assert_false(records[1].has_permission(ADMIN))
+
+    def test_membership(self):
+        index = ContributorIndex(self.project)
+        assert_in(self.writer._id, index)
+        assert_not_in(UserFactory()._id, index)
+        assert_is_none(index.get(UserFactory()._id))
+        assert_equal(len(index), 3)
+
+    def test_ordered_visible_ids(self):
+        index = ContributorIndex(self.project)
+        assert_equal(
+            index.ordered_visible_ids([self.reader._id, self.creator._id]),
+            [self.creator._id, self.reader._id]
+        )
+
+    def test_users_loads_missing_users_with_one_query(self):
+        index = ContributorIndex(self.project)
+        User._clear_caches()
+        with mock.patch.object(User, 'find', wraps=User.find) as mock_find:
+            users = index.users()
+        assert_equal(mock_find.call_count, 1)
+        assert_equal(users, [self.creator, self.writer, self.reader])
+
+    def test_node_index_is_rebuilt_when_contributors_change(self):
+        index = self.project.contributor_index
+        assert_is(self.project.contributor_index, index)
+        user = UserFactory()
+        self.project.add_contributor(user, auth=self.auth)
+        assert_is_not(self.project.contributor_index, index)
+        assert_true(self.project.is_contributor(user))
+        self.project.remove_contributor(user, auth=self.auth)
+        assert_false(self.project.is_contributor(user))
+
+    def test_node_index_is_rebuilt_when_visibility_changes(self):
+        assert_false(self.project.get_visible(self.reader))
+        self.project.set_visible(self.reader, True)
+        assert_true(self.project.get_visible(self.reader))
+        self.project.set_visible(self.reader, False)
+        assert_false(self.project.get_visible(self.reader))
+
+    def test_manage_contributors(self):
+        user_dicts = [
+            {'id': self.writer._id, 'permission': ADMIN, 'visible': True},
+            {'id': self.creator._id, 'permission': ADMIN, 'visible': True},
+        ]
+        self.project.manage_contributors(user_dicts, auth=self.auth, save=True)
+        assert_false(self.project.is_contributor(self.reader))
+        assert_equal(self.project.get_permissions(self.writer), [READ, WRITE, ADMIN])
+        assert_equal(self.project.contributors._to_primary_keys(), [self.writer._id, self.creator._id])
+        assert_equal(self.project.visible_contributor_ids, [self.writer._id, self.creator._id])
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import time
+import datetime
 import unittest
 import logging
 import functools
@@ -15,6 +16,9 @@ from website.search import elastic_search
 from website.search.util import build_query
 from website.search_migration.migrate import migrate
 from website.models import Retraction, NodeLicense, Tag
+from website.search.exceptions import ReindexVerificationError
+from website.search.model import IndexedDocument, PendingSearchUpdate, ReindexCheckpoint, WikiSearchText
+from website.addons.wiki.model import NodeWikiPage
 
 from tests.base import OsfTestCase
 from tests.test_features import requires_search
@@ -776,6 +780,201 @@ class TestSearchExceptions(OsfTestCase):
         self.project.save()
 
 
+class TestBulkIndexer(OsfTestCase):
+
+    def setUp(self):
+        super(TestBulkIndexer, self).setUp()
+        self.es_patcher = mock.patch.object(elastic_search, 'es')
+        self.es_patcher.start()
+        self.bulk_patcher = mock.patch.object(elastic_search.helpers, 'bulk', return_value=(0, []))
+        self.mock_bulk = self.bulk_patcher.start()
+        IndexedDocument.remove()
+
+    def tearDown(self):
+        super(TestBulkIndexer, self).tearDown()
+        self.es_patcher.stop()
+        self.bulk_patcher.stop()
+
+    def _reset(self):
+        # Forget the documents sent while setting up
+        self.mock_bulk.reset_mock()
+        IndexedDocument.remove()
+
+    @mock.patch.object(settings, 'ELASTIC_REFRESH_ON_WRITE', False)
+    def test_update_node_indexes_node_and_files_in_one_request(self):
+        node = ProjectFactory(is_public=True)
+        node.get_addon('osfstorage').get_root().append_file('Shake.wav')
+        self._reset()
+        elastic_search.update_node(node)
+        assert_equal(self.mock_bulk.call_count, 1)
+        actions = self.mock_bulk.call_args[0][1]
+        assert_equal(
+            [(action['_op_type'], action['_type']) for action in actions],
+            [('index', 'file'), ('index', 'project')]
+        )
+        assert_false(self.mock_bulk.call_args[1]['refresh'])
+
+    def test_update_node_into_caller_indexer(self):
+        node = ProjectFactory(is_public=True)
+        self._reset()
+        indexer = elastic_search.BulkIndexer(TEST_INDEX)
+        elastic_search.update_node(node, indexer=indexer)
+        elastic_search.update_user(node.creator, indexer=indexer)
+        assert_false(self.mock_bulk.called)
+        indexer.flush()
+        assert_equal(self.mock_bulk.call_count, 1)
+        assert_equal(len(self.mock_bulk.call_args[0][1]), 2)
+
+    def test_deleting_missing_document_is_not_an_error(self):
+        self.mock_bulk.return_value = (0, [{'delete': {'_id': 'abcde', 'status': 404}}])
+        indexer = elastic_search.BulkIndexer(TEST_INDEX)
+        indexer.delete('file', 'abcde')
+        assert_equal(indexer.flush(), 1)
+
+    def test_failed_documents_raise(self):
+        self.mock_bulk.return_value = (0, [{'index': {'_id': 'abcde', 'status': 400}}])
+        indexer = elastic_search.BulkIndexer(TEST_INDEX)
+        indexer.index('file', 'abcde', {})
+        with assert_raises(elastic_search.helpers.BulkIndexError):
+            indexer.flush()
+
+    def test_indexing_stats(self):
+        self.mock_bulk.return_value = (3, [])
+        with mock.patch.object(elastic_search, 'INDEXING_STATS', elastic_search.collections.Counter()):
+            with elastic_search.buffered(TEST_INDEX) as indexer:
+                indexer.index('file', 'abcde', {})
+                indexer.index('file', 'fghij', {})
+                indexer.delete('file', 'klmno')
+            stats = elastic_search.get_indexing_stats()
+        assert_equal(stats['index'], 2)
+        assert_equal(stats['delete'], 1)
+        assert_equal(stats['documents'], 3)
+        assert_equal(stats['requests'], 1)
+
+    def test_unchanged_documents_are_skipped(self):
+        node = ProjectFactory(is_public=True)
+        self._reset()
+        elastic_search.update_node(node, index=TEST_INDEX)
+        indexer = elastic_search.BulkIndexer(TEST_INDEX)
+        elastic_search.update_node(node, indexer=indexer)
+        indexer.flush()
+        assert_equal(self.mock_bulk.call_count, 1)
+        assert_equal(indexer.skipped, 1)
+        assert_equal(indexer.skip_ratio, 1)
+
+    def test_changed_documents_are_sent(self):
+        node = ProjectFactory(is_public=True)
+        elastic_search.update_node(node)
+        self.mock_bulk.reset_mock()
+        node.title = 'Changed'
+        elastic_search.update_node(node)
+        assert_equal(self.mock_bulk.call_count, 1)
+        assert_equal(self.mock_bulk.call_args[0][1][0]['_source']['title'], 'Changed')
+
+    def test_skipping_follows_buffered_actions(self):
+        with elastic_search.buffered(TEST_INDEX) as indexer:
+            indexer.index('file', 'abcde', {'name': 'Shake.wav'})
+        self.mock_bulk.reset_mock()
+        with elastic_search.buffered(TEST_INDEX) as indexer:
+            indexer.delete('file', 'abcde')
+            indexer.index('file', 'abcde', {'name': 'Shake.wav'})
+        assert_equal([action['_op_type'] for action in self.mock_bulk.call_args[0][1]], ['delete', 'index'])
+
+    def test_hashes_recorded_concurrently_are_overwritten(self):
+        store = IndexedDocument._storage[0].store
+        key = IndexedDocument.get_key(TEST_INDEX, 'file', 'abcde')
+        other_key = IndexedDocument.get_key(TEST_INDEX, 'file', 'fghij')
+        remove = store.remove
+
+        def remove_then_record(*args, **kwargs):
+            # Another indexer records the same document between the remove and the insert
+            remove(*args, **kwargs)
+            store.insert({'_id': key, 'index': TEST_INDEX, 'content_hash': 'other'})
+
+        with mock.patch.object(store, 'remove', side_effect=remove_then_record):
+            IndexedDocument.set_hashes(TEST_INDEX, {key: 'mine', other_key: 'also mine'})
+        assert_equal(IndexedDocument.get_hashes([key, other_key]), {key: 'mine', other_key: 'also mine'})
+
+    def test_creating_index_forgets_documents(self):
+        with elastic_search.buffered(TEST_INDEX) as indexer:
+            indexer.index('file', 'abcde', {'name': 'Shake.wav'})
+        elastic_search.create_index(TEST_INDEX)
+        self.mock_bulk.reset_mock()
+        with elastic_search.buffered(TEST_INDEX) as indexer:
+            indexer.index('file', 'abcde', {'name': 'Shake.wav'})
+        assert_true(self.mock_bulk.called)
+
+    def test_wiki_text_rendered_once_per_version(self):
+        node = ProjectFactory(is_public=True)
+        node.update_node_wiki('home', 'Hello world', Auth(node.creator))
+        WikiSearchText.remove()
+        with mock.patch.object(NodeWikiPage, 'raw_text', return_value='Hello world') as mock_raw_text:
+            elastic_search.update_node(node)
+            elastic_search.update_node(node)
+        assert_equal(mock_raw_text.call_count, 1)
+
+
+class TestDebouncedSearchUpdates(OsfTestCase):
+
+    def setUp(self):
+        super(TestDebouncedSearchUpdates, self).setUp()
+        self.node = ProjectFactory(is_public=True)
+        self.key = PendingSearchUpdate.get_key(settings.ELASTIC_INDEX, self.node._id)
+        PendingSearchUpdate.remove()
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch.object(settings, 'SEARCH_UPDATE_DELAY', 10)
+    def test_updates_are_coalesced(self):
+        with mock.patch('website.search.search.enqueue_task') as mock_enqueue:
+            for _ in range(3):
+                search.update_node(self.node)
+        assert_equal(mock_enqueue.call_count, 1)
+        signature = mock_enqueue.call_args[0][0]
+        assert_equal(signature.options['countdown'], 10)
+        assert_equal(PendingSearchUpdate.load(self.key).updates, 3)
+
+    @mock.patch.object(elastic_search, 'update_node')
+    def test_update_waits_for_quiet_period(self, mock_update):
+        PendingSearchUpdate.schedule(self.key, 10)
+        with mock.patch.object(elastic_search.update_node_debounced, 'apply_async') as mock_apply:
+            elastic_search.update_node_debounced(node_id=self.node._id)
+        assert_false(mock_update.called)
+        assert_true(0 < mock_apply.call_args[1]['countdown'] <= 10)
+
+    @mock.patch.object(elastic_search, 'update_node')
+    def test_due_update_is_indexed_once(self, mock_update):
+        coalesced = elastic_search.INDEXING_STATS['updates_coalesced']
+        for _ in range(3):
+            PendingSearchUpdate.schedule(self.key, 0)
+        elastic_search.update_node_debounced(node_id=self.node._id)
+        elastic_search.update_node_debounced(node_id=self.node._id)
+        assert_equal(mock_update.call_count, 1)
+        assert_is_none(PendingSearchUpdate.get_due(self.key))
+        assert_equal(elastic_search.INDEXING_STATS['updates_coalesced'], coalesced + 2)
+
+    def test_overdue_update_counts_as_new(self):
+        assert_true(PendingSearchUpdate.schedule(self.key, -1))
+        assert_true(PendingSearchUpdate.schedule(self.key, 10))
+        assert_false(PendingSearchUpdate.schedule(self.key, 10))
+
+    def test_update_is_not_pushed_back_past_max_wait(self):
+        PendingSearchUpdate.schedule(self.key, 10, max_wait=15)
+        first_requested = PendingSearchUpdate._storage[0].store.find_one({'_id': self.key})['first_requested']
+        PendingSearchUpdate.schedule(self.key, 10, max_wait=15)
+        PendingSearchUpdate.schedule(self.key, 30, max_wait=15)
+        assert_equal(PendingSearchUpdate.get_due(self.key), first_requested + datetime.timedelta(seconds=15))
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch.object(settings, 'SEARCH_UPDATE_DELAY', 10)
+    def test_hidden_node_is_updated_right_away(self):
+        self.node.is_public = False
+        with mock.patch('website.search.search.enqueue_task') as mock_enqueue:
+            search.update_node(self.node)
+        signature = mock_enqueue.call_args[0][0]
+        assert_equal(signature.task, elastic_search.update_node_async.name)
+        assert_is_none(PendingSearchUpdate.get_due(self.key))
+
+
 class TestSearchMigration(SearchTestCase):
     # Verify that the correct indices are created/deleted during migration
 
@@ -789,6 +988,7 @@ class TestSearchMigration(SearchTestCase):
         self.es = search.search_engine.es
         search.delete_index(settings.ELASTIC_INDEX)
         search.create_index(settings.ELASTIC_INDEX)
+        ReindexCheckpoint.remove()
         self.user = UserFactory(fullname='David Bowie')
         self.project = ProjectFactory(
             title=settings.ELASTIC_INDEX,
@@ -823,6 +1023,48 @@ class TestSearchMigration(SearchTestCase):
             assert_equal(var[settings.ELASTIC_INDEX + '_v{}'.format(n + 1)]['aliases'].keys()[0], settings.ELASTIC_INDEX)
             assert not var.get(settings.ELASTIC_INDEX + '_v{}'.format(n))
 
+    @mock.patch.object(settings, 'ELASTIC_BULK_SIZE', 1)
+    def test_migration_in_batches(self):
+        UserFactory()
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        assert_equal(len(query_user('David Bowie')['results']), 1)
+        assert_equal(len(query(settings.ELASTIC_INDEX)['results']), 1)
+        assert_equal(ReindexCheckpoint.find().count(), 0)
+
+    def test_count_mismatch_leaves_alias(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        with mock.patch.object(self.es, 'count', return_value={'count': 0}):
+            with assert_raises(ReindexVerificationError):
+                migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        var = self.es.indices.get_aliases()
+        assert_equal(var[settings.ELASTIC_INDEX + '_v1']['aliases'].keys(), [settings.ELASTIC_INDEX])
+        assert_false(var[settings.ELASTIC_INDEX + '_v2']['aliases'])
+        search.delete_index(settings.ELASTIC_INDEX + '_v2')
+
+    def test_resume_skips_finished_partitions(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        with mock.patch('website.search_migration.migrate.verify_counts', side_effect=RuntimeError):
+            with assert_raises(RuntimeError):
+                migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        assert_true(all(checkpoint.done for checkpoint in ReindexCheckpoint.find()))
+
+        with mock.patch('website.search_migration.migrate.migrate_partition') as mock_partition:
+            migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app, resume=True)
+        assert_false(mock_partition.called)
+        var = self.es.indices.get_aliases()
+        assert_equal(var[settings.ELASTIC_INDEX + '_v2']['aliases'].keys(), [settings.ELASTIC_INDEX])
+        assert_equal(ReindexCheckpoint.find().count(), 0)
+
+    def test_new_migration_discards_unfinished_one(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        with mock.patch('website.search_migration.migrate.migrate_partitions', side_effect=RuntimeError):
+            with assert_raises(RuntimeError):
+                migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        var = self.es.indices.get_aliases()
+        assert_equal(var[settings.ELASTIC_INDEX + '_v2']['aliases'].keys(), [settings.ELASTIC_INDEX])
+        assert_equal(ReindexCheckpoint.find().count(), 0)
+
 class TestSearchFiles(SearchTestCase):
 
     def setUp(self):
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Tests for website.project.forks."""
+import mock
+from nose.tools import *  # PEP8 asserts
+
+from framework.auth import Auth
+from website import settings
+from website.models import Guid, Node, NodeLog
+from website.project import tasks as project_tasks
+from website.project.forks import ForkPlan
+
+from tests.base import OsfTestCase
+from tests.factories import NodeFactory, ProjectFactory, UserFactory
+
+
+class TestForkPlan(OsfTestCase):
+
+    def setUp(self):
+        super(TestForkPlan, self).setUp()
+        self.project = ProjectFactory()
+        self.user = self.project.creator
+        self.auth = Auth(self.user)
+        self.component = NodeFactory(creator=self.user, parent=self.project)
+        self.subcomponent = NodeFactory(creator=self.user, parent=self.component)
+        self.linked = ProjectFactory(creator=self.user)
+        self.component.add_pointer(self.linked, auth=self.auth)
+
+    def test_forks_tree(self):
+        fork = ForkPlan(self.project, self.auth).run()
+        component = fork.nodes[0]
+        subcomponent = component.nodes_primary[0]
+        assert_equal(component.forked_from, self.component)
+        assert_equal(subcomponent.forked_from, self.subcomponent)
+        assert_equal(component.parent_node, fork)
+        assert_equal(subcomponent.parent_node, component)
+        assert_equal(subcomponent.ancestor_ids, [fork._id, component._id])
+        assert_equal([pointer.node for pointer in component.nodes_pointer], [self.linked])
+
+    def test_forks_get_guids(self):
+        fork = ForkPlan(self.project, self.auth).run()
+        for node in [fork] + list(fork.get_descendants_recursive()):
+            assert_equal(Guid.load(node._id).referent, node)
+
+    def test_nodes_and_logs_are_inserted_once(self):
+        # Without pointers, which are still cloned one at a time
+        project = ProjectFactory(creator=self.user)
+        NodeFactory(creator=self.user, parent=project)
+        with mock.patch.object(Node, 'save') as mock_node_save:
+            with mock.patch.object(NodeLog, 'save') as mock_log_save:
+                fork = ForkPlan(project, self.auth).run()
+        assert_false(mock_node_save.called)
+        assert_false(mock_log_save.called)
+        Node._clear_caches()
+        fork = Node.load(fork._id)
+        assert_equal(fork.logs[-1].action, NodeLog.NODE_FORKED)
+        assert_equal(fork.get_log_count(), 1)
+        assert_in(fork._id, self.user.node__contributed._to_primary_keys())
+
+    def test_progress(self):
+        progress = mock.Mock()
+        ForkPlan(self.project, self.auth, progress=progress).run()
+        assert_equal(progress.call_args_list[0], mock.call('building', 1, 3))
+        assert_in(mock.call('saved', 3, 3), progress.call_args_list)
+        assert_equal(progress.call_args_list[-1], mock.call('finishing', 3, 3))
+
+    @mock.patch('website.project.tasks.on_nodes_created')
+    def test_defers_search_and_analytics_to_one_task(self, mock_on_nodes_created):
+        plan = ForkPlan(self.project, self.auth)
+        plan.run()
+        mock_on_nodes_created.assert_called_once_with([fork._id for _, fork in plan.forks])
+
+    def test_skips_components_user_cannot_read(self):
+        self.project.set_privacy('public')
+        user = UserFactory()
+        fork = ForkPlan(self.project, Auth(user)).run()
+        assert_equal(fork.nodes, [])
+
+
+class TestOnNodesCreated(OsfTestCase):
+
+    @mock.patch.object(settings, 'USE_CELERY', True)
+    @mock.patch.object(settings, 'PIWIK_HOST', 'http://piwik.test/')
+    @mock.patch.object(project_tasks.provision_node, 'apply_async')
+    def test_failed_analytics_site_is_retried_on_its_own(self, mock_apply_async):
+        failing, provisioned = ProjectFactory(), ProjectFactory()
+
+        def update_node_object(node):
+            if node._id == failing._id:
+                raise Exception('Piwik is down')
+            node.piwik_site_id = 42
+            node.save(update_piwik=False)
+
+        with mock.patch('website.project.tasks.piwik._update_node_object', side_effect=update_node_object):
+            project_tasks.on_nodes_created([failing._id, provisioned._id])
+        provisioned.reload()
+        assert_equal(provisioned.piwik_site_id, 42)
+        mock_apply_async.assert_called_once_with(args=(failing._id, ), countdown=60)
+
+
+class TestForkNodeTask(OsfTestCase):
+
+    def test_fork_node_task_reports_progress(self):
+        project = ProjectFactory()
+        with mock.patch.object(project_tasks.fork_node, 'update_state') as mock_update_state:
+            fork_id = project_tasks.fork_node(project._id, project.creator._id)
+        fork = Node.load(fork_id)
+        assert_equal(fork.forked_from, project)
+        mock_update_state.assert_called_with(
+            state='PROGRESS', meta={'stage': 'finishing', 'done': 1, 'total': 1}
+        )
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import datetime
+
 import mock
 from nose.tools import *  # noqa
 
@@ -10,7 +12,7 @@ from modularodm import Q
 from modularodm import fields
 from modularodm.storage.mongostorage import MongoStorage
 
-from framework.mongo import database
+from framework.mongo import ObjectId, database
 from framework.guid.model import GuidStoredObject
 
 from website import models
@@ -63,3 +65,113 @@ class TestResolveGuid(OsfTestCase):
             expect_errors=True,
         )
         assert_equal(res.status_code, 404)
+
+
+class TestGenerateMany(OsfTestCase):
+
+    def test_generate_many(self):
+        guids = models.Guid.generate_many(5, 'node')
+        assert_equal(len(set(guid._id for guid in guids)), 5)
+        for guid in guids:
+            assert_equal(guid._fields['referent']._get_underlying_data(guid), (guid._id, 'node'))
+            assert_true(models.Guid.load(guid._id))
+
+    def test_generate_many_skips_blacklisted_and_taken_ids(self):
+        models.BlacklistGuid(_id='aaaaa').save()
+        models.Guid(_id='bbbbb').save()
+        draws = iter(['aaaaa', 'bbbbb', 'ccccc'])
+        with mock.patch('framework.guid.model.random.sample', side_effect=lambda *args: next(draws)):
+            guids = models.Guid.generate_many(1, 'node')
+        assert_equal([guid._id for guid in guids], ['ccccc'])
+
+    def test_generate_many_redraws_ids_taken_concurrently(self):
+        draws = iter([['ddddd', 'eeeee'], ['fffff']])
+
+        def draw_ids(count):
+            ids = next(draws)
+            if ids == ['ddddd', 'eeeee']:
+                # Taken by another process between the check and the insert
+                models.Guid(_id='eeeee').save()
+            return ids
+
+        with mock.patch.object(models.Guid, '_draw_ids', side_effect=draw_ids):
+            guids = models.Guid.generate_many(2, 'node')
+        assert_equal(sorted(guid._id for guid in guids), ['ddddd', 'fffff'])
+
+
+class TestGuidPool(OsfTestCase):
+
+    def test_reserve_takes_ids_from_pool(self):
+        for guid_id in ['aaaaa', 'bbbbb']:
+            models.PooledGuid(_id=guid_id).save()
+        assert_equal(sorted(models.Guid.reserve(2)), ['aaaaa', 'bbbbb'])
+        assert_equal(models.PooledGuid.find().count(), 0)
+
+    def test_reserve_takes_ids_from_random_point_in_pool(self):
+        for guid_id in ['aaaaa', 'ccccc']:
+            models.PooledGuid(_id=guid_id).save()
+        with mock.patch('framework.guid.model.random.sample', return_value='bbbbb'):
+            assert_equal(models.Guid.reserve(1), ['ccccc'])
+            # Wraps around to the start of the pool
+            assert_equal(models.Guid.reserve(1), ['aaaaa'])
+        assert_equal(models.PooledGuid.find().count(), 0)
+
+    def test_reserve_takes_batch_from_random_point_in_pool(self):
+        for guid_id in ['aaaaa', 'ccccc', 'ddddd']:
+            models.PooledGuid(_id=guid_id).save()
+        with mock.patch('framework.guid.model.random.sample', return_value='bbbbb'):
+            # Wraps around to the start of the pool for the last id
+            assert_equal(models.Guid.reserve(3), ['aaaaa', 'ccccc', 'ddddd'])
+        assert_equal(models.PooledGuid.find().count(), 0)
+
+    def test_reserve_skips_ids_claimed_by_another_batch(self):
+        models.PooledGuid(_id='aaaaa', claim='other').save()
+        models.PooledGuid(_id='bbbbb').save()
+        with mock.patch.object(models.Guid, '_draw_ids', return_value=['ccccc']):
+            assert_equal(models.Guid.reserve(2), ['bbbbb', 'ccccc'])
+        assert_equal([guid._id for guid in models.PooledGuid.find()], ['aaaaa'])
+
+    def test_reserve_draws_ids_missing_from_pool(self):
+        models.PooledGuid(_id='aaaaa').save()
+        with mock.patch.object(models.Guid, '_draw_ids', return_value=['ccccc']) as mock_draw_ids:
+            ids = models.Guid.reserve(2)
+        mock_draw_ids.assert_called_once_with(1)
+        assert_equal(ids, ['aaaaa', 'ccccc'])
+
+    def test_fill_pool(self):
+        models.PooledGuid(_id='aaaaa').save()
+        assert_equal(models.Guid.fill_pool(3), 2)
+        assert_equal(models.PooledGuid.find().count(), 3)
+        assert_equal(models.Guid.fill_pool(3), 0)
+
+    def test_fill_pool_releases_expired_claims(self):
+        expired = ObjectId.from_datetime(datetime.datetime.utcnow() - datetime.timedelta(hours=2))
+        models.PooledGuid(_id='aaaaa', claim=str(expired)).save()
+        models.PooledGuid(_id='bbbbb', claim=str(ObjectId())).save()
+        assert_equal(models.Guid.fill_pool(1), 1)
+        assert_false(models.PooledGuid.load('aaaaa'))
+        assert_true(models.PooledGuid.load('bbbbb'))
+
+    def test_fill_pool_skips_blacklisted_and_taken_ids(self):
+        models.BlacklistGuid(_id='aaaaa').save()
+        models.Guid(_id='bbbbb').save()
+        models.PooledGuid(_id='ccccc').save()
+        draws = iter(['aaaaa', 'bbbbb', 'ccccc', 'ddddd'])
+        with mock.patch('framework.guid.model.random.sample', side_effect=lambda *args: next(draws)):
+            models.Guid.fill_pool(2)
+        assert_equal(sorted(guid._id for guid in models.PooledGuid.find()), ['ccccc', 'ddddd'])
+
+    def test_generate_with_referent_saves_once(self):
+        node = NodeFactory()
+        models.PooledGuid(_id='aaaaa').save()
+        with mock.patch.object(models.Guid, 'save', autospec=True) as mock_save:
+            guid = models.Guid.generate(referent=node)
+        assert_equal(mock_save.call_count, 1)
+        assert_equal(guid._id, 'aaaaa')
+        assert_equal(guid.referent, node)
+
+    def test_new_guid_object_inserts_guid_once(self):
+        with mock.patch.object(models.Guid, 'save') as mock_save:
+            node = NodeFactory()
+        assert_false(mock_save.called)
+        assert_equal(models.Guid.load(node._id).referent, node)
@@ -17,6 +17,7 @@ from modularodm.exceptions import ValidationError, ValidationValueError, Validat
 
 
 from framework.analytics import get_total_activity_count
+from framework.mongo import database
 from framework.exceptions import PermissionsError
 from framework.auth import User, Auth
 from framework.auth import cas
@@ -2114,6 +2115,154 @@ class TestNodeTraversals(OsfTestCase):
         descendants = list(point1.get_descendants_recursive())
         assert_equal(len(descendants), 1)
 
+    def test_ancestor_ids_of_components(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        assert_equal(self.root.ancestor_ids, [])
+        assert_equal(comp1.ancestor_ids, [self.root._id])
+        assert_equal(comp1a.ancestor_ids, [self.root._id, comp1._id])
+        assert_equal(comp1a.root, self.root)
+        assert_equal(comp1a.depth, 2)
+
+    def test_pointers_do_not_change_ancestor_ids(self):
+        other = ProjectFactory(creator=self.user)
+        self.root.add_pointer(other, auth=self.auth)
+        other.reload()
+        assert_equal(other.ancestor_ids, [])
+
+    def test_moving_a_component_rewrites_its_subtree(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        other = ProjectFactory(creator=self.user)
+        self.root.nodes.remove(comp1)
+        self.root.save()
+        other.nodes.append(comp1)
+        other.save()
+        assert_equal(comp1.ancestor_ids, [other._id])
+        assert_equal(comp1a.ancestor_ids, [other._id, comp1._id])
+        assert_equal(list(self.root.find_descendants()), [])
+
+    def test_removing_a_component_clears_its_ancestry(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        self.root.nodes.remove(comp1)
+        self.root.save()
+        assert_equal(comp1.ancestor_ids, [])
+        assert_equal(comp1a.ancestor_ids, [comp1._id])
+
+    def test_find_descendants(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        comp2 = ProjectFactory(creator=self.user, parent=self.root)
+        assert_equal(
+            {node._id for node in self.root.find_descendants()},
+            {comp1._id, comp1a._id, comp2._id}
+        )
+        assert_equal([node._id for node in comp1.find_descendants()], [comp1a._id])
+
+    def test_find_descendants_of_subtree_not_backfilled(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        Node._storage[0].store.update(
+            {'_id': {'$in': [comp1._id, comp1a._id]}}, {'$set': {'ancestor_ids': []}}, multi=True
+        )
+        Node._clear_caches()
+        root = Node.load(self.root._id)
+        assert_equal({node._id for node in root.find_descendants()}, {comp1._id, comp1a._id})
+
+        # As when the parent's `nodes` are saved
+        root.update_children_ancestry()
+        assert_equal(Node.load(comp1a._id).ancestor_ids, [self.root._id, comp1._id])
+        assert_equal([node._id for node in root.find_children()], [comp1._id])
+
+    def test_parents_stop_at_deleted_ancestor(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        comp1.is_deleted = True
+        comp1.save()
+        assert_equal(comp1a.parents, [])
+        assert_equal(comp1a.root, comp1a)
+
+    def test_forks_and_registrations_start_their_own_tree(self):
+        comp1 = ProjectFactory(creator=self.user, parent=self.root)
+        comp1a = ProjectFactory(creator=self.user, parent=comp1)
+        fork = comp1.fork_node(self.auth)
+        assert_equal(fork.ancestor_ids, [])
+        assert_equal(fork.nodes[0].ancestor_ids, [fork._id])
+        registration = RegistrationFactory(project=self.root)
+        child = registration.nodes[0]
+        assert_equal(registration.ancestor_ids, [])
+        assert_equal(child.ancestor_ids, [registration._id])
+        assert_equal(child.nodes[0].ancestor_ids, [registration._id, child._id])
+
+
+class TestNodeSaveSideEffects(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeSaveSideEffects, self).setUp()
+        self.project = ProjectFactory(is_public=True)
+        self.component = NodeFactory(creator=self.project.creator, parent=self.project, is_public=True)
+
+    @mock.patch('website.project.model.Node.update_search')
+    def test_search_updated_once_at_end_of_request(self, mock_update_search):
+        with self.context:
+            handlers.celery_before_request()
+            self.project.title = 'First'
+            self.project.save()
+            self.project.title = 'Second'
+            self.project.save()
+            self.component.title = 'Third'
+            self.component.save()
+            assert_false(mock_update_search.called)
+            handlers.celery_teardown_request()
+        assert_equal(mock_update_search.call_count, 2)
+
+    @mock.patch('website.project.model.Node.bulk_update_search')
+    @mock.patch('website.project.model.Node.update_search')
+    def test_license_change_reindexes_inheriting_descendants_once(self, mock_update_search, mock_bulk_update_search):
+        with self.context:
+            handlers.celery_before_request()
+            self.project.node_license = NodeLicenseRecordFactory()
+            self.project.save()
+            self.component.title = 'Updated'
+            self.component.save()
+            handlers.celery_teardown_request()
+        # The component is reindexed on its own account only
+        assert_false(mock_bulk_update_search.called)
+        assert_equal(mock_update_search.call_count, 2)
+
+    @mock.patch('website.project.model.piwik_tasks.update_node')
+    def test_analytics_updated_once_with_all_saved_fields(self, mock_update_node):
+        with mock.patch.object(settings, 'PIWIK_HOST', 'http://piwik.example.com'):
+            with self.context:
+                handlers.celery_before_request()
+                self.project.title = 'Updated'
+                self.project.save()
+                self.project.description = 'Updated'
+                self.project.save()
+                handlers.celery_teardown_request()
+        assert_equal(mock_update_node.call_count, 1)
+        node_id, saved_fields = mock_update_node.call_args[0]
+        assert_equal(node_id, self.project._id)
+        assert_in('title', saved_fields)
+        assert_in('description', saved_fields)
+
+    @mock.patch('website.project.model.Node.update_search')
+    def test_search_updated_immediately_outside_of_request(self, mock_update_search):
+        self.project.title = 'Updated'
+        self.project.save()
+        assert_true(mock_update_search.called)
+
+    @mock.patch('website.project.model.Node.update_search')
+    def test_side_effects_dropped_on_error(self, mock_update_search):
+        with self.context:
+            handlers.celery_before_request()
+            self.project.title = 'Updated'
+            self.project.save()
+            handlers.celery_teardown_request(error=Exception())
+        assert_false(mock_update_search.called)
+
+
 class TestRemoveNode(OsfTestCase):
 
     def setUp(self):
@@ -3751,6 +3900,129 @@ class TestNodeLog(OsfTestCase):
         assert_false(created_log.can_view(unrelated, Auth(user=project.creator)))
 
 
+class TestNodeLogList(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeLogList, self).setUp()
+        self.project = ProjectFactory()
+        self.auth = Auth(self.project.creator)
+        self.project.add_tag('foo', auth=self.auth)
+        self.project.add_tag('bar', auth=self.auth)
+
+    def test_logs_are_not_stored_on_the_node(self):
+        assert_not_in('logs', self.project.to_storage())
+        for log in self.project.logs:
+            assert_equal(log.node_ids, [self.project._id])
+
+    def test_list_api(self):
+        actions = [log.action for log in self.project.logs]
+        assert_equal(actions, [NodeLog.PROJECT_CREATED, NodeLog.TAG_ADDED, NodeLog.TAG_ADDED])
+        assert_equal(len(self.project.logs), 3)
+        assert_true(self.project.logs)
+        assert_equal(self.project.logs[0].action, NodeLog.PROJECT_CREATED)
+        assert_equal(self.project.logs[-1].params['tag'], 'bar')
+        assert_equal([log.params['tag'] for log in self.project.logs[1:]], ['foo', 'bar'])
+        assert_equal([log.params['tag'] for log in reversed(self.project.logs)[:2]], ['bar', 'foo'])
+        assert_in(self.project.logs[-1], self.project.logs)
+        assert_equal(self.project.logs, list(self.project.logs))
+
+    def test_find(self):
+        assert_equal(self.project.logs.find(Q('action', 'eq', NodeLog.TAG_ADDED)).count(), 2)
+
+    def test_append_and_remove(self):
+        log = NodeLogFactory()
+        self.project.logs.append(log)
+        assert_equal(self.project.logs[-1], log)
+        self.project.logs.remove(log)
+        assert_not_in(log, self.project.logs)
+        assert_equal(len(self.project.logs), 3)
+
+    def test_logs_added_before_first_save(self):
+        node = Node(title='Unsaved', creator=self.project.creator, category='project')
+        log = node.add_log(NodeLog.TAG_ADDED, params={'tag': 'baz'}, auth=self.auth, save=False)
+        assert_equal(list(node.logs), [log])
+        node.save(suppress_log=True)
+        log.reload()
+        assert_equal(log.node_ids, [node._id])
+
+    def test_fork_shares_logs(self):
+        fork = self.project.fork_node(self.auth)
+        assert_equal(fork.logs[:-1], list(self.project.logs))
+        assert_not_in(fork.logs[-1], self.project.logs)
+
+    def test_legacy_embedded_logs(self):
+        log = NodeLogFactory()
+        node = Node.load(self.project._id)
+        node.logs = [log._id]
+        assert_in(log, node.logs)
+        assert_equal(len(node.logs), 4)
+
+
+class TestNodeLogCounters(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeLogCounters, self).setUp()
+        self.project = ProjectFactory()
+        self.creator = self.project.creator
+        self.contrib = UserFactory()
+        self.project.add_contributor(self.contrib, auth=Auth(self.creator))
+        self.project.add_tag('foo', auth=Auth(self.contrib))
+
+    def test_add_log_updates_counters(self):
+        assert_equal(self.project.get_log_count(), 3)
+        assert_equal(self.project.get_log_count(self.creator), 2)
+        assert_equal(self.project.get_log_count(self.contrib), 1)
+        assert_equal(self.project.last_logged, self.project.logs[-1].date)
+        assert_equal(self.project.date_modified, self.project.last_logged)
+
+    def test_counters_are_stored_without_saving(self):
+        self.project.title = 'Unsaved title'
+        self.project.add_tag('bar', auth=Auth(self.contrib), save=False)
+        stored = database['node'].find_one({'_id': self.project._id})
+        assert_equal(stored['contributor_log_counts'][self.contrib._id], 2)
+        assert_not_equal(stored['title'], 'Unsaved title')
+        saved_fields = self.project.save()
+        assert_in('title', saved_fields)
+        assert_not_in('log_count', saved_fields)
+
+    def test_saving_stale_node_keeps_counters(self):
+        database['node'].update({'_id': self.project._id}, {'$inc': {'log_count': 1}})
+        self.project.title = 'Changed title'
+        self.project.save()
+        stored = database['node'].find_one({'_id': self.project._id})
+        assert_equal(stored['title'], 'Changed title')
+        assert_equal(stored['log_count'], 4)
+
+    def test_earlier_log_does_not_change_last_logged(self):
+        last_logged = self.project.last_logged
+        self.project.add_log(
+            NodeLog.TAG_ADDED, params={'tag': 'old'}, auth=Auth(self.creator),
+            log_date=last_logged - datetime.timedelta(days=1),
+        )
+        assert_equal(self.project.last_logged, last_logged)
+        assert_equal(self.project.get_log_count(), 4)
+
+    def test_fork_counts_shared_logs(self):
+        fork = self.project.fork_node(Auth(self.contrib))
+        assert_equal(fork.get_log_count(), 4)
+        assert_equal(fork.get_log_count(self.contrib), 2)
+        assert_equal(fork.last_logged, fork.logs[-1].date)
+
+    def test_template_does_not_count_template_logs(self):
+        new = self.project.use_as_template(Auth(self.creator))
+        assert_equal(new.get_log_count(), 1)
+        assert_equal(new.get_log_count(self.contrib), 0)
+
+    def test_refresh_log_counters(self):
+        self.project.log_count = 0
+        self.project.contributor_log_counts = {}
+        self.project.last_logged = None
+        self.project.refresh_log_counters()
+        assert_equal(self.project.get_log_count(), 3)
+        assert_equal(self.project.contributor_log_counts, {self.creator._id: 2, self.contrib._id: 1})
+        assert_equal(self.project.last_logged, self.project.logs[-1].date)
+
+
 class TestPermissions(OsfTestCase):
 
     def setUp(self):
@@ -4089,6 +4361,25 @@ class TestComments(OsfTestCase):
         self.comment = CommentFactory()
         self.auth = Auth(user=self.comment.user)
 
+    def test_find_unread_counts_matches_find_unread(self):
+        node = self.comment.node
+        reader = UserFactory()
+        node.add_contributor(reader, auth=self.auth, save=True)
+        other_node = NodeFactory(creator=reader)
+        CommentFactory(node=other_node)
+        not_contributed = NodeFactory()
+        CommentFactory(node=not_contributed)
+
+        nodes = [node, other_node, not_contributed]
+        counts = Comment.find_unread_counts(reader, nodes)
+        assert_equal(counts, {
+            each._id: Comment.find_unread(user=reader, node=each)
+            for each in nodes
+        })
+        assert_equal(counts[node._id], 1)
+        assert_equal(counts[other_node._id], 0)
+        assert_equal(counts[not_contributed._id], 0)
+
     def test_create(self):
         comment = Comment.create(
             auth=self.auth,
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Tests for website.project.tree."""
+import mock
+from nose.tools import *  # PEP8 asserts
+
+from framework.auth import Auth
+from website.models import Node, Pointer
+from website.project.tree import NodeTree
+
+from tests.base import OsfTestCase
+from tests.factories import NodeFactory, ProjectFactory
+
+
+class TestNodeTree(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeTree, self).setUp()
+        self.root = ProjectFactory()
+        self.user = self.root.creator
+        self.comp1 = NodeFactory(creator=self.user, parent=self.root)
+        self.comp1a = NodeFactory(creator=self.user, parent=self.comp1)
+        self.comp2 = NodeFactory(creator=self.user, parent=self.root)
+        self.linked = ProjectFactory(creator=self.user)
+        self.pointer = self.comp2.add_pointer(self.linked, auth=Auth(self.user))
+
+    def test_descendants_are_depth_first(self):
+        tree = NodeTree(self.root)
+        assert_equal(
+            [node._id for node in tree.descendants()],
+            [self.comp1._id, self.comp1a._id, self.comp2._id, self.pointer._id]
+        )
+
+    def test_walk_depths(self):
+        tree = NodeTree(self.root)
+        assert_equal(
+            [(node._id, depth) for node, depth in tree.walk(include=lambda n: n.primary)],
+            [(self.comp1._id, 0), (self.comp1a._id, 1), (self.comp2._id, 0)]
+        )
+
+    def test_descend(self):
+        tree = NodeTree(self.root)
+        descendants = tree.descendants(descend=lambda n: n._id != self.comp1._id)
+        assert_not_in(self.comp1a, list(descendants))
+
+    def test_nodes_are_visited_once(self):
+        # A node listed under two parents
+        self.comp2.nodes.append(self.comp1a)
+        self.comp2.save()
+        ids = [node._id for node in NodeTree(self.root).descendants()]
+        assert_equal(ids.count(self.comp1a._id), 1)
+
+    def test_loads_subtree_one_level_at_a_time(self):
+        Node._clear_caches()
+        Pointer._clear_caches()
+        root = Node.load(self.root._id)
+        with mock.patch.object(Node._storage[0], 'get') as mock_get:
+            tree = NodeTree(root)
+            assert_equal(len(list(tree.descendants())), 4)
+        assert_false(mock_get.called)
+
+    def test_has_pointers(self):
+        assert_true(NodeTree(self.root).has_pointers())
+        assert_false(NodeTree(self.comp1).has_pointers())
+
+    def test_next_descendants(self):
+        descendants = NodeTree(self.root).next_descendants(
+            Auth(self.user),
+            condition=lambda auth, node: node._id in (self.comp1a._id, self.comp2._id)
+        )
+        assert_equal(descendants, [(self.comp1, [(self.comp1a, [])]), (self.comp2, [])])
+
+    def test_has_addon_on_children_skips_deleted_components(self):
+        self.comp1a.add_addon('github', auth=Auth(self.user))
+        self.comp1a.save()
+        assert_true(self.root.has_addon_on_children('github'))
+        self.comp1.is_deleted = True
+        self.comp1.save()
+        assert_false(self.root.has_addon_on_children('github'))
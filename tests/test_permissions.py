@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 """Tests for the permissions module."""
 import unittest
+import mock
 from nose.tools import *  # PEP8 asserts
 
+from framework.auth import Auth
+from website.models import Node
+from website.project import permissions as project_permissions
 from website.util import permissions
 
+from tests.base import OsfTestCase
+from tests.factories import NodeFactory, ProjectFactory, UserFactory
+
 
 def test_expand_permissions():
     result = permissions.expand_permissions('admin')
@@ -43,5 +50,76 @@ def test_default_contributor_permissions():
         ['read', 'write'])
 
 
+class TestPermissionResolver(OsfTestCase):
+
+    def setUp(self):
+        super(TestPermissionResolver, self).setUp()
+        self.admin = UserFactory()
+        self.user = UserFactory()
+        self.project = ProjectFactory(creator=self.admin)
+        self.component = NodeFactory(creator=self.user, parent=self.project)
+        self.subcomponent = NodeFactory(creator=self.user, parent=self.component)
+
+    def test_inherited_admin_grants_read(self):
+        resolver = project_permissions.PermissionResolver()
+        assert_true(resolver.has_permission(self.admin, self.subcomponent, permissions.READ))
+        assert_false(resolver.has_permission(self.admin, self.subcomponent, permissions.WRITE))
+        assert_false(resolver.has_permission(self.user, self.project, permissions.READ))
+
+    def test_lineage_is_resolved_once(self):
+        resolver = project_permissions.PermissionResolver()
+        resolver.inherits_admin(self.admin, self.subcomponent)
+        with mock.patch.object(Node, 'parents', new_callable=mock.PropertyMock) as mock_parents:
+            assert_true(resolver.inherits_admin(self.admin, self.component))
+            assert_false(resolver.inherits_admin(self.admin, self.project))
+        assert_false(mock_parents.called)
+
+    def test_resolve_subtree(self):
+        resolver = project_permissions.PermissionResolver()
+        resolved = resolver.resolve_subtree(self.admin, self.project)
+        assert_equal(set(resolved), {self.project._id, self.component._id, self.subcomponent._id})
+        assert_equal(resolved[self.subcomponent._id], [permissions.READ])
+        assert_in(permissions.ADMIN, resolved[self.project._id])
+
+    def test_resolve_subtree_skips_deleted_components(self):
+        self.subcomponent.is_deleted = True
+        self.subcomponent.save()
+        resolver = project_permissions.PermissionResolver()
+        assert_not_in(self.subcomponent._id, resolver.resolve_subtree(self.admin, self.project))
+
+    def test_resolve_subtree_not_backfilled(self):
+        Node._storage[0].store.update(
+            {'_id': {'$in': [self.component._id, self.subcomponent._id]}},
+            {'$set': {'ancestor_ids': []}},
+            multi=True
+        )
+        Node._clear_caches()
+        project = Node.load(self.project._id)
+        resolved = project_permissions.PermissionResolver().resolve_subtree(self.admin, project)
+        assert_equal(set(resolved), {self.project._id, self.component._id, self.subcomponent._id})
+        assert_equal(resolved[self.subcomponent._id], [permissions.READ])
+        assert_true(project.has_permission_on_children(self.admin, permissions.READ))
+
+    def test_resolver_is_not_kept_outside_of_request(self):
+        assert_is_not(project_permissions.get_permission_resolver(), project_permissions.get_permission_resolver())
+
+    def test_permission_changes_invalidate_request_cache(self):
+        assert_true(self.subcomponent.has_permission(self.admin, permissions.READ))
+        self.project.set_permissions(self.admin, [permissions.READ, permissions.WRITE], save=True)
+        assert_false(self.subcomponent.has_permission(self.admin, permissions.READ))
+
+    def test_removing_contributor_invalidates_request_cache(self):
+        contributor = UserFactory()
+        self.component.add_contributor(
+            contributor,
+            permissions=[permissions.READ, permissions.WRITE, permissions.ADMIN],
+            auth=Auth(self.user),
+            save=True
+        )
+        assert_true(self.subcomponent.has_permission(contributor, permissions.READ))
+        self.component.remove_contributor(contributor, auth=Auth(self.user))
+        assert_false(self.subcomponent.has_permission(contributor, permissions.READ))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -846,12 +846,28 @@ class TestArchiverUtils(ArchiverTestCase):
 class TestArchiverListeners(ArchiverTestCase):
 
     @mock.patch('website.archiver.tasks.archive')
-    @mock.patch('website.archiver.utils.before_archive')
-    def test_after_register(self, mock_before_archive, mock_archive):
+    @mock.patch('website.archiver.utils.before_archive_tree')
+    def test_after_register(self, mock_before_archive_tree, mock_archive):
         listeners.after_register(self.src, self.dst, self.user)
-        mock_before_archive.assert_called_with(self.dst, self.user)
+        # The registration already has a job
+        mock_before_archive_tree.assert_called_with([], self.user)
         mock_archive.assert_called_with(job_pk=self.archive_job._id)
 
+    @mock.patch('website.archiver.tasks.archive')
+    @mock.patch('celery.chain')
+    def test_after_register_prepares_jobs_for_whole_tree(self, mock_chain, mock_archive):
+        proj = factories.ProjectFactory(creator=self.user)
+        factories.ProjectFactory(creator=self.user, parent=proj)
+        with mock.patch('website.project.registrations.project_signals.after_create_registration'):
+            reg = factories.RegistrationFactory(project=proj, archive=True)
+        rc1 = reg.nodes[0]
+        assert_is_none(reg.archive_job)
+        listeners.after_register(proj, reg, self.user)
+        assert_equal(reg.archive_job.dst_node, reg)
+        assert_equal(rc1.archive_job.dst_node, rc1)
+        mock_archive.assert_any_call(job_pk=rc1.archive_job._id)
+        assert_equal(mock_chain.call_count, 1)
+
     @mock.patch('website.archiver.tasks.archive')
     @mock.patch('celery.chain')
     def test_after_register_archive_runs_only_for_root(self, mock_chain, mock_archive):
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Tests for website.project.registrations."""
+import mock
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.auth import Auth
+from framework.exceptions import PermissionsError
+
+from website import settings
+from website.models import Node
+from website.project.model import ensure_schemas
+from website.project.registrations import RegistrationPlan
+
+from tests.base import OsfTestCase, get_default_metaschema
+from tests.factories import NodeFactory, ProjectFactory, UserFactory
+
+
+class TestRegistrationPlan(OsfTestCase):
+
+    def setUp(self):
+        super(TestRegistrationPlan, self).setUp()
+        ensure_schemas()
+        self.schema = get_default_metaschema()
+        self.project = ProjectFactory(is_public=True)
+        self.user = self.project.creator
+        self.auth = Auth(self.user)
+        self.component = NodeFactory(creator=self.user, parent=self.project)
+        self.subcomponent = NodeFactory(creator=self.user, parent=self.component)
+        self.deleted = NodeFactory(creator=self.user, parent=self.project, is_deleted=True)
+        self.linked = ProjectFactory(creator=self.user)
+        self.component.add_pointer(self.linked, auth=self.auth)
+
+    def _register(self, **kwargs):
+        with mock.patch('framework.tasks.handlers.enqueue_task'):
+            return RegistrationPlan(self.project, self.auth, self.schema, {'some': 'data'}, **kwargs).run()
+
+    def test_registers_tree(self):
+        registration = self._register()
+        component = registration.nodes[0]
+        subcomponent = component.nodes_primary[0]
+        assert_equal(len(registration.nodes), 1)
+        for original, registered in [
+                (self.project, registration), (self.component, component), (self.subcomponent, subcomponent)]:
+            assert_true(registered.is_registration)
+            assert_false(registered.is_public)
+            assert_equal(registered.registered_from, original)
+            assert_equal(registered.registered_user, self.user)
+            assert_equal(registered.registered_meta[self.schema._id], {'some': 'data'})
+            assert_equal(list(registered.contributors), list(original.contributors))
+            assert_equal(registered.logs, original.logs)
+        assert_equal(subcomponent.parent_node, component)
+        assert_equal(subcomponent.ancestor_ids, [registration._id, component._id])
+        assert_equal([pointer.node for pointer in component.nodes_pointer], [self.linked])
+        assert_in(registration._id, self.project.node__registrations._to_primary_keys())
+
+    def test_nodes_are_inserted_once(self):
+        project = ProjectFactory(creator=self.user)
+        NodeFactory(creator=self.user, parent=project)
+        with mock.patch.object(Node, 'save') as mock_save:
+            with mock.patch('framework.tasks.handlers.enqueue_task'):
+                with mock.patch.object(settings, 'ENABLE_ARCHIVER', False):
+                    RegistrationPlan(project, self.auth, self.schema, {}).run()
+        assert_false(mock_save.called)
+
+    @mock.patch('celery.chain')
+    def test_starts_one_archive_for_the_tree(self, mock_chain):
+        with mock.patch('framework.tasks.handlers.enqueue_task') as mock_enqueue:
+            with mock.patch('website.archiver.tasks.archive') as mock_archive:
+                registration = RegistrationPlan(self.project, self.auth, self.schema, {}).run()
+        assert_equal(mock_archive.call_count, 3)
+        assert_equal(mock_chain.call_count, 1)
+        for node in registration.node_and_primary_descendants():
+            assert_equal(node.archive_job.src_node, node.registered_from)
+        # One archive chain and one task for search and analytics
+        assert_equal(mock_enqueue.call_count, 2)
+
+    def test_records_timings(self):
+        plan = RegistrationPlan(self.project, self.auth, self.schema, {})
+        with mock.patch('framework.tasks.handlers.enqueue_task'):
+            plan.run()
+        assert_equal(plan.timings.keys(), ['load', 'build', 'insert', 'finish'])
+
+    def test_components_are_checked(self):
+        user = UserFactory()
+        self.project.add_contributor(user, auth=self.auth, permissions=['read', 'write'], save=True)
+        with assert_raises(PermissionsError):
+            RegistrationPlan(self.project, Auth(user), self.schema, {}).run()
+
+    @mock.patch.object(settings, 'BULK_REGISTRATIONS', True)
+    def test_register_node_uses_plan(self):
+        with mock.patch('website.project.registrations.RegistrationPlan.run') as mock_run:
+            self.project.register_node(self.schema, self.auth, {})
+        assert_true(mock_run.called)
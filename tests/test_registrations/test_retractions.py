@@ -399,6 +399,29 @@ class RegistrationWithChildNodesRetractionModelTestCase(OsfTestCase):
         for node in descendants:
             assert_true(node.is_retracted)
 
+    def test_approval_sets_retracted_flag_on_descendant_nodes(self):
+        self.registration.retract_registration(self.user)
+        self.registration.save()
+        assert_false(self.registration.retracted)
+
+        approval_token = self.registration.retraction.approval_state[self.user._id]['approval_token']
+        self.registration.retraction.approve_retraction(self.user, approval_token)
+
+        for node in self.registration.node_and_primary_descendants():
+            node.reload()
+            assert_true(node.retracted)
+
+    def test_disapproval_leaves_retracted_flag_unset(self):
+        self.registration.retract_registration(self.user)
+        self.registration.save()
+
+        rejection_token = self.registration.retraction.approval_state[self.user._id]['rejection_token']
+        self.registration.retraction.disapprove_retraction(self.user, rejection_token)
+
+        for node in self.registration.node_and_primary_descendants():
+            node.reload()
+            assert_false(node.retracted)
+
     def test_disapproval_cancels_retraction_on_descendant_nodes(self):
         # Initiate retraction for parent registration
         self.registration.retract_registration(self.user)
@@ -1,11 +1,15 @@
 import xml
+import datetime
+from collections import OrderedDict
 
 from mock import patch
 from nose.tools import *  # flake8: noqa (PEP8 asserts)
 from tests.base import OsfTestCase
 
+from website import settings
 from website.search import util
 from website.search import share_search
+from website.search.model import CachedSearchResult
 
 STANDARD_RETURN_VALUE = {
     'hits': {
@@ -55,9 +59,25 @@ STANDARD_RETURN_VALUE = {
     }
 }
 
+PROVIDERS_RETURN_VALUE = {
+    'hits': {
+        'hits': [{
+            '_source': {
+                'short_name': 'squaredcircle',
+                'long_name': 'Squared Circle',
+            },
+        }],
+        'total': 1
+    }
+}
+
 
 class TestShareSearch(OsfTestCase):
 
+    def setUp(self):
+        super(TestShareSearch, self).setUp()
+        CachedSearchResult.remove()
+
     @patch.object(share_search.share_es, 'search')
     def test_share_search(self, mock_search):
         mock_search.return_value = {
@@ -166,6 +186,86 @@ class TestShareSearch(OsfTestCase):
         assert_is(mock_search.called, True)
 
 
+@patch.object(settings, 'SHARE_CACHE_TTL', 300)
+@patch.object(settings, 'SHARE_CACHE_STALE_TTL', 3600)
+class TestShareCache(OsfTestCase):
+
+    def setUp(self):
+        super(TestShareCache, self).setUp()
+        CachedSearchResult.remove()
+        self.key = share_search.get_cache_key('providers', share_search.PROVIDERS_QUERY)
+
+    def _age(self, seconds):
+        CachedSearchResult._storage[0].store.update(
+            {'_id': self.key},
+            {'$set': {'cached_at': datetime.datetime.utcnow() - datetime.timedelta(seconds=seconds)}}
+        )
+
+    def test_key_ignores_key_order(self):
+        assert_equal(
+            share_search.get_cache_key('stats', OrderedDict([('query', {}), ('size', 0)])),
+            share_search.get_cache_key('stats', OrderedDict([('size', 0), ('query', {})]))
+        )
+        assert_not_equal(
+            share_search.get_cache_key('stats', {'query': {}}),
+            share_search.get_cache_key('providers', {'query': {}})
+        )
+
+    @patch.object(share_search.share_es, 'search')
+    def test_results_are_cached(self, mock_search):
+        mock_search.return_value = PROVIDERS_RETURN_VALUE
+        hits = share_search.CACHE_STATS['hits']
+        first = share_search.providers()
+        second = share_search.providers()
+        assert_equal(mock_search.call_count, 1)
+        assert_equal(first, second)
+        assert_equal(share_search.CACHE_STATS['hits'], hits + 1)
+        assert_true(0 < share_search.get_cache_stats()['hit_ratio'] <= 1)
+
+    @patch.object(share_search.share_es, 'search')
+    def test_stale_result_is_served_and_refreshed_once(self, mock_search):
+        mock_search.return_value = PROVIDERS_RETURN_VALUE
+        share_search.providers()
+        self._age(400)
+        with patch('website.search.share_search.enqueue_task') as mock_enqueue:
+            share_search.providers()
+            share_search.providers()
+        assert_equal(mock_search.call_count, 1)
+        assert_equal(mock_enqueue.call_count, 1)
+
+        share_search.refresh_cache('providers', share_search.PROVIDERS_QUERY)
+        assert_equal(mock_search.call_count, 2)
+        _, cached_at = CachedSearchResult.get_result(self.key)
+        assert_less((datetime.datetime.utcnow() - cached_at).total_seconds(), 300)
+
+    @patch.object(share_search.share_es, 'search')
+    def test_expired_result_is_recomputed(self, mock_search):
+        mock_search.return_value = PROVIDERS_RETURN_VALUE
+        share_search.providers()
+        self._age(5000)
+        share_search.providers()
+        assert_equal(mock_search.call_count, 2)
+
+    @patch.object(share_search, 'query_stats')
+    def test_only_default_stats_query_is_cached(self, mock_query_stats):
+        mock_query_stats.return_value = {}
+        share_search.stats({'query': {'match': {'_all': 'foo'}}})
+        assert_equal(mock_query_stats.call_count, 1)
+        assert_equal(CachedSearchResult.find().count(), 0)
+        with patch.dict(share_search.CACHED_QUERIES, {'stats': mock_query_stats}):
+            share_search.stats()
+        assert_equal(CachedSearchResult.find().count(), 1)
+
+    @patch.object(settings, 'SHARE_CACHE_TTL', 0)
+    @patch.object(share_search.share_es, 'search')
+    def test_caching_can_be_disabled(self, mock_search):
+        mock_search.return_value = PROVIDERS_RETURN_VALUE
+        share_search.providers()
+        share_search.providers()
+        assert_equal(mock_search.call_count, 2)
+        assert_is_none(CachedSearchResult.get_result(self.key)[0])
+
+
 class TestShareAtom(OsfTestCase):
 
     @patch.object(share_search.share_es, 'search')
@@ -24,8 +24,8 @@ class TestWatching(OsfTestCase):
         # add some log objects
         self.consolidate_auth = Auth(user=self.user)
         # Clear project logs
-        self.project.logs = []
-        self.project.save()
+        for log in list(self.project.logs):
+            self.project.logs.remove(log)
         # A log added 100 days ago
         self.project.add_log(
             'project_created',
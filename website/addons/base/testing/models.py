@@ -241,7 +241,7 @@ class OAuthAddonNodeSettingsTestSuiteMixin(OAuthAddonModelTestSuiteMixinBase):
     def test_delete(self):
         assert_true(self.node_settings.user_settings)
         assert_true(self.node_settings.folder_id)
-        old_logs = self.node.logs
+        old_logs = list(self.node.logs)
         self.node_settings.delete()
         self.node_settings.save()
         assert_is(self.node_settings.user_settings, None)
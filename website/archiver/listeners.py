@@ -15,16 +15,21 @@ def after_register(src, dst, user):
     """Blinker listener for registration initiations. Enqueqes a chain
     of archive tasks for the current node and its descendants
 
+    Registrations made recursively send this once for each node in the tree, with
+    the root last; bulk registrations send it once, for the root.
+
     :param src: Node being registered
     :param dst: registration Node
     :param user: registration initiator
     """
     # Prevent circular import with app.py
     from website.archiver import tasks
-    archiver_utils.before_archive(dst, user)
     if dst.root != dst:  # if not top-level registration
+        archiver_utils.before_archive(dst, user)
         return
-    archive_tasks = [tasks.archive(job_pk=t.archive_job._id) for t in dst.node_and_primary_descendants()]
+    tree = list(dst.node_and_primary_descendants())
+    archiver_utils.before_archive_tree([node for node in tree if not node.archive_job], user)
+    archive_tasks = [tasks.archive(job_pk=t.archive_job._id) for t in tree]
     handlers.enqueue_task(
         celery.chain(archive_tasks)
     )
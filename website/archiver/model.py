@@ -156,7 +156,8 @@ class ArchiveJob(StoredObject):
         target.save()
         self.target_addons.append(target)
 
-    def set_targets(self):
+    def get_target_names(self):
+        """Names of the targets to archive: the complete storage addons on the source node."""
         addons = []
         for addon in [self.src_node.get_addon(name)
                       for name in settings.ADDONS_ARCHIVABLE
@@ -170,7 +171,10 @@ class ArchiveJob(StoredObject):
                     addons.append(addon.config.short_name + '-published')
                 else:
                     addons.append(addon.config.short_name)
-        for addon in addons:
+        return addons
+
+    def set_targets(self):
+        for addon in self.get_target_names():
             self._set_target(addon)
         self.save()
 
@@ -1,13 +1,14 @@
 import functools
 
 from framework.auth import Auth
+from framework.mongo import bulk_insert
 
 from website.archiver import (
     StatResult, AggregateStatResult,
     ARCHIVER_NETWORK_ERROR,
     ARCHIVER_SIZE_EXCEEDED,
 )
-from website.archiver.model import ArchiveJob
+from website.archiver.model import ArchiveJob, ArchiveTarget
 
 from website import mails
 from website import settings
@@ -140,6 +141,27 @@ def before_archive(node, user):
     )
     job.set_targets()
 
+def before_archive_tree(nodes, user):
+    """Prepare each of the registrations `nodes` for archiving like `before_archive`, but with one insert
+    for all of their jobs and one for all of their targets.
+    """
+    jobs = []
+    targets = []
+    for node in nodes:
+        link_archive_provider(node, user)
+        job = ArchiveJob(
+            src_node=node.registered_from,
+            dst_node=node,
+            initiator=user
+        )
+        for name in job.get_target_names():
+            target = ArchiveTarget(name=name)
+            job.target_addons.append(target._id)
+            targets.append(target)
+        jobs.append(job)
+    bulk_insert(targets)
+    bulk_insert(jobs)
+
 def _do_get_file_map(file_tree):
     """Reduces a tree of folders and files into a list of (<sha256>, <file_metadata>) pairs
     """
@@ -3,7 +3,7 @@
 """
 
 from framework.auth.core import User
-from framework.guid.model import Guid, BlacklistGuid
+from framework.guid.model import Guid, BlacklistGuid, PooledGuid
 from framework.sessions.model import Session
 
 from website.project.model import (
@@ -26,6 +26,9 @@ from website.notifications.model import NotificationDigest
 from website.notifications.model import NotificationSubscription
 from website.archiver.model import ArchiveJob, ArchiveTarget
 from website.project.licenses import NodeLicense, NodeLicenseRecord
+from website.search.model import (
+    CachedSearchResult, IndexedDocument, PendingSearchUpdate, ReindexCheckpoint, WikiSearchText,
+)
 
 # All models
 MODELS = (
@@ -36,10 +39,11 @@ MODELS = (
     NotificationSubscription, NotificationDigest, CitationStyle,
     CitationStyle, ExternalAccount, Identifier,
     Embargo, Retraction, RegistrationApproval,
-    ArchiveJob, ArchiveTarget, BlacklistGuid,
+    ArchiveJob, ArchiveTarget, BlacklistGuid, PooledGuid,
     QueuedMail,
     DraftRegistration, DraftRegistrationApproval,
-    NodeLicense, NodeLicenseRecord
+    NodeLicense, NodeLicenseRecord,
+    CachedSearchResult, IndexedDocument, PendingSearchUpdate, ReindexCheckpoint, WikiSearchText,
 )
 
 GUID_MODELS = (User, Node, Comment, MetaData)
@@ -128,13 +128,8 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
-
-    while node.parent_id:
-        node = website_models.Node.load(node.parent_id)
-        lineage = [node._id] + lineage
-
-    return lineage
+    ancestor_ids = node.ancestor_ids or node.compute_ancestor_ids()
+    return list(ancestor_ids) + [node._id]
 
 
 def get_settings_url(uid, user):
@@ -62,7 +62,7 @@ def serialize_user(user, node=None, admin=False, full=False):
             }
         else:
             flags = {
-                'visible': user._id in node.visible_contributor_ids,
+                'visible': node.contributor_index.is_visible(user._id),
                 'permission': reduce_permissions(node.get_permissions(user)),
             }
         ret.update(flags)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Contributor lookups.
+
+A node keeps its contributors in the ordered `contributors` list, their permissions in the `permissions`
+dict and its bibliographic contributors in the ordered `visible_contributor_ids` list. Checking membership
+or visibility by scanning those lists, and loading each user with its own query, makes managing the
+contributors of a large project quadratic. A :class:`ContributorIndex` reads the lists once into sets and
+dicts, and loads users in bulk.
+"""
+import collections
+
+from modularodm import Q
+
+from framework.auth import User
+
+from website.util.permissions import PERMISSIONS
+
+# permission => bit, from most restrictive to most permissive
+PERMISSION_BITS = collections.OrderedDict(
+    (permission, 1 << position) for position, permission in enumerate(PERMISSIONS)
+)
+
+
+def to_bits(permissions):
+    """Pack a list of permissions into an int."""
+    bits = 0
+    for permission in permissions:
+        bits |= PERMISSION_BITS.get(permission, 0)
+    return bits
+
+
+class Contributor(collections.namedtuple('Contributor', ['id', 'permission_bits', 'visible', 'order'])):
+    """A contributor of a node: user id, permissions packed with `to_bits`, whether the contributor is
+    bibliographic, and position in the node's contributors.
+    """
+
+    __slots__ = ()
+
+    def has_permission(self, permission):
+        return bool(self.permission_bits & PERMISSION_BITS[permission])
+
+    @property
+    def permissions(self):
+        return [permission for permission in PERMISSIONS if self.has_permission(permission)]
+
+    @property
+    def permission(self):
+        """The most permissive permission, or None."""
+        permissions = self.permissions
+        return permissions[-1] if permissions else None
+
+
+class ContributorIndex(object):
+    """The contributors of `node`. Permissions are read from the node on each lookup; membership, order
+    and visibility are read when the index is built, and `Node.contributor_index` rebuilds it when they
+    change.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        # Held, rather than their ids, so that `is_current` can't be fooled by a list reusing the
+        # address of a collected one
+        self._contributors = node.contributors
+        self._visible_contributor_ids = node.visible_contributor_ids
+        self._sizes = (len(self._contributors), len(self._visible_contributor_ids))
+
+        self.ids = self._contributors._to_primary_keys()
+        # user id => position in the contributors
+        self.order = {}
+        for position, user_id in enumerate(self.ids):
+            self.order.setdefault(user_id, position)
+        self.visible_ids = set(self._visible_contributor_ids)
+
+    def is_current(self):
+        """Whether the node's contributors are still those the index was built from, as far as can be
+        told without scanning them. Changes that replace contributors in place must reset the index.
+        """
+        return (
+            self.node.contributors is self._contributors and
+            self.node.visible_contributor_ids is self._visible_contributor_ids and
+            (len(self._contributors), len(self._visible_contributor_ids)) == self._sizes
+        )
+
+    def __contains__(self, user_id):
+        return user_id in self.order
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.get(user_id) for user_id in self.ids)
+
+    def get(self, user_id):
+        """The :class:`Contributor` for `user_id`, or None."""
+        if user_id not in self.order:
+            return None
+        return Contributor(
+            id=user_id,
+            permission_bits=to_bits(self.node.permissions.get(user_id, [])),
+            visible=user_id in self.visible_ids,
+            order=self.order[user_id],
+        )
+
+    def is_visible(self, user_id):
+        return user_id in self.visible_ids
+
+    def ordered_visible_ids(self, visible_ids=None):
+        """Ids of `visible_ids` (default: the bibliographic contributors) that are contributors, in the
+        order of the contributors.
+        """
+        visible_ids = self.visible_ids if visible_ids is None else set(visible_ids)
+        return [user_id for user_id in self.ids if user_id in visible_ids]
+
+    def users(self, user_ids=None):
+        """Users for `user_ids` (default: every contributor), in order, fetching those not loaded yet with a
+        single query.
+        """
+        user_ids = self.ids if user_ids is None else list(user_ids)
+        missing = [user_id for user_id in user_ids if not User._is_cached(user_id)]
+        if missing:
+            # Iterating the results loads them into the identity map
+            list(User.find(Q('_id', 'in', missing)))
+        return [User.load(user_id) for user_id in user_ids]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Forking of node trees. See `website.project.snapshots`."""
+import datetime
+
+from framework.analytics import increment_user_activity_counters
+from framework.exceptions import PermissionsError
+from framework.mongo import bulk_insert
+
+from website.exceptions import NodeStateError
+from website.project.model import NodeLog
+from website.project.snapshots import TreeSnapshot
+from website.util.permissions import CREATOR_PERMISSIONS
+
+
+class ForkPlan(TreeSnapshot):
+    """Forks `node` and every non-deleted component under it that the user can read.
+
+    :param str title: Text to prepend to the title of the forked node
+    """
+
+    action = 'Forked'
+
+    def __init__(self, node, auth, title='Fork of ', progress=None):
+        super(ForkPlan, self).__init__(node, auth, progress=progress)
+        self.title = title
+        self.when = datetime.datetime.utcnow()
+        self.logs = []
+
+    @property
+    def forks(self):
+        return self.copies
+
+    def check(self):
+        user = self.auth.user
+        # Non-contributors can't fork private nodes
+        if not (self.original.is_public or self.original.has_permission(user, 'read')):
+            raise PermissionsError('{0!r} does not have permission to fork node {1!r}'.format(user, self.original._id))
+        if self.original.is_deleted:
+            raise NodeStateError('Cannot fork deleted node.')
+
+    def include(self, node):
+        return not node.is_deleted and (node.is_public or node.has_permission(self.auth.user, 'read'))
+
+    def copy_node(self, original, fork_id, parent_fork):
+        # Note: Cloning a node copies its `wiki_pages_current` and
+        # `wiki_pages_versions` fields, but does not clone the underlying
+        # database objects to which these dictionaries refer. This means that
+        # the cloned node must pass itself to its wiki objects to build the
+        # correct URLs to that content.
+        fork = original.clone()
+        fork._id = fork_id
+        if parent_fork is not None:
+            fork.ancestor_ids = list(parent_fork.ancestor_ids) + [parent_fork._id]
+            fork.title = original.title
+        else:
+            fork.title = self.title + original.title
+
+        fork.tags = original.tags
+        fork.is_fork = True
+        fork.is_registration = False
+        fork.forked_date = self.when
+        fork.forked_from = original
+        fork.creator = self.auth.user
+        fork.piwik_site_id = None
+        fork.node_license = original.license.copy() if original.license else None
+
+        # Forks default to private status
+        fork.is_public = False
+
+        # Clear permissions before adding users
+        fork.permissions = {}
+        fork.visible_contributor_ids = []
+        fork.add_contributor(
+            contributor=self.auth.user,
+            permissions=CREATOR_PERMISSIONS,
+            log=False,
+            save=False
+        )
+        fork.adjust_permissions()
+
+        log = NodeLog(
+            action=NodeLog.NODE_FORKED,
+            user=self.auth.user,
+            params={
+                'parent_node': original.parent_id,
+                'node': original._primary_key,
+                'registration': fork._primary_key,
+            },
+            date=self.when,
+            node_ids=[fork._primary_key],
+        )
+        fork._count_log(log)
+        self.logs.append(log)
+        return fork
+
+    def after_insert(self):
+        bulk_insert(self.logs)
+
+    def finish(self, original, fork):
+        user = self.auth.user
+        increment_user_activity_counters(user._primary_key, NodeLog.NODE_FORKED, self.when)
+        for addon in original.get_addons():
+            _, message = addon.after_fork(original, fork, user)
+            if message:
+                self.messages.append(message)
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+import copy
 import itertools
 import functools
 import os
 import re
+import time
 import logging
 import pymongo
 import datetime
@@ -27,6 +29,7 @@ from framework import status
 
 
 from framework.mongo import ObjectId
+from framework.mongo import database
 from framework.mongo import StoredObject
 from framework.mongo import validators
 from framework.addons import AddonModelMixin
@@ -41,6 +44,7 @@ from framework.analytics import (
     get_basic_counters, increment_user_activity_counters
 )
 from framework.sentry import log_exception
+from framework.tasks.handlers import mark_dirty
 from framework.transactions.context import TokuTransaction
 from framework.utils import iso8601format
 
@@ -63,6 +67,9 @@ from website.project.licenses import (
     NodeLicenseRecord,
 )
 from website.project import signals as project_signals
+from website.project.permissions import get_permission_resolver, invalidate_permissions
+from website.project.tree import NodeTree
+from website.project.contributors import ContributorIndex
 
 logger = logging.getLogger(__name__)
 
@@ -226,6 +233,32 @@ class Comment(GuidStoredObject):
                                     Q('date_modified', 'gt', view_timestamp)).count()
         return n_unread
 
+    @classmethod
+    def find_unread_counts(cls, user, nodes):
+        """Batched version of `find_unread`: return a dict mapping the `_id` of each of
+        `nodes` to its number of unread comments, using a single aggregation.
+        """
+        default_timestamp = datetime.datetime(1970, 1, 1, 12, 0, 0)
+        counts = dict((node._id, 0) for node in nodes)
+        clauses = []
+        for node in nodes:
+            if node.is_contributor(user):
+                view_timestamp = user.comments_viewed_timestamp.get(node._id, default_timestamp)
+                clauses.append({
+                    'node': node._id,
+                    'date_created': {'$gt': view_timestamp},
+                    'date_modified': {'$gt': view_timestamp},
+                })
+        if not clauses:
+            return counts
+        result = cls._storage[0].store.aggregate([
+            {'$match': {'user': {'$ne': user._id}, '$or': clauses}},
+            {'$group': {'_id': '$node', 'count': {'$sum': 1}}},
+        ])
+        for each in result['result']:
+            counts[each['_id']] = each['count']
+        return counts
+
     @classmethod
     def create(cls, auth, **kwargs):
         comment = cls(**kwargs)
@@ -330,8 +363,21 @@ class Comment(GuidStoredObject):
 @unique_on(['params.node', '_id'])
 class NodeLog(StoredObject):
 
+    __indices__ = [{
+        'unique': False,
+        'key_or_list': [
+            ('node_ids', pymongo.ASCENDING),
+            ('date', pymongo.ASCENDING),
+            ('_id', pymongo.ASCENDING),
+        ]
+    }]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
 
+    # Ids of the nodes this log belongs to: the node it was created on, plus any forks and registrations
+    # made afterwards. Queried through `Node.logs`, so nodes don't have to store their logs themselves
+    node_ids = fields.StringField(list=True)
+
     date = fields.DateTimeField(default=datetime.datetime.utcnow, index=True)
     action = fields.StringField(index=True)
     params = fields.DictionaryField()
@@ -502,6 +548,133 @@ class NodeLog(StoredObject):
         }
 
 
+class NodeLogList(object):
+    """The logs of a node, in chronological order. Behaves like the list that `Node.logs` used to be,
+    but is backed by an indexed query on `NodeLog.node_ids`, so logs are only loaded when they are used.
+
+    Nodes that have not been migrated yet (see scripts/migration/migrate_node_logs.py) still carry the
+    ids of their logs in their own document; those are included until the migration moves them.
+    """
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def pending(self):
+        """Logs added to the node before it was first saved, and so before it had an id."""
+        if not hasattr(self.node, '_pending_logs'):
+            self.node._pending_logs = []
+        return self.node._pending_logs
+
+    @property
+    def legacy_ids(self):
+        return getattr(self.node, '_legacy_log_ids', None) or []
+
+    def _query(self):
+        if not self.node._primary_key:
+            return Q('_id', 'in', [log._id for log in self.pending])
+        query = Q('node_ids', 'eq', self.node._primary_key)
+        if self.legacy_ids:
+            query = query | Q('_id', 'in', self.legacy_ids)
+        return query
+
+    def _raw_query(self):
+        if not self.node._primary_key:
+            return {'_id': {'$in': [log._id for log in self.pending]}}
+        query = {'node_ids': self.node._primary_key}
+        if self.legacy_ids:
+            query = {'$or': [query, {'_id': {'$in': self.legacy_ids}}]}
+        return query
+
+    def find(self, query=None, reverse=False):
+        if query is not None:
+            query = self._query() & query
+        else:
+            query = self._query()
+        if reverse:
+            return NodeLog.find(query).sort('-date', '-_id')
+        return NodeLog.find(query).sort('date', '_id')
+
+    def _to_primary_keys(self):
+        return self.find().get_keys()
+
+    def __iter__(self):
+        return iter(self.find())
+
+    def __reversed__(self):
+        return self.find(reverse=True)
+
+    def __len__(self):
+        return self.find().count()
+
+    def __nonzero__(self):
+        return self.find().limit(1).count() > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is None and (index.start or 0) >= 0 and (index.stop is None or index.stop >= 0):
+                return list(self.find()[index])
+            return list(self)[index]
+        if index < 0:
+            return self.find(reverse=True)[-index - 1]
+        return self.find()[index]
+
+    def __contains__(self, log):
+        return self.find(Q('_id', 'eq', NodeLog._to_primary_key(log))).count() > 0
+
+    def __eq__(self, other):
+        try:
+            return self._to_primary_keys() == [NodeLog._to_primary_key(log) for log in other]
+        except TypeError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<NodeLogList({!r})>'.format(self.node)
+
+    def append(self, log):
+        """Attach a log to the node, saving the log."""
+        if not self.node._primary_key:
+            self.pending.append(log)
+        elif self.node._primary_key not in log.node_ids:
+            log.node_ids.append(self.node._primary_key)
+        log.save()
+
+    def extend(self, logs):
+        """Attach logs to the node. Attaching another node's logs, as forks and registrations do, is a
+        single update however many logs there are.
+        """
+        if not isinstance(logs, NodeLogList):
+            for log in logs:
+                self.append(log)
+            return
+        database['nodelog'].update(
+            logs._raw_query(),
+            {'$addToSet': {'node_ids': self.node._primary_key}},
+            multi=True,
+        )
+        NodeLog._clear_caches()
+
+    def remove(self, log):
+        """Detach a log from the node."""
+        if log._id in self.legacy_ids:
+            self.legacy_ids.remove(log._id)
+            database['node'].update({'_id': self.node._primary_key}, {'$pull': {'logs': log._id}})
+        if self.node._primary_key in log.node_ids:
+            log.node_ids.remove(self.node._primary_key)
+            log.save()
+        self.node.refresh_log_counters()
+
+    def flush_pending(self):
+        """Attach logs that were added before the node had an id. Called once it is first saved."""
+        pending = self.pending
+        self.node._pending_logs = []
+        for log in pending:
+            self.append(log)
+
+
 class Tag(StoredObject):
 
     _id = fields.StringField(primary=True, validate=MaxLengthValidator(128))
@@ -647,6 +820,15 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         'node_license',
     }
 
+    # Changes to these fields can change effective permissions on this node or its descendants
+    PERMISSION_FIELDS = {
+        'permissions',
+        'ancestor_ids',
+        'nodes',
+        'is_deleted',
+        'is_public',
+    }
+
     # Maps category identifier => Human-readable representation for use in
     # titles, menus, etc.
     # Use an OrderedDict so that menu items show in the correct order
@@ -680,6 +862,13 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     date_created = fields.DateTimeField(auto_now_add=datetime.datetime.utcnow, index=True)
 
+    # Denormalized from the node's logs by `add_log`, so ordering nodes by modification date and showing
+    # their activity does not load any logs
+    last_logged = fields.DateTimeField(index=True)
+    log_count = fields.IntegerField(default=0)
+    # {<user id>: <number of the node's logs by that user>}
+    contributor_log_counts = fields.DictionaryField()
+
     # Privacy
     is_public = fields.BooleanField(default=False, index=True)
 
@@ -720,6 +909,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     registered_meta = fields.DictionaryField()
     registration_approval = fields.ForeignField('registrationapproval')
     retraction = fields.ForeignField('retraction')
+    # Denormalized from `is_retracted` so list views can exclude retractions in the query;
+    # kept in sync for a registration and its primary descendants by `Retraction` callbacks
+    retracted = fields.BooleanField(default=False, index=True)
     embargo = fields.ForeignField('embargo')
 
     is_fork = fields.BooleanField(default=False, index=True)
@@ -746,13 +938,15 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     contributors = fields.ForeignField('user', list=True, backref='contributed')
     users_watching_node = fields.ForeignField('user', list=True, backref='watched')
 
-    logs = fields.ForeignField('nodelog', list=True, backref='logged')
     tags = fields.ForeignField('tag', list=True, backref='tagged')
 
     # Tags for internal use
     system_tags = fields.StringField(list=True)
 
     nodes = fields.AbstractForeignField(list=True, backref='parent')
+    # Ids of this node's primary ancestors, from the root down to its parent, so lineage and subtree
+    # lookups are single indexed queries. Rewritten by `save` whenever a node's `nodes` change
+    ancestor_ids = fields.StringField(list=True, index=True)
     forked_from = fields.ForeignField('node', backref='forked', index=True)
     registered_from = fields.ForeignField('node', backref='registrations', index=True)
 
@@ -968,9 +1162,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def is_admin_parent(self, user):
         if self.has_permission(user, 'admin', check_parent=False):
             return True
-        if self.parent_node:
-            return self.parent_node.is_admin_parent(user)
-        return False
+        return get_permission_resolver().inherits_admin(user, self)
 
     def can_view(self, auth):
         if not auth and not self.is_public:
@@ -1038,6 +1230,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             if permission in self.permissions[user._id]:
                 raise ValueError('User already has permission {0}'.format(permission))
             self.permissions[user._id].append(permission)
+        invalidate_permissions()
         if save:
             self.save()
 
@@ -1053,6 +1246,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             self.permissions[user._id].remove(permission)
         except (KeyError, ValueError):
             raise ValueError('User does not have permission {0}'.format(permission))
+        invalidate_permissions()
         if save:
             self.save()
 
@@ -1071,11 +1265,13 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     user._id, self._id,
                 )
             )
+        invalidate_permissions()
         if save:
             self.save()
 
     def set_permissions(self, user, permissions, save=False):
         self.permissions[user._id] = permissions
+        invalidate_permissions()
         if save:
             self.save()
 
@@ -1089,27 +1285,16 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         if user is None:
             logger.warn('User is ``None``.')
             return False
-        if permission in self.permissions.get(user._id, []):
-            return True
-        if permission == 'read' and check_parent:
-            return self.is_admin_parent(user)
-        return False
+        return get_permission_resolver().has_permission(user, self, permission, check_parent=check_parent)
 
     def has_permission_on_children(self, user, permission):
         """Checks if the given user has a given permission on any child nodes
             that are not registrations or deleted
         """
-        if self.has_permission(user, permission):
-            return True
-
-        for node in self.nodes:
-            if not node.primary or node.is_deleted:
-                continue
-
-            if node.has_permission_on_children(user, permission):
-                return True
-
-        return False
+        if user is None:
+            return False
+        permissions = get_permission_resolver().resolve_subtree(user, self)
+        return any(permission in each for each in permissions.itervalues())
 
     def has_addon_on_children(self, addon):
         """Checks if a given node has a specific addon on child nodes
@@ -1117,15 +1302,13 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         """
         if self.has_addon(addon):
             return True
-
-        for node in self.nodes:
-            if not node.primary or node.is_deleted:
-                continue
-
-            if node.has_addon_on_children(addon):
-                return True
-
-        return False
+        return any(
+            node.has_addon(addon)
+            for node in NodeTree(self).descendants(
+                include=lambda n: n.primary and not n.is_deleted,
+                descend=lambda n: not n.is_deleted,
+            )
+        )
 
     def get_permissions(self, user):
         """Get list of permissions for user.
@@ -1141,66 +1324,80 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             if key not in self.contributors:
                 self.permissions.pop(key)
 
+    @property
+    def contributor_index(self):
+        """Set-based lookups of the contributors, rebuilt when they change."""
+        index = getattr(self, '_contributor_index', None)
+        if index is None or not index.is_current():
+            index = self._contributor_index = ContributorIndex(self)
+        return index
+
+    def _reset_contributor_index(self):
+        self._contributor_index = None
+
     @property
     def visible_contributors(self):
-        return [
-            User.load(_id)
-            for _id in self.visible_contributor_ids
-        ]
+        return self.contributor_index.users(self.visible_contributor_ids)
 
     @property
     def parents(self):
-        if self.parent_node:
-            return [self.parent_node] + self.parent_node.parents
-        return []
+        """Ancestors of this node, nearest first, up to the first deleted ancestor."""
+        ancestor_ids = self.ancestor_ids or self.compute_ancestor_ids()
+        if not ancestor_ids:
+            return []
+        ancestors = dict((node._id, node) for node in Node.find(Q('_id', 'in', list(ancestor_ids))))
+        parents = []
+        for ancestor_id in reversed(ancestor_ids):
+            ancestor = ancestors.get(ancestor_id)
+            if ancestor is None or ancestor.is_deleted:
+                break
+            parents.append(ancestor)
+        return parents
 
     @property
     def admin_contributor_ids(self, contributors=None):
-        contributor_ids = self.contributors._to_primary_keys()
+        index = self.contributor_index
         admin_ids = set()
         for parent in self.parents:
-            admins = [
-                user for user, perms in parent.permissions.iteritems()
-                if 'admin' in perms
-            ]
-            admin_ids.update(set(admins).difference(contributor_ids))
+            admin_ids.update(
+                user_id for user_id, perms in parent.permissions.iteritems()
+                if 'admin' in perms and user_id not in index
+            )
         return admin_ids
 
     @property
     def admin_contributors(self):
         return sorted(
-            [User.load(_id) for _id in self.admin_contributor_ids],
+            self.contributor_index.users(self.admin_contributor_ids),
             key=lambda user: user.family_name,
         )
 
     def get_visible(self, user):
         if not self.is_contributor(user):
             raise ValueError(u'User {0} not in contributors'.format(user))
-        return user._id in self.visible_contributor_ids
+        return self.contributor_index.is_visible(user._id)
 
     def update_visible_ids(self, save=False):
         """Update the order of `visible_contributor_ids`. Updating on making
         a contributor visible is more efficient than recomputing order on
         accessing `visible_contributors`.
         """
-        self.visible_contributor_ids = [
-            contributor._id
-            for contributor in self.contributors
-            if contributor._id in self.visible_contributor_ids
-        ]
+        self.visible_contributor_ids = self.contributor_index.ordered_visible_ids(self.visible_contributor_ids)
         if save:
             self.save()
 
     def set_visible(self, user, visible, log=True, auth=None, save=False):
         if not self.is_contributor(user):
             raise ValueError(u'User {0} not in contributors'.format(user))
-        if visible and user._id not in self.visible_contributor_ids:
+        is_visible = self.contributor_index.is_visible(user._id)
+        if visible and not is_visible:
             self.visible_contributor_ids.append(user._id)
             self.update_visible_ids(save=False)
-        elif not visible and user._id in self.visible_contributor_ids:
+        elif not visible and is_visible:
             if len(self.visible_contributor_ids) == 1:
                 raise ValueError('Must have at least one visible contributor')
             self.visible_contributor_ids.remove(user._id)
+            self._reset_contributor_index()
         else:
             return
         message = (
@@ -1364,6 +1561,15 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         saved_fields = super(Node, self).save(*args, **kwargs)
 
+        if first_save:
+            self.logs.flush_pending()
+
+        if 'nodes' in saved_fields and (self.nodes or not first_save):
+            self.update_children_ancestry()
+
+        if self.PERMISSION_FIELDS.intersection(saved_fields):
+            invalidate_permissions()
+
         if first_save and is_original and not suppress_log:
             # TODO: This logic also exists in self.use_as_template()
             for addon in settings.ADDONS_AVAILABLE:
@@ -1399,20 +1605,17 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                 need_update = False
         if self.is_folder or self.archiving:
             need_update = False
+        # Search and analytics updates run once per node at the end of the
+        # request, however many times the node is saved during it
         if need_update:
-            self.update_search()
+            mark_dirty(update_nodes_search, self._id, 'node')
 
         if 'node_license' in saved_fields:
-            children = [c for c in self.get_descendants_recursive(
-                include=lambda n: n.node_license is None
-            )]
-            # this returns generator, that would get unspooled anyways
-            if children:
-                Node.bulk_update_search(children)
+            mark_dirty(update_nodes_search, self._id, 'license')
 
         # This method checks what has changed.
         if settings.PIWIK_HOST and update_piwik:
-            piwik_tasks.update_node(self._id, saved_fields)
+            mark_dirty(update_nodes_analytics, self._id, *saved_fields)
 
         # Return expected value for StoredObject::save
         return saved_fields
@@ -1421,6 +1624,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     # Methods that return a new instance #
     ######################################
 
+    def clone(self):
+        # Copies start outside of any tree; their ancestry is set when they are added to a parent
+        new = super(Node, self).clone()
+        new.ancestor_ids = []
+        return new
+
     def use_as_template(self, auth, changes=None, top_level=True):
         """Create a new project, using an existing project as a template.
 
@@ -1445,6 +1654,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         new.permissions = {}
         new.visible_contributor_ids = []
 
+        # Templated nodes don't share the logs of their template
+        new.last_logged = None
+        new.log_count = 0
+        new.contributor_log_counts = {}
+
         # Clear quasi-foreign fields
         new.wiki_pages_current = {}
         new.wiki_pages_versions = {}
@@ -1634,37 +1848,94 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def depth(self):
         return len(self.parents)
 
+    def find_descendants(self, query=None):
+        """Return a queryset of all primary descendants of this node, at any depth. Subtrees that haven't
+        been backfilled by scripts/consistency/ensure_ancestor_ids.py are found by walking `nodes`.
+        """
+        if self.has_ancestry_index():
+            descendants_query = Q('ancestor_ids', 'eq', self._id)
+        else:
+            descendants_query = Q('_id', 'in', [
+                node._id for node in NodeTree(self).descendants(include=lambda n: n.primary, descend=lambda n: n.primary)
+            ])
+        if query is not None:
+            descendants_query = descendants_query & query
+        return Node.find(descendants_query)
+
+    def has_ancestry_index(self):
+        """Whether this node's primary children have their `ancestor_ids`, i.e. whether its subtree can be
+        queried through them.
+        """
+        return all(child.ancestor_ids for child in self.nodes_primary)
+
+    def find_children(self):
+        """Return a queryset of the nodes whose `ancestor_ids` make them primary children of this node."""
+        depth = len(self.ancestor_ids or self.compute_ancestor_ids()) + 1
+        return Node.find(Q('ancestor_ids', 'eq', self._id) & Q('ancestor_ids', 'size', depth))
+
+    def compute_ancestor_ids(self):
+        """Compute `ancestor_ids` by walking the `parent` backrefs up to the root."""
+        ancestor_ids = []
+        node = self
+        while node.node__parent:
+            node = node.node__parent[0]
+            if node._id in ancestor_ids or node._id == self._id:
+                break
+            ancestor_ids.insert(0, node._id)
+        return ancestor_ids
+
+    def update_ancestry(self, ancestor_ids):
+        """Set this node's `ancestor_ids` and rewrite those of its descendants to match.
+
+        :param list ancestor_ids: Ids of the new ancestors, from the root down to the parent
+        """
+        self.ancestor_ids = ancestor_ids
+        self.save(update_piwik=False)
+        prefix = list(ancestor_ids) + [self._id]
+        for descendant in self.find_descendants():
+            current = descendant.ancestor_ids
+            if self._id in current:
+                descendant.ancestor_ids = prefix + current[current.index(self._id) + 1:]
+            else:
+                # Not backfilled yet
+                descendant.ancestor_ids = descendant.compute_ancestor_ids()
+            descendant.save(update_piwik=False)
+
+    def update_children_ancestry(self):
+        """Bring the ancestry of this node's subtree in line with its current primary children."""
+        expected = list(self.ancestor_ids or self.compute_ancestor_ids()) + [self._id]
+        children = self.nodes_primary
+        for child in children:
+            if child.ancestor_ids != expected:
+                child.update_ancestry(expected)
+        # Nodes that were moved out of this node's `nodes` take the ancestry of wherever they are now
+        child_ids = set(child._id for child in children)
+        for node in self.find_children():
+            if node._id not in child_ids:
+                node.update_ancestry(node.compute_ancestor_ids())
+
     def next_descendants(self, auth, condition=lambda auth, node: True):
         """
         Recursively find the first set of descedants under a given node that meet a given condition
 
         returns a list of [(node, [children]), ...]
         """
-        ret = []
-        for node in self.nodes:
-            if condition(auth, node):
-                # base case
-                ret.append((node, []))
-            else:
-                ret.append((node, node.next_descendants(auth, condition)))
-        ret = [item for item in ret if item[1] or condition(auth, item[0])]  # prune empty branches
-        return ret
+        return NodeTree(self).next_descendants(auth, condition)
 
     def get_descendants_recursive(self, include=lambda n: True):
-        for node in self.nodes:
-            if include(node):
-                yield node
-            if node.primary:
-                for descendant in node.get_descendants_recursive(include):
-                    if include(descendant):
-                        yield descendant
+        """Yield the descendants of this node, including pointers, for which `include` is true. The
+        subtree is loaded with one query per level; see :class:`website.project.tree.NodeTree`.
+        """
+        return NodeTree(self).descendants(include)
 
     def get_aggregate_logs_query(self, auth):
-        ids = [self._id] + [n._id
-                            for n in self.get_descendants_recursive()
-                            if n.can_view(auth)]
-        query = Q('__backrefs.logged.node.logs', 'in', ids) & Q('should_hide', 'ne', True)
-        return query
+        nodes = [self] + list(NodeTree(self).descendants(include=lambda n: n.primary and n.can_view(auth)))
+        query = Q('node_ids', 'in', [n._id for n in nodes])
+        # Include logs still embedded in nodes that have not been migrated
+        legacy_ids = [log_id for n in nodes for log_id in n.logs.legacy_ids]
+        if legacy_ids:
+            query = query | Q('_id', 'in', legacy_ids)
+        return query & Q('should_hide', 'ne', True)
 
     def get_aggregate_logs_queryset(self, auth):
         query = self.get_aggregate_logs_query(auth)
@@ -1683,12 +1954,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         """Recursively checks whether the current node or any of its nodes
         contains a pointer.
         """
-        if self.nodes_pointer:
-            return True
-        for node in self.nodes_primary:
-            if node.has_pointers_recursive:
-                return True
-        return False
+        return NodeTree(self).has_pointers()
 
     @property
     def pointed(self):
@@ -1778,6 +2044,16 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # Return forked content
         return forked
 
+    @property
+    def logs(self):
+        """This node's logs, in chronological order. See :class:`NodeLogList`."""
+        return NodeLogList(self)
+
+    @logs.setter
+    def logs(self, log_ids):
+        # Only set when loading a node whose document still embeds its log ids
+        self._legacy_log_ids = [NodeLog._to_primary_key(log) for log in log_ids or []]
+
     def get_recent_logs(self, n=10):
         """Return a list of the n most recent logs, in reverse chronological
         order.
@@ -1791,11 +2067,94 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         '''The most recent datetime when this node was modified, based on
         the logs.
         '''
+        if self.last_logged:
+            return self.last_logged
+        # Nodes whose log counters have not been backfilled yet
         try:
             return self.logs[-1].date
         except IndexError:
             return self.date_created
 
+    def get_log_count(self, user=None):
+        """Return the number of this node's logs, or the number of them by `user`."""
+        if user is None:
+            return self.log_count or 0
+        return self.contributor_log_counts.get(user._id, 0)
+
+    LOG_COUNTER_FIELDS = ('last_logged', 'log_count', 'contributor_log_counts')
+
+    @classmethod
+    def update_one(cls, which, data=None, storage_data=None, saved=False, inmem=False):
+        if saved and storage_data:
+            # Saved nodes' log counters are only written by `_count_log` and `refresh_log_counters`, so that
+            # saving a stale copy of a node doesn't overwrite counts made since it was loaded
+            storage_data = {
+                key: value for key, value in storage_data.items()
+                if key not in cls.LOG_COUNTER_FIELDS
+            }
+        return super(Node, cls).update_one(
+            which, data=data, storage_data=storage_data, saved=saved, inmem=inmem
+        )
+
+    def _count_log(self, log):
+        """Add `log` to the node's log counters. Saved nodes are updated in place with a single
+        `findAndModify`, so no other pending changes are written.
+        """
+        user_id = log.user._id if log.user else None
+        if not self._is_loaded:
+            self.log_count = (self.log_count or 0) + 1
+            if user_id:
+                self.contributor_log_counts[user_id] = self.contributor_log_counts.get(user_id, 0) + 1
+            if not self.last_logged or log.date > self.last_logged:
+                self.last_logged = log.date
+            return
+        increments = {'log_count': 1}
+        if user_id:
+            increments['contributor_log_counts.{}'.format(user_id)] = 1
+        stored = database['node'].find_and_modify(
+            {'_id': self._id, '$or': [{'last_logged': None}, {'last_logged': {'$lte': log.date}}]},
+            {'$inc': increments, '$set': {'last_logged': log.date}},
+            new=True, fields=list(self.LOG_COUNTER_FIELDS),
+        )
+        if stored is None:
+            # The log is dated before the node's latest log
+            stored = database['node'].find_and_modify(
+                {'_id': self._id}, {'$inc': increments}, new=True, fields=list(self.LOG_COUNTER_FIELDS),
+            )
+        self._set_stored_log_counters(stored)
+
+    def _set_stored_log_counters(self, stored):
+        # Mirror values already written to the database in the cached copy of the record too, so that
+        # saving the node doesn't write them again
+        cached = self._get_cached_data(self._stored_key)
+        for name in self.LOG_COUNTER_FIELDS:
+            value = stored.get(name)
+            setattr(self, name, value)
+            if cached is not None:
+                cached[name] = copy.deepcopy(value)
+
+    def refresh_log_counters(self):
+        """Recompute the node's log counters from its logs and store them. Used when logs are removed and
+        to backfill the counters.
+        """
+        result = database['nodelog'].aggregate([
+            {'$match': self.logs._raw_query()},
+            {'$group': {'_id': '$user', 'count': {'$sum': 1}, 'last': {'$max': '$date'}}},
+        ])['result']
+        counters = {
+            'log_count': sum(group['count'] for group in result),
+            'contributor_log_counts': dict(
+                (group['_id'], group['count']) for group in result if group['_id']
+            ),
+            'last_logged': max([group['last'] for group in result if group['last']] or [None]),
+        }
+        if self._is_loaded:
+            database['node'].update({'_id': self._id}, {'$set': counters})
+            self._set_stored_log_counters(counters)
+        else:
+            for name, value in counters.items():
+                setattr(self, name, value)
+
     def set_title(self, title, auth, save=False):
         """Set the title of this Node and log it.
 
@@ -1955,88 +2314,18 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         return True
 
     def fork_node(self, auth, title='Fork of '):
-        """Recursively fork a node.
+        """Fork a node and its components. See `website.project.forks.ForkPlan`.
 
         :param Auth auth: Consolidated authorization
         :param str title: Optional text to prepend to forked title
         :return: Forked node
         """
-        user = auth.user
-
-        # Non-contributors can't fork private nodes
-        if not (self.is_public or self.has_permission(user, 'read')):
-            raise PermissionsError('{0!r} does not have permission to fork node {1!r}'.format(user, self._id))
-
-        when = datetime.datetime.utcnow()
-
-        original = self.load(self._primary_key)
-
-        if original.is_deleted:
-            raise NodeStateError('Cannot fork deleted node.')
-
-        # Note: Cloning a node copies its `wiki_pages_current` and
-        # `wiki_pages_versions` fields, but does not clone the underlying
-        # database objects to which these dictionaries refer. This means that
-        # the cloned node must pass itself to its wiki objects to build the
-        # correct URLs to that content.
-        forked = original.clone()
-
-        forked.logs = self.logs
-        forked.tags = self.tags
-
-        # Recursively fork child nodes
-        for node_contained in original.nodes:
-            if not node_contained.is_deleted:
-                forked_node = None
-                try:  # Catch the potential PermissionsError above
-                    forked_node = node_contained.fork_node(auth=auth, title='')
-                except PermissionsError:
-                    pass  # If this exception is thrown omit the node from the result set
-                if forked_node is not None:
-                    forked.nodes.append(forked_node)
-
-        forked.title = title + forked.title
-        forked.is_fork = True
-        forked.is_registration = False
-        forked.forked_date = when
-        forked.forked_from = original
-        forked.creator = user
-        forked.piwik_site_id = None
-        forked.node_license = original.license.copy() if original.license else None
-
-        # Forks default to private status
-        forked.is_public = False
-
-        # Clear permissions before adding users
-        forked.permissions = {}
-        forked.visible_contributor_ids = []
-
-        forked.add_contributor(
-            contributor=user,
-            permissions=CREATOR_PERMISSIONS,
-            log=False,
-            save=False
-        )
-
-        forked.add_log(
-            action=NodeLog.NODE_FORKED,
-            params={
-                'parent_node': original.parent_id,
-                'node': original._primary_key,
-                'registration': forked._primary_key,
-            },
-            auth=auth,
-            log_date=when,
-            save=False,
-        )
-
-        forked.save()
-        # After fork callback
-        for addon in original.get_addons():
-            _, message = addon.after_fork(original, forked, user)
-            if message:
-                status.push_status_message(message, kind='info', trust=True)
-
+        # Avoid circular imports
+        from website.project.forks import ForkPlan
+        plan = ForkPlan(self.load(self._primary_key), auth, title=title)
+        forked = plan.run()
+        for message in plan.messages:
+            status.push_status_message(message, kind='info', trust=True)
         return forked
 
     def register_node(self, schema, auth, data, parent=None):
@@ -2048,6 +2337,16 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         :param data: Form data
         :param parent Node: parent registration of registration to be created
         """
+        if parent is None and settings.BULK_REGISTRATIONS:
+            # Avoid circular imports
+            from website.project.registrations import RegistrationPlan
+            plan = RegistrationPlan(self.load(self._primary_key), auth, schema, data)
+            registered = plan.run()
+            for message in plan.messages:
+                status.push_status_message(message, kind='info', trust=False)
+            return registered
+
+        start = time.time()
         # TODO(lyndsysimon): "template" param is not necessary - use schema.name?
         # NOTE: Admins can register child nodes even if they don't have write access them
         if not self.can_edit(auth=auth) and not self.is_admin_parent(user=auth.user):
@@ -2084,12 +2383,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         registered.contributors = self.contributors
         registered.forked_from = self.forked_from
         registered.creator = self.creator
-        registered.logs = self.logs
         registered.tags = self.tags
         registered.piwik_site_id = None
         registered.node_license = original.license.copy() if original.license else None
 
         registered.save()
+        registered.logs.extend(self.logs)
         registered.is_public = False
         for node in registered.get_descendants_recursive():
             node.is_public = False
@@ -2120,6 +2419,10 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         if settings.ENABLE_ARCHIVER:
             project_signals.after_create_registration.send(self, dst=registered, user=auth.user)
 
+        if parent is None:
+            logger.info('Registered {0} as {1} recursively in {2:.3f}s'.format(
+                self._id, registered._id, time.time() - start
+            ))
         return registered
 
     def remove_tag(self, tag, auth, save=True):
@@ -2170,8 +2473,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
         if log_date:
             log.date = log_date
-        log.save()
         self.logs.append(log)
+        self._count_log(log)
         if save:
             self.save()
         if user:
@@ -2303,10 +2606,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     @property
     def root(self):
-        if self.parent_node:
-            return self.parent_node.root
-        else:
-            return self
+        parents = self.parents
+        return parents[-1] if parents else self
 
     @property
     def archiving(self):
@@ -2345,7 +2646,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         return (
             user is not None
             and (
-                user._id in self.contributors
+                user._id in self.contributor_index
             )
         )
 
@@ -2432,6 +2733,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         for i, contrib in enumerate(self.contributors):
             if contrib._primary_key == old._primary_key:
                 self.contributors[i] = new
+                self._reset_contributor_index()
                 # Remove unclaimed record for the project
                 if self._primary_key in old.unclaimed_records:
                     del old.unclaimed_records[self._primary_key]
@@ -2455,10 +2757,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             del contributor.unclaimed_records[self._primary_key]
 
         self.contributors.remove(contributor._id)
+        self._reset_contributor_index()
 
         self.clear_permission(contributor)
         if contributor._id in self.visible_contributor_ids:
             self.visible_contributor_ids.remove(contributor._id)
+            self._reset_contributor_index()
 
         if not self.visible_contributor_ids:
             return False
@@ -2466,7 +2770,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # Node must have at least one registered admin user
         # TODO: Move to validator or helper
         admins = [
-            user for user in self.contributors
+            user for user in self.contributor_index.users()
             if self.has_permission(user, 'admin')
             and user.is_registered
         ]
@@ -2475,6 +2779,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         # Clear permissions for removed user
         self.permissions.pop(contributor._id, None)
+        invalidate_permissions()
 
         # After remove callback
         for addon in self.get_addons():
@@ -2596,11 +2901,14 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             visibility_removed = []
             to_retain = []
             to_remove = []
+            index = self.contributor_index
+            # Load the users listed and the current contributors together
+            index.users([user_dict['id'] for user_dict in user_dicts] + index.ids)
             for user_dict in user_dicts:
                 user = User.load(user_dict['id'])
                 if user is None:
                     raise ValueError('User not found')
-                if user not in self.contributors:
+                if user._id not in index:
                     raise ValueError(
                         'User {0} not in contributors'.format(user.fullname)
                     )
@@ -2623,8 +2931,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                                  visible=False,
                                  auth=auth)
 
-            for user in self.contributors:
-                if user._id in user_ids:
+            retained_ids = set(user_ids)
+            for user in index.users():
+                if user._id in retained_ids:
                     to_retain.append(user)
                 else:
                     to_remove.append(user)
@@ -2696,9 +3005,10 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         # If user is merged into another account, use master account
         contrib_to_add = contributor.merged_by if contributor.is_merged else contributor
-        if contrib_to_add not in self.contributors:
+        if not self.is_contributor(contrib_to_add):
 
             self.contributors.append(contrib_to_add)
+            self._reset_contributor_index()
             if visible:
                 self.set_visible(contrib_to_add, visible=True, log=False)
 
@@ -2735,7 +3045,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             return True
 
         # Permissions must be overridden if changed when contributor is added to parent he/she is already on a child of.
-        elif contrib_to_add in self.contributors and permissions is not None:
+        elif permissions is not None:
             self.set_permissions(contrib_to_add, permissions)
             if save:
                 self.save()
@@ -2839,6 +3149,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                 self.is_public = False
         else:
             return False
+        invalidate_permissions()
 
         # After set permissions callback
         for addon in self.get_addons():
@@ -3204,6 +3515,41 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
 
 
+def update_nodes_search(dirty):
+    """Reindex nodes saved during a request.
+
+    :param dict dirty: Maps node ids to why the nodes need reindexing:
+        'node' if their own indexed fields changed, 'license' if their
+        license did, which components without a license of their own inherit
+    """
+    updated = set()
+    for node_id, reasons in dirty.iteritems():
+        if 'node' in reasons:
+            Node.load(node_id).update_search()
+            updated.add(node_id)
+    children = []
+    for node_id, reasons in dirty.iteritems():
+        if 'license' in reasons:
+            # Descendants that inherit their license from this node
+            for child in NodeTree(Node.load(node_id)).descendants(
+                    include=lambda n: n.primary and n.node_license is None,
+                    descend=lambda n: n.node_license is None):
+                if child._id not in updated:
+                    updated.add(child._id)
+                    children.append(child)
+    if children:
+        Node.bulk_update_search(children)
+
+
+def update_nodes_analytics(dirty):
+    """Update the analytics sites of nodes saved during a request.
+
+    :param dict dirty: Maps node ids to the fields saved on the nodes
+    """
+    for node_id, saved_fields in dirty.iteritems():
+        piwik_tasks.update_node(node_id, sorted(saved_fields))
+
+
 @Node.subscribe('before_save')
 def validate_permissions(schema, instance):
     """Ensure that user IDs in `contributors` and `permissions` match.
@@ -3845,6 +4191,10 @@ class Retraction(EmailApprovableSanction):
             auth=Auth(user),
             save=True,
         )
+        for node in parent_registration.node_and_primary_descendants():
+            if node.retracted:
+                node.retracted = False
+                node.save()
 
     def _on_complete(self, user):
         parent_registration = Node.find_one(Q('retraction', 'eq', self))
@@ -3871,7 +4221,10 @@ class Retraction(EmailApprovableSanction):
         # Ensure retracted registration is public
         auth = Auth(self.initiated_by)
         for node in parent_registration.node_and_primary_descendants():
-            node.set_privacy('public', auth=auth, save=True)
+            node.retracted = True
+            if not node.set_privacy('public', auth=auth, save=True):
+                # Already public, so set_privacy did not save
+                node.save()
             node.update_search()
 
     def approve_retraction(self, user, token):
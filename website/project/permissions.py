@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Resolution of effective node permissions.
+
+A user's effective permissions on a node are the permissions granted on the node itself, plus read access
+if the user is an admin on any of the node's (non-deleted) ancestors. The inherited part is resolved for a
+node's whole lineage, or a whole subtree, at once and cached for the rest of the request. It isn't cached
+across requests, since other processes' changes to permissions could not invalidate it.
+"""
+from framework.mongo import dummy_request, get_cache_key
+
+from website.project.tree import NodeTree
+from website.util.permissions import ADMIN, READ
+
+# Bumped whenever permissions or the node tree change; resolvers from earlier generations are discarded
+_generation = 0
+
+
+def invalidate_permissions():
+    """Discard the permissions resolved for the current request. Called whenever a node's permissions,
+    privacy or position in the tree change.
+    """
+    global _generation
+    _generation += 1
+
+
+class PermissionResolver(object):
+    """Resolves effective permissions, memoizing whether a user inherits admin rights on each node."""
+
+    def __init__(self):
+        self.generation = _generation
+        # (user id, node id) => whether the user is an admin on an ancestor of the node
+        self.inherited_admin = {}
+
+    def inherits_admin(self, user, node):
+        """Whether `user` is an admin on any ancestor of `node`."""
+        key = (user._id, node._id)
+        if key not in self.inherited_admin:
+            self.resolve_lineage(user, node)
+        return self.inherited_admin[key]
+
+    def resolve_lineage(self, user, node):
+        """Resolve inherited admin rights for `node` and each of its ancestors, loading the lineage once."""
+        inherited = False
+        for ancestor in reversed(node.parents):
+            self._set((user._id, ancestor._id), inherited, overwrite=False)
+            inherited = inherited or ADMIN in ancestor.permissions.get(user._id, [])
+        self._set((user._id, node._id), inherited)
+
+    def resolve_subtree(self, user, root):
+        """Resolve `user`'s effective permissions on `root` and on every non-deleted primary descendant
+        that is not under a deleted component, loading the subtree with a single query.
+
+        :return dict: node id => list of permissions
+        """
+        self.inherits_admin(user, root)
+        by_id = {root._id: root}
+        for node, parent_id in self._walk_subtree(root):
+            parent = by_id.get(parent_id)
+            if parent is None or node.is_deleted:
+                continue
+            self._set(
+                (user._id, node._id),
+                self.inherited_admin[(user._id, parent._id)] or ADMIN in parent.permissions.get(user._id, [])
+            )
+            by_id[node._id] = node
+        return dict((node_id, self.get_permissions(user, node)) for node_id, node in by_id.iteritems())
+
+    def _walk_subtree(self, root):
+        """Yield `(node, parent id)` for each primary descendant of `root`, parents first. Subtrees whose
+        `ancestor_ids` haven't been backfilled are walked through `nodes`.
+        """
+        if root.has_ancestry_index():
+            for node in sorted(root.find_descendants(), key=lambda node: len(node.ancestor_ids)):
+                yield node, node.ancestor_ids[-1]
+            return
+        tree = NodeTree(root)
+        level = [root]
+        while level:
+            next_level = []
+            for parent in level:
+                for child in tree.get_children(parent):
+                    if child.primary:
+                        yield child, parent._id
+                        next_level.append(child)
+            level = next_level
+
+    def get_permissions(self, user, node):
+        """Return the list of `user`'s effective permissions on `node`."""
+        permissions = list(node.permissions.get(user._id, []))
+        if READ not in permissions and self.inherits_admin(user, node):
+            permissions.append(READ)
+        return permissions
+
+    def has_permission(self, user, node, permission, check_parent=True):
+        if user is None:
+            return False
+        if permission in node.permissions.get(user._id, []):
+            return True
+        if permission == READ and check_parent:
+            return self.inherits_admin(user, node)
+        return False
+
+    def _set(self, key, inherited, overwrite=True):
+        if not overwrite and key in self.inherited_admin:
+            return
+        self.inherited_admin[key] = inherited
+
+
+def get_permission_resolver():
+    """Return the permission resolver for the current request, creating a new one if permissions have
+    changed since it was created. Outside of a request, e.g. in celery tasks and scripts, changes made by
+    other processes would go unseen by a resolver kept for the life of the process, so each call gets a
+    new one.
+    """
+    request = get_cache_key()
+    if request is dummy_request:
+        return PermissionResolver()
+    resolver = getattr(request, '_permission_resolver', None)
+    if resolver is None or resolver.generation != _generation:
+        resolver = PermissionResolver()
+        request._permission_resolver = resolver
+    return resolver
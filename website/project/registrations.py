@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Registration of node trees. See `website.project.snapshots`."""
+import datetime
+
+from framework.exceptions import PermissionsError
+
+from website import settings
+from website.exceptions import NodeStateError
+from website.project import signals as project_signals
+from website.project.snapshots import TreeSnapshot
+
+
+class RegistrationPlan(TreeSnapshot):
+    """Registers `node` and every non-deleted component under it, then starts a single archive of the
+    registered tree.
+
+    :param MetaSchema schema: The registration schema
+    :param dict data: The registration metadata
+    """
+
+    action = 'Registered'
+
+    def __init__(self, node, auth, schema, data, progress=None):
+        super(RegistrationPlan, self).__init__(node, auth, progress=progress)
+        self.schema = schema
+        self.data = data
+        self.when = datetime.datetime.utcnow()
+
+    def _check_node(self, node):
+        # NOTE: Admins can register child nodes even if they don't have write access them
+        if not node.can_edit(auth=self.auth) and not node.is_admin_parent(user=self.auth.user):
+            raise PermissionsError(
+                'User {} does not have permission '
+                'to register this node'.format(self.auth.user._id)
+            )
+        if node.is_folder:
+            raise NodeStateError("Folders may not be registered")
+
+    def check(self):
+        self._check_node(self.original)
+        if self.original.is_deleted:
+            raise NodeStateError('Cannot register deleted node.')
+
+    def include(self, node):
+        if node.is_deleted:
+            return False
+        self._check_node(node)
+        return True
+
+    def copy_node(self, original, registration_id, parent_registration):
+        # Note: Cloning a node copies its `wiki_pages_current` and
+        # `wiki_pages_versions` fields, but does not clone the underlying
+        # database objects to which these dictionaries refer. This means that
+        # the cloned node must pass itself to its wiki objects to build the
+        # correct URLs to that content.
+        registered = original.clone()
+        registered._id = registration_id
+        if parent_registration is not None:
+            registered.ancestor_ids = list(parent_registration.ancestor_ids) + [parent_registration._id]
+
+        registered.is_registration = True
+        registered.registered_date = self.when
+        registered.registered_user = self.auth.user
+        registered.registered_schema.append(self.schema)
+        registered.registered_from = original
+        if not registered.registered_meta:
+            registered.registered_meta = {}
+        registered.registered_meta[self.schema._id] = self.data
+
+        registered.contributors = original.contributors
+        registered.forked_from = original.forked_from
+        registered.creator = original.creator
+        registered.tags = original.tags
+        registered.piwik_site_id = None
+        registered.node_license = original.license.copy() if original.license else None
+        registered.is_public = False
+        return registered
+
+    def finish(self, original, registered):
+        for addon in original.get_addons():
+            _, message = addon.after_register(original, registered, self.auth.user)
+            if message:
+                self.messages.append(message)
+
+    def after_finish(self):
+        if settings.ENABLE_ARCHIVER:
+            # Sent once for the whole tree, which is archived as a single job
+            project_signals.after_create_registration.send(
+                self.original, dst=self.copies[0][1], user=self.auth.user
+            )
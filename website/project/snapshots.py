@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Bulk copies of node trees.
+
+Forks and registrations copy a node and its components. Copying them recursively saves every copy and its
+GUID one at a time, and saves each contributor, tag and original node once per copy to record
+back-references. A :class:`TreeSnapshot` builds the copies of the whole tree in memory instead, writes them
+with a fixed number of bulk inserts, and hands search and analytics updates for the new nodes to a single
+deferred task.
+"""
+import time
+import logging
+import contextlib
+from collections import OrderedDict
+
+from framework.guid.model import Guid
+from framework.mongo import bulk_insert
+
+from website.project.permissions import invalidate_permissions
+from website.project.tree import NodeTree
+
+logger = logging.getLogger(__name__)
+
+
+class TreeSnapshot(object):
+    """Copies a node and a selection of its components. Pointers are cloned, but not the nodes they point
+    to. Subclasses choose the components to copy and set up each copy.
+
+    :param Node node: The node to copy
+    :param Auth auth: The user copying the node
+    :param callable progress: Called as `progress(stage, done, total)` as nodes are copied
+    """
+
+    #: What the snapshot does, for logging
+    action = 'Copied'
+
+    def __init__(self, node, auth, progress=None):
+        self.original = node
+        self.auth = auth
+        self.progress = progress or (lambda stage, done, total: None)
+        # (original, copy) pairs, parents before their components
+        self.copies = []
+        # Status messages from addon callbacks
+        self.messages = []
+        # stage => seconds spent in it
+        self.timings = OrderedDict()
+
+    def check(self):
+        """Raise if the original node can't be copied."""
+        pass
+
+    def include(self, node):
+        """Whether to copy the component `node`, and its subtree."""
+        return not node.is_deleted
+
+    def copy_node(self, original, copy_id, parent_copy):
+        """Return an unsaved copy of `original`, with id `copy_id`.
+
+        :param Node parent_copy: The copy of the original's parent, or None for the root
+        """
+        raise NotImplementedError
+
+    def after_insert(self):
+        """Called once the copies are inserted, to write any other records in bulk."""
+        pass
+
+    def finish(self, original, copy):
+        """Called for each copy, once all of them are saved."""
+        pass
+
+    def after_finish(self):
+        pass
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0) + time.time() - start
+
+    def run(self):
+        """Copy the tree.
+
+        :return Node: The copy of the original node
+        """
+        self.check()
+        with self.timed('load'):
+            tree = NodeTree(self.original)
+            originals = [self.original] + list(tree.descendants(
+                include=lambda n: n.primary and self.include(n),
+                descend=self.include,
+            ))
+        total = len(originals)
+
+        with self.timed('build'):
+            guids = Guid.generate_many(total, self.original._name)
+            copy_ids = dict((node._id, guid._id) for node, guid in zip(originals, guids))
+            parents = {}
+            for done, original in enumerate(originals, 1):
+                copy = self.copy_node(original, copy_ids[original._id], parents.get(original._id))
+                for child in tree.get_children(original):
+                    if child.primary:
+                        if child._id in copy_ids:
+                            copy.nodes.append((copy_ids[child._id], child._name))
+                            parents[child._id] = copy
+                    elif not child.is_deleted:
+                        pointer = child._clone()
+                        if pointer is not None:
+                            copy.nodes.append(pointer)
+                self.copies.append((original, copy))
+                self.progress('building', done, total)
+
+        with self.timed('insert'):
+            bulk_insert([copy for _, copy in self.copies])
+            self.after_insert()
+            invalidate_permissions()
+        self.progress('saved', total, total)
+
+        with self.timed('finish'):
+            for done, (original, copy) in enumerate(self.copies, 1):
+                # The copy shares the history of the original
+                copy.logs.extend(original.logs)
+                self.finish(original, copy)
+                self.progress('finishing', done, total)
+            self.after_finish()
+
+        # Avoid circular imports
+        from website.project import tasks as project_tasks
+        project_tasks.on_nodes_created([copy._id for _, copy in self.copies])
+
+        logger.info('{0} {1} as {2}: {3} nodes in {4:.3f}s ({5})'.format(
+            self.action, self.original._id, self.copies[0][1]._id, total, sum(self.timings.values()),
+            ', '.join('{0} {1:.3f}s'.format(stage, seconds) for stage, seconds in self.timings.iteritems()),
+        ))
+        return self.copies[0][1]
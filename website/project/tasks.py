@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Background tasks for nodes created in bulk."""
+import logging
+
+from modularodm import Q
+
+from framework.analytics import piwik
+from framework.auth import Auth, User
+from framework.tasks import app
+from framework.tasks.handlers import queued_task
+from framework.transactions.context import TokuTransaction, transaction
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+
+@queued_task
+@app.task
+def on_nodes_created(node_ids):
+    """Index and provision analytics for nodes that were inserted in bulk, such as the nodes of a forked
+    tree, with one task for the batch rather than one per node. Each node's analytics site is provisioned
+    in a transaction of its own, so that one failure doesn't undo the others; nodes that fail are retried
+    by `provision_node` on their own.
+    """
+    from website.project.model import Node
+    nodes = list(Node.find(Q('_id', 'in', node_ids)))
+
+    searchable = [node for node in nodes if node.is_public and not node.is_folder and not node.archiving]
+    if searchable:
+        Node.bulk_update_search(searchable)
+
+    if not settings.PIWIK_HOST:
+        return
+    for node in nodes:
+        try:
+            with TokuTransaction():
+                piwik._update_node_object(node)
+        except Exception as error:
+            logger.exception(error)
+            if settings.USE_CELERY:
+                provision_node.apply_async(args=(node._id, ), countdown=provision_node.default_retry_delay)
+
+
+@app.task(bind=True, max_retries=5, default_retry_delay=60)
+@transaction()
+def provision_node(self, node_id):
+    """Provision the analytics site of a node that `on_nodes_created` failed to provision."""
+    from website.project.model import Node
+    node = Node.load(node_id)
+    if node is None:
+        return
+    try:
+        piwik._update_node_object(node)
+    except Exception as error:
+        raise self.retry(exc=error)
+
+
+@app.task(bind=True)
+@transaction()
+def fork_node(self, node_id, user_id, title='Fork of '):
+    """Fork a node outside of the request, reporting progress through the task's state, as
+    `{'stage': ..., 'done': ..., 'total': ...}` under the `PROGRESS` state.
+
+    :return str: The id of the fork
+    """
+    from website.project.forks import ForkPlan
+    from website.project.model import Node
+
+    def progress(stage, done, total):
+        self.update_state(state='PROGRESS', meta={'stage': stage, 'done': done, 'total': total})
+
+    plan = ForkPlan(Node.load(node_id), Auth(User.load(user_id)), title=title, progress=progress)
+    fork = plan.run()
+    for message in plan.messages:
+        logger.info(message)
+    return fork._id
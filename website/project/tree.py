@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""In-memory node trees.
+
+Walking a project's components through `Node.nodes` loads each child with its own query. A
+:class:`NodeTree` loads the whole subtree breadth first instead, with one `$in` query per level
+(plus one for the targets of that level's pointers), and then answers traversal questions from memory.
+"""
+from framework.mongo import prefetch
+
+
+class NodeTree(object):
+    """The subtree under `root`: its primary descendants, at any depth, and the pointers they contain.
+
+    Pointers are leaves; the nodes they point to are loaded, but not their children. Each node is
+    visited once, even if the tree is malformed and lists it under more than one parent.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        # node id => children of the node (nodes and pointers), in order
+        self.children = {}
+        self._load()
+
+    def _load(self):
+        seen = {self.root._id}
+        level = [self.root]
+        while level:
+            # Loads the level's children, and the nodes that any pointers among them point to
+            prefetch(level, 'nodes.node')
+            next_level = []
+            for node in level:
+                children = []
+                for child in node.nodes:
+                    if child is None or child._id in seen:
+                        continue
+                    seen.add(child._id)
+                    children.append(child)
+                    if child.primary:
+                        next_level.append(child)
+                self.children[node._id] = children
+            level = next_level
+
+    def get_children(self, node=None):
+        """Children of `node` (default: the root), nodes and pointers."""
+        return self.children.get((node or self.root)._id, [])
+
+    def walk(self, include=lambda n: True, descend=lambda n: True, node=None):
+        """Yield `(descendant, depth)` pairs in depth-first order, starting with the children of `node`
+        (default: the root) at depth 0.
+
+        :param include: Whether to yield a descendant
+        :param descend: Whether to walk the children of a primary descendant
+        """
+        stack = [(child, 0) for child in reversed(self.get_children(node))]
+        while stack:
+            child, depth = stack.pop()
+            if include(child):
+                yield child, depth
+            if child.primary and descend(child):
+                stack.extend((grandchild, depth + 1) for grandchild in reversed(self.get_children(child)))
+
+    def descendants(self, include=lambda n: True, descend=lambda n: True):
+        """Yield the descendants of the root in depth-first order. See :meth:`walk`."""
+        for node, _ in self.walk(include, descend):
+            yield node
+
+    def next_descendants(self, auth, condition=lambda auth, node: True, node=None):
+        """Find the first descendants along each branch that meet `condition`.
+
+        :return: A list of `(node, [(child, [...]), ...])` pairs. Branches without any node that meets
+            `condition` are pruned
+        """
+        ret = []
+        for child in self.get_children(node):
+            if condition(auth, child):
+                ret.append((child, []))
+            else:
+                found = self.next_descendants(auth, condition, child) if child.primary else []
+                if found:
+                    ret.append((child, found))
+        return ret
+
+    def has_pointers(self):
+        """Whether the root or any of its primary descendants contains a pointer."""
+        return any(not child.primary for children in self.children.itervalues() for child in children)
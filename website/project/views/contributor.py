@@ -41,10 +41,11 @@ def get_node_contributors_abbrev(auth, node, **kwargs):
     formatter = 'surname'
     max_count = kwargs.get('max_count', 3)
     if 'user_ids' in kwargs:
-        users = [
-            User.load(user_id) for user_id in kwargs['user_ids']
-            if user_id in node.visible_contributor_ids
-        ]
+        index = node.contributor_index
+        users = index.users(
+            user_id for user_id in kwargs['user_ids']
+            if index.is_visible(user_id)
+        )
     else:
         users = node.visible_contributors
 
@@ -102,8 +103,9 @@ def get_contributors(auth, node, **kwargs):
     # Limit is either an int or None:
     # if int, contribs list is sliced to specified length
     # if None, contribs list is not sliced
+    visible_ids = node.visible_contributor_ids
     contribs = profile_utils.serialize_contributors(
-        node.visible_contributors[0:limit],
+        node.contributor_index.users(visible_ids[0:limit]),
         node=node,
     )
 
@@ -111,7 +113,7 @@ def get_contributors(auth, node, **kwargs):
     if limit:
         return {
             'contributors': contribs,
-            'more': max(0, len(node.visible_contributors) - limit)
+            'more': max(0, len(visible_ids) - limit)
         }
     else:
         return {'contributors': contribs}
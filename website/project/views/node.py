@@ -36,6 +36,7 @@ from website.util.rubeus import collect_addon_js
 from website.project.model import has_anonymous_link, get_pointer_parent, NodeUpdateError, validate_title
 from website.project.forms import NewNodeForm
 from website.project.metadata.utils import serialize_meta_schemas
+from website.project.tree import NodeTree
 from website.models import Node, Pointer, WatchConfig, PrivateLink
 from website import settings
 from website.views import _render_nodes, find_dashboard, validate_page_num
@@ -735,7 +736,7 @@ def _view_project(node, auth, primary=False):
             'is_public': node.is_public,
             'is_archiving': node.archiving,
             'date_created': iso8601format(node.date_created),
-            'date_modified': iso8601format(node.logs[-1].date) if node.logs else '',
+            'date_modified': iso8601format(node.date_modified) if node.last_logged or node.logs else '',
             'tags': [tag._primary_key for tag in node.tags],
             'children': bool(node.nodes_active),
             'is_registration': node.is_registration,
@@ -827,20 +828,19 @@ def _get_badge(user):
 
 def _get_children(node, auth, indent=0):
 
-    children = []
+    def is_editable(child):
+        return child.primary and not child.is_deleted and child.has_permission(auth.user, ADMIN)
 
-    for child in node.nodes_primary:
-        if not child.is_deleted and child.has_permission(auth.user, ADMIN):
-            children.append({
-                'id': child._primary_key,
-                'title': child.title,
-                'indent': indent,
-                'is_public': child.is_public,
-                'parent_id': child.parent_id,
-            })
-            children.extend(_get_children(child, auth, indent + 1))
-
-    return children
+    return [
+        {
+            'id': child._primary_key,
+            'title': child.title,
+            'indent': indent + depth,
+            'is_public': child.is_public,
+            'parent_id': child.parent_id,
+        }
+        for child, depth in NodeTree(node).walk(include=is_editable, descend=is_editable)
+    ]
 
 
 @must_be_valid_project
@@ -871,15 +871,10 @@ def get_editable_children(auth, node, **kwargs):
 def _get_user_activity(node, auth, rescale_ratio):
 
     # Counters
-    total_count = len(node.logs)
-
-    # Note: It's typically much faster to find logs of a given node
-    # attached to a given user using node.logs.find(...) than by
-    # loading the logs into Python and checking each one. However,
-    # using deep caching might be even faster down the road.
+    total_count = node.get_log_count()
 
     if auth.user:
-        ua_count = node.logs.find(Q('user', 'eq', auth.user)).count()
+        ua_count = node.get_log_count(auth.user)
     else:
         ua_count = 0
 
@@ -900,7 +895,7 @@ def _get_user_activity(node, auth, rescale_ratio):
 
 @must_be_valid_project
 def get_recent_logs(node, **kwargs):
-    logs = list(reversed(node.logs._to_primary_keys()))[:3]
+    logs = [log._id for log in node.get_recent_logs(3)]
     return {'logs': logs}
 
 
@@ -952,7 +947,7 @@ def _get_summary(node, auth, rescale_ratio, primary=True, link_id=None, show_pat
         if rescale_ratio:
             ua_count, ua, non_ua = _get_user_activity(node, auth, rescale_ratio)
             summary.update({
-                'nlogs': len(node.logs),
+                'nlogs': node.get_log_count(),
                 'ua_count': ua_count,
                 'ua': ua,
                 'non_ua': non_ua,
@@ -1156,7 +1151,7 @@ def _serialize_node_search(node):
         'id': node._id,
         'title': title,
         'firstAuthor': first_author.family_name or first_author.given_name or first_author.full_name,
-        'etal': len(node.visible_contributors) > 1,
+        'etal': len(node.visible_contributor_ids) > 1,
     }
 
 
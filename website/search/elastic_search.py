@@ -5,9 +5,13 @@ from __future__ import division
 import re
 import copy
 import math
+import time
 import logging
+import datetime
+import contextlib
 import unicodedata
 import functools
+import collections
 
 import six
 
@@ -28,6 +32,7 @@ from website import settings
 from website.filters import gravatar
 from website.models import User, Node
 from website.search import exceptions
+from website.search.model import IndexedDocument, PendingSearchUpdate, WikiSearchText, hash_document
 from website.search.util import build_query
 from website.util import sanitize
 from website.views import validate_page_num
@@ -54,11 +59,19 @@ ENGLISH_ANALYZER_PROPERTY = {'type': 'string', 'analyzer': 'english'}
 
 INDEX = settings.ELASTIC_INDEX
 
-try:
-    es = Elasticsearch(
+
+def create_client():
+    """A client for `settings.ELASTIC_URI`. Processes forked from one that already has a client, e.g. by
+    `website.search_migration.migrate`, need their own, since connections must not be shared.
+    """
+    return Elasticsearch(
         settings.ELASTIC_URI,
         request_timeout=settings.ELASTIC_TIMEOUT
     )
+
+
+try:
+    es = create_client()
     logging.getLogger('elasticsearch').setLevel(logging.WARN)
     logging.getLogger('elasticsearch.trace').setLevel(logging.WARN)
     logging.getLogger('urllib3').setLevel(logging.WARN)
@@ -72,6 +85,143 @@ except ConnectionError as e:
     es = None
 
 
+# Counters of the documents sent by `BulkIndexer`s in this process, see `get_indexing_stats`
+INDEXING_STATS = collections.Counter()
+
+
+class BulkIndexer(object):
+    """Buffers index, update and delete actions, and sends them with `helpers.bulk` in chunks of
+    `settings.ELASTIC_BULK_SIZE`. Documents become searchable on the index's next refresh rather than
+    being refreshed one by one, unless `settings.ELASTIC_REFRESH_ON_WRITE` is set.
+
+    Unless `settings.ELASTIC_SKIP_UNCHANGED` is off, documents identical to the last ones sent for the same
+    records, as recorded by `IndexedDocument`, are not sent again.
+
+    Deleting a missing document is not an error. Other failed actions are counted and logged, and raise
+    `helpers.BulkIndexError` once the whole buffer has been sent.
+    """
+
+    def __init__(self, index=None, chunk_size=None):
+        self.index_name = index or INDEX
+        self.chunk_size = chunk_size or settings.ELASTIC_BULK_SIZE
+        self.actions = []
+        # (IndexedDocument key, hash of the document) for each buffered action
+        self.hashes = []
+        # Actions sent, and skipped as unchanged, by this indexer
+        self.sent = 0
+        self.skipped = 0
+        # doc_type => number of documents buffered for indexing, whether or not they were sent
+        self.indexed = collections.Counter()
+
+    @property
+    def skip_ratio(self):
+        total = self.sent + self.skipped
+        return self.skipped / total if total else 0
+
+    def _add(self, op_type, doc_type, doc_id, content_hash, **fields):
+        action = {
+            '_op_type': op_type,
+            '_index': self.index_name,
+            '_type': doc_type,
+            '_id': doc_id,
+        }
+        action.update(fields)
+        self.actions.append(action)
+        self.hashes.append((IndexedDocument.get_key(self.index_name, doc_type, doc_id), content_hash))
+
+    def index(self, doc_type, doc_id, body):
+        self.indexed[doc_type] += 1
+        self._add('index', doc_type, doc_id, hash_document(body), _source=body)
+
+    def update(self, doc_type, doc_id, doc):
+        """Update part of an existing document. The document is always sent."""
+        self._add('update', doc_type, doc_id, None, doc=doc)
+
+    def delete(self, doc_type, doc_id):
+        self._add('delete', doc_type, doc_id, hash_document(None))
+
+    def _skip_unchanged(self, actions, hashes):
+        """Drop the actions that would leave the documents as they are."""
+        current = IndexedDocument.get_hashes(set(key for key, _ in hashes))
+        changed = []
+        for action, (key, content_hash) in zip(actions, hashes):
+            if content_hash is not None and current.get(key) == content_hash:
+                continue
+            current[key] = content_hash
+            changed.append((action, (key, content_hash)))
+        return [action for action, _ in changed], [pair for _, pair in changed]
+
+    def flush(self):
+        """Send the buffered actions.
+
+        :return int: The number of actions that succeeded
+        """
+        if not self.actions:
+            return 0
+        actions, hashes = self.actions, self.hashes
+        self.actions, self.hashes = [], []
+        if settings.ELASTIC_SKIP_UNCHANGED:
+            buffered_count = len(actions)
+            actions, hashes = self._skip_unchanged(actions, hashes)
+            self.skipped += buffered_count - len(actions)
+            INDEXING_STATS['skipped'] += buffered_count - len(actions)
+            if not actions:
+                return 0
+        start = time.time()
+        succeeded, failed = helpers.bulk(
+            es, actions,
+            chunk_size=self.chunk_size,
+            raise_on_error=False,
+            refresh=settings.ELASTIC_REFRESH_ON_WRITE,
+        )
+        errors = []
+        for item in failed:
+            op_type, result = item.items()[0]
+            if op_type == 'delete' and result.get('status') == 404:
+                succeeded += 1
+            else:
+                errors.append(item)
+
+        INDEXING_STATS['requests'] += int(math.ceil(len(actions) / self.chunk_size))
+        INDEXING_STATS['seconds'] += time.time() - start
+        for action in actions:
+            INDEXING_STATS[action['_op_type']] += 1
+        INDEXING_STATS['errors'] += len(errors)
+        self.sent += len(actions)
+        if errors:
+            logger.error('Failed to index {0} of {1} documents: {2}'.format(len(errors), len(actions), errors))
+            raise helpers.BulkIndexError('{0} document(s) failed to index.'.format(len(errors)), errors)
+        # The last action for each document determines its hash
+        IndexedDocument.set_hashes(self.index_name, dict(hashes))
+        return succeeded
+
+
+@contextlib.contextmanager
+def buffered(index=None, indexer=None):
+    """Yield `indexer`, or a new `BulkIndexer` that is flushed on leaving the block without an error."""
+    if indexer is not None:
+        yield indexer
+        return
+    indexer = BulkIndexer(index)
+    yield indexer
+    indexer.flush()
+
+
+def get_indexing_stats():
+    """Documents sent by this process, by action, and the rate at which they were sent."""
+    stats = dict(INDEXING_STATS)
+    documents = sum(INDEXING_STATS[op_type] for op_type in ('index', 'update', 'delete'))
+    seconds = INDEXING_STATS['seconds']
+    stats['documents'] = documents
+    stats['documents_per_second'] = documents / seconds if seconds else 0
+    skipped = INDEXING_STATS['skipped']
+    stats['skip_ratio'] = skipped / (documents + skipped) if documents + skipped else 0
+    # Node updates requested by `schedule_node_update`, and those indexed along with a later one
+    requested = INDEXING_STATS['updates_indexed'] + INDEXING_STATS['updates_coalesced']
+    stats['coalesce_ratio'] = INDEXING_STATS['updates_coalesced'] / requested if requested else 0
+    return stats
+
+
 def requires_search(func):
     def wrapped(*args, **kwargs):
         if es is not None:
@@ -269,13 +419,64 @@ def get_doctype_from_node(node):
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
 def update_node_async(self, node_id, index=None, bulk=False):
     node = Node.load(node_id)
+    indexer = BulkIndexer(index)
     try:
-        update_node(node=node, index=index, bulk=bulk)
+        update_node(node=node, index=index, bulk=bulk, indexer=indexer)
+        indexer.flush()
     except Exception as exc:
         self.retry(exc=exc)
+    logger.info('Indexed node {0}: {1} documents sent, {2} unchanged ({3:.0%} skipped)'.format(
+        node_id, indexer.sent, indexer.skipped, indexer.skip_ratio
+    ))
+
+
+def schedule_node_update(node_id, index=None):
+    """Request that `node_id` be reindexed once it has gone `settings.SEARCH_UPDATE_DELAY` seconds without
+    further requests, or `settings.SEARCH_UPDATE_MAX_WAIT` seconds after the first request, whichever is sooner.
+
+    :return bool: Whether the caller must start `update_node_debounced` for the node, rather than the
+        request being coalesced with one already waiting
+    """
+    index = index or INDEX
+    return PendingSearchUpdate.schedule(
+        PendingSearchUpdate.get_key(index, node_id),
+        settings.SEARCH_UPDATE_DELAY,
+        max_wait=settings.SEARCH_UPDATE_MAX_WAIT,
+    )
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
+def update_node_debounced(self, node_id, index=None, claimed=False):
+    """Reindex `node_id` if its update is due, else check again once it is. See `schedule_node_update`.
+
+    :param bool claimed: Whether the update was claimed by an earlier, failed, run of the task
+    """
+    index = index or INDEX
+    if not claimed:
+        key = PendingSearchUpdate.get_key(index, node_id)
+        updates = PendingSearchUpdate.claim(key)
+        if updates is None:
+            due = PendingSearchUpdate.get_due(key)
+            if due is not None:
+                countdown = max((due - datetime.datetime.utcnow()).total_seconds(), 0)
+                update_node_debounced.apply_async(kwargs={'node_id': node_id, 'index': index}, countdown=countdown)
+            return
+        INDEXING_STATS['updates_indexed'] += 1
+        INDEXING_STATS['updates_coalesced'] += updates - 1
+        logger.info('Indexing node {0} for {1} update(s)'.format(node_id, updates))
+    indexer = BulkIndexer(index)
+    try:
+        update_node(node=Node.load(node_id), index=index, indexer=indexer)
+        indexer.flush()
+    except Exception as exc:
+        self.retry(exc=exc, kwargs={'node_id': node_id, 'index': index, 'claimed': True})
 
 @requires_search
-def update_node(node, index=None, bulk=False):
+def update_node(node, index=None, bulk=False, indexer=None):
+    """Index `node` and its files, in one bulk request unless `indexer` is given.
+
+    :param bool bulk: Return the node's document instead of indexing it
+    :param BulkIndexer indexer: Buffer the documents in `indexer`, leaving it to the caller to flush
+    """
     index = index or INDEX
     from website.addons.wiki.model import NodeWikiPage
 
@@ -293,12 +494,14 @@ def update_node(node, index=None, bulk=False):
             return
 
     from website.files.models.osfstorage import OsfStorageFile
-    for file_ in paginated(OsfStorageFile, Q('node', 'eq', node)):
-        update_file(file_, index=index)
+    with buffered(index, indexer) as indexer:
+        for file_ in paginated(OsfStorageFile, Q('node', 'eq', node)):
+            update_file(file_, index=index, indexer=indexer)
+
+        if node.is_deleted or not node.is_public or node.archiving:
+            delete_doc(elastic_document_id, node, index=index, indexer=indexer)
+            return
 
-    if node.is_deleted or not node.is_public or node.archiving:
-        delete_doc(elastic_document_id, node)
-    else:
         try:
             normalized_title = six.u(node.title)
         except TypeError:
@@ -336,16 +539,17 @@ def update_node(node, index=None, bulk=False):
             'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
         }
         if not node.is_retracted:
-            for wiki in [
+            wikis = [
                 NodeWikiPage.load(x)
                 for x in node.wiki_pages_current.values()
-            ]:
-                elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
+            ]
+            texts = WikiSearchText.get_texts(wikis, node)
+            for wiki in wikis:
+                elastic_document['wikis'][wiki.page_name] = texts[wiki._id]
 
         if bulk:
             return elastic_document
-        else:
-            es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+        indexer.index(category, elastic_document_id, elastic_document)
 
 def bulk_update_nodes(serialize, nodes, index=None):
     """Updates the list of input projects
@@ -356,20 +560,13 @@ def bulk_update_nodes(serialize, nodes, index=None):
     :return:
     """
     index = index or INDEX
-    actions = []
+    indexer = BulkIndexer(index)
     for node in nodes:
         logger.info('Updating node {}'.format(node._id))
         serialized = serialize(node)
         if serialized:
-            actions.append({
-                '_op_type': 'update',
-                '_index': index,
-                '_id': node._id,
-                '_type': get_doctype_from_node(node),
-                'doc': serialized
-            })
-    if actions:
-        return helpers.bulk(es, actions)
+            indexer.update(get_doctype_from_node(node), node._id, serialized)
+    return indexer.flush()
 
 def serialize_contributors(node):
     return {
@@ -387,14 +584,12 @@ bulk_update_contributors = functools.partial(bulk_update_nodes, serialize_contri
 
 
 @requires_search
-def update_user(user, index=None):
+def update_user(user, index=None, indexer=None):
 
     index = index or INDEX
     if not user.is_active:
-        try:
-            es.delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
+        with buffered(index, indexer) as indexer:
+            indexer.delete('user', user._id)
         return
 
     names = dict(
@@ -431,21 +626,17 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    es.index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    with buffered(index, indexer) as indexer:
+        indexer.index('user', user._id, user_doc)
 
 @requires_search
-def update_file(file_, index=None, delete=False):
+def update_file(file_, index=None, delete=False, indexer=None):
 
     index = index or INDEX
 
     if not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving:
-        es.delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
+        with buffered(index, indexer) as indexer:
+            indexer.delete('file', file_._id)
         return
 
     # We build URLs manually here so that this function can be
@@ -469,13 +660,8 @@ def update_file(file_, index=None, delete=False):
         'is_registration': file_.node.is_registration,
     }
 
-    es.index(
-        index=index,
-        doc_type='file',
-        body=file_doc,
-        id=file_._id,
-        refresh=True
-    )
+    with buffered(index, indexer) as indexer:
+        indexer.index('file', file_._id, file_doc)
 
 @requires_search
 def delete_all():
@@ -485,6 +671,7 @@ def delete_all():
 @requires_search
 def delete_index(index):
     es.indices.delete(index, ignore=[404])
+    IndexedDocument.forget_index(index)
 
 
 @requires_search
@@ -493,6 +680,8 @@ def create_index(index=None):
     all of which are applied to all projects, components, and registrations.
     '''
     index = index or INDEX
+    # Documents recorded as sent to an earlier index of the same name may be missing from this one
+    IndexedDocument.forget_index(index)
     document_types = ['project', 'component', 'registration', 'user', 'file']
     project_like_types = ['project', 'component', 'registration']
     analyzed_fields = ['title', 'description']
@@ -538,10 +727,11 @@ def create_index(index=None):
         es.indices.put_mapping(index=index, doc_type=type_, body=mapping, ignore=[400, 404])
 
 @requires_search
-def delete_doc(elastic_document_id, node, index=None, category=None):
+def delete_doc(elastic_document_id, node, index=None, category=None, indexer=None):
     index = index or INDEX
     category = category or 'registration' if node.is_registration else node.project_or_component
-    es.delete(index=index, doc_type=category, id=elastic_document_id, refresh=True, ignore=[404])
+    with buffered(index, indexer) as indexer:
+        indexer.delete(category, elastic_document_id)
 
 
 @requires_search
@@ -13,3 +13,7 @@ class MalformedQueryError(SearchException):
 
 class SearchUnavailableError(SearchException):
     pass
+
+
+class ReindexVerificationError(SearchException):
+    pass
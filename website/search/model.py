@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""Records that let the search indexer skip work it has already done."""
+import json
+import hashlib
+import datetime
+
+import pymongo
+from modularodm import fields
+
+from framework.mongo import StoredObject
+
+from website import settings
+
+
+def hash_document(body):
+    """A hash of a search document, `None` standing for a deleted document."""
+    if body is None:
+        return 'deleted'
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=unicode)).hexdigest()
+
+
+class IndexedDocument(StoredObject):
+    """The hash of the document last sent to the search index for a record, to skip sending the same
+    document again.
+    """
+
+    # <index>/<doc_type>/<id of the document>
+    _id = fields.StringField(primary=True)
+    index = fields.StringField(index=True)
+    content_hash = fields.StringField()
+
+    @staticmethod
+    def get_key(index, doc_type, doc_id):
+        return '/'.join([index, doc_type, doc_id])
+
+    @classmethod
+    def get_hashes(cls, keys):
+        """Map each of `keys` that has a recorded hash to the hash, with a single query."""
+        if not keys:
+            return {}
+        return dict(
+            (doc['_id'], doc['content_hash'])
+            for doc in cls._storage[0].store.find({'_id': {'$in': list(keys)}})
+        )
+
+    @classmethod
+    def set_hashes(cls, index, hashes):
+        """Record the hashes of documents sent to `index`, given as a dict of keys to hashes; a hash of
+        `None` forgets the document.
+        """
+        if not hashes:
+            return
+        store = cls._storage[0].store
+        store.remove({'_id': {'$in': hashes.keys()}})
+        records = [
+            cls(_id=key, index=index, content_hash=content_hash).to_storage()
+            for key, content_hash in hashes.iteritems()
+            if content_hash is not None
+        ]
+        if not records:
+            return
+        try:
+            store.insert(records, continue_on_error=True)
+        except pymongo.errors.DuplicateKeyError:
+            # Another indexer recorded some of these documents since the remove; overwrite its hashes
+            # with the ones just sent
+            for record in records:
+                store.update({'_id': record['_id']}, record, upsert=True)
+
+    @classmethod
+    def forget_index(cls, index):
+        """Forget the documents of `index`, e.g. because it was deleted or rebuilt."""
+        cls._storage[0].store.remove({'index': index})
+
+
+class WikiSearchText(StoredObject):
+    """The plain text of a wiki page version, as indexed for search. Versions don't change once saved,
+    and their text is free of the node-specific link targets in their HTML, so the text is rendered once
+    per version.
+    """
+
+    # The id of the NodeWikiPage
+    _id = fields.StringField(primary=True)
+    text = fields.StringField()
+
+    @classmethod
+    def get_texts(cls, pages, node):
+        """Map the ids of `pages` to their text, rendering and recording the text of those not seen yet.
+
+        :param list pages: `NodeWikiPage`s
+        :param Node node: The node the pages are indexed for
+        """
+        store = cls._storage[0].store
+        texts = dict(
+            (doc['_id'], doc['text'])
+            for doc in store.find({'_id': {'$in': [page._id for page in pages]}})
+        )
+        missing = []
+        for page in pages:
+            if page._id not in texts:
+                texts[page._id] = page.raw_text(node)
+                missing.append(cls(_id=page._id, text=texts[page._id]).to_storage())
+        if missing:
+            try:
+                store.insert(missing, continue_on_error=True)
+            except pymongo.errors.DuplicateKeyError:
+                # Rendered by another indexer meanwhile; either copy will do
+                pass
+        return texts
+
+
+class ReindexCheckpoint(StoredObject):
+    """Progress of a partition of a full reindex by `website.search_migration.migrate`: the records of one
+    kind whose ids are in [`start`, `end`), `None` standing for no bound. Records up to `last_id` have been
+    indexed, and `counts` maps doc types to the documents indexed for them, for verifying the new index.
+    """
+
+    # <index>/<kind>/<start>
+    _id = fields.StringField(primary=True)
+    # The alias the index replaces
+    alias = fields.StringField(index=True)
+    index = fields.StringField(index=True)
+    # 'node' or 'user'
+    kind = fields.StringField()
+    start = fields.StringField()
+    end = fields.StringField()
+    last_id = fields.StringField()
+    counts = fields.DictionaryField()
+    done = fields.BooleanField(default=False)
+
+    @staticmethod
+    def get_key(index, kind, start):
+        return '/'.join([index, kind, start or ''])
+
+
+class PendingSearchUpdate(StoredObject):
+    """A node waiting to be reindexed once it has gone `settings.SEARCH_UPDATE_DELAY` seconds without
+    changes, so that a burst of changes is indexed once, in its last state. A node that keeps changing is
+    reindexed `settings.SEARCH_UPDATE_MAX_WAIT` seconds after the first change all the same.
+    """
+
+    # <index>/<node id>
+    _id = fields.StringField(primary=True)
+    due = fields.DateTimeField()
+    # When the first of the updates was requested
+    first_requested = fields.DateTimeField()
+    # The number of updates requested since the node was last indexed
+    updates = fields.IntegerField(default=0)
+
+    @staticmethod
+    def get_key(index, node_id):
+        return '/'.join([index, node_id])
+
+    @classmethod
+    def schedule(cls, key, delay, max_wait=None):
+        """Push back the update for `key` to `delay` seconds from now, but no later than `max_wait` seconds
+        after the first of the updates it stands for was requested.
+
+        :return bool: Whether the update is new, rather than coalesced with one already waiting. An update
+            left waiting past when it was due, e.g. because the task for it was lost, counts as new.
+        """
+        store = cls._storage[0].store
+        now = datetime.datetime.utcnow()
+        due = now + datetime.timedelta(seconds=delay)
+        previous = store.find_and_modify(
+            {'_id': key},
+            {'$set': {'due': due}, '$inc': {'updates': 1}, '$setOnInsert': {'first_requested': now}},
+            upsert=True,
+        )
+        is_new = previous is None or previous['due'] < now
+        if is_new and previous is not None:
+            store.update({'_id': key}, {'$set': {'first_requested': now}})
+        if max_wait is not None:
+            first_requested = now if is_new else previous.get('first_requested') or now
+            deadline = first_requested + datetime.timedelta(seconds=max_wait)
+            if due > deadline:
+                store.update({'_id': key, 'due': {'$gt': deadline}}, {'$set': {'due': deadline}})
+        return is_new
+
+    @classmethod
+    def claim(cls, key):
+        """Remove the update for `key` if it is due.
+
+        :return int: The number of updates it stands for, or None if no update for `key` is due
+        """
+        claimed = cls._storage[0].store.find_and_modify(
+            {'_id': key, 'due': {'$lte': datetime.datetime.utcnow()}},
+            remove=True,
+        )
+        return claimed['updates'] if claimed is not None else None
+
+    @classmethod
+    def get_due(cls, key):
+        """When the update for `key` is due, or None if there is none waiting."""
+        waiting = cls._storage[0].store.find_one({'_id': key})
+        return waiting['due'] if waiting is not None else None
+
+
+class CachedSearchResult(StoredObject):
+    """The result of a query to SHARE, cached by `website.search.share_search.cached`. Results are removed
+    by MongoDB once they are too old to be served.
+    """
+
+    __indices__ = [{
+        'key_or_list': [('cached_at', pymongo.ASCENDING)],
+        'expireAfterSeconds': settings.SHARE_CACHE_TTL + settings.SHARE_CACHE_STALE_TTL,
+    }]
+
+    # <name of the query>/<hash of the query>
+    _id = fields.StringField(primary=True)
+    # As JSON, since the keys of aggregations may hold characters MongoDB doesn't allow in keys
+    value = fields.StringField()
+    cached_at = fields.DateTimeField()
+    # When a refresh of the result started, if one is running
+    refreshing_since = fields.DateTimeField()
+
+    @classmethod
+    def get_result(cls, key):
+        """The cached result for `key` and when it was cached, or (None, None)."""
+        record = cls._storage[0].store.find_one({'_id': key})
+        if record is None:
+            return None, None
+        return json.loads(record['value']), record['cached_at']
+
+    @classmethod
+    def set_result(cls, key, value):
+        cls._storage[0].store.update(
+            {'_id': key},
+            {'$set': {'value': json.dumps(value), 'cached_at': datetime.datetime.utcnow(), 'refreshing_since': None}},
+            upsert=True,
+        )
+
+    @classmethod
+    def claim_refresh(cls, key, timeout):
+        """Mark the result for `key` as being refreshed, unless a refresh started less than `timeout`
+        seconds ago.
+
+        :return bool: Whether the caller should refresh the result
+        """
+        now = datetime.datetime.utcnow()
+        claimed = cls._storage[0].store.find_and_modify(
+            {
+                '_id': key,
+                '$or': [
+                    {'refreshing_since': None},
+                    {'refreshing_since': {'$lt': now - datetime.timedelta(seconds=timeout)}},
+                ],
+            },
+            {'$set': {'refreshing_since': now}},
+        )
+        return claimed is not None
@@ -25,6 +25,12 @@ def search(query, index=None, doc_type=None):
     index = index or settings.ELASTIC_INDEX
     return search_engine.search(query, index=index, doc_type=doc_type)
 
+def is_hidden(node):
+    """Whether `node` is to be taken out of search results, which is done right away rather than once the node
+    has gone quiet.
+    """
+    return node.is_deleted or not node.is_public or node.archiving or (node.is_registration and node.is_retracted)
+
 @requires_search
 def update_node(node, index=None, bulk=False, async=True):
     if async:
@@ -33,7 +39,15 @@ def update_node(node, index=None, bulk=False, async=True):
         # For example, when updating a Node's privacy, is_public must be True in the
         # database in order for method that updates the Node's elastic search document
         # to run correctly.
-        if settings.USE_CELERY:
+        if settings.USE_CELERY and settings.SEARCH_UPDATE_DELAY and not bulk and not is_hidden(node):
+            # Started once for a burst of updates to the node
+            if search_engine.schedule_node_update(node_id, index=index):
+                enqueue_task(
+                    search_engine.update_node_debounced.s(node_id=node_id, index=index).set(
+                        countdown=settings.SEARCH_UPDATE_DELAY
+                    )
+                )
+        elif settings.USE_CELERY:
             enqueue_task(search_engine.update_node_async.s(node_id=node_id, index=index, bulk=bulk))
         else:
             search_engine.update_node_async(node_id=node_id, index=index, bulk=bulk)
@@ -68,6 +82,10 @@ def update_file(file_, index=None, delete=False):
     index = index or settings.ELASTIC_INDEX
     search_engine.update_file(file_, index=index, delete=delete)
 
+@requires_search
+def get_indexing_stats():
+    return search_engine.get_indexing_stats()
+
 @requires_search
 def delete_all():
     search_engine.delete_all()
@@ -101,3 +119,6 @@ def share_stats(query=None):
 
 def share_providers():
     return share_search.providers()
+
+def get_share_cache_stats():
+    return share_search.get_cache_stats()
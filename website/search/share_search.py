@@ -1,4 +1,8 @@
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
+
+import copy
+import datetime as dt
+import collections
 
 from time import gmtime
 from calendar import timegm
@@ -11,8 +15,12 @@ from dateutil.relativedelta import relativedelta
 
 from elasticsearch import Elasticsearch
 
+from framework.tasks import app as celery_app
+from framework.tasks.handlers import enqueue_task
+
 from website import settings
 from website.search.elastic_search import requires_search
+from website.search.model import CachedSearchResult, hash_document
 
 from util import generate_color, html_and_illegal_unicode_replace
 
@@ -28,6 +36,16 @@ share_es = Elasticsearch(
 # This is temporary until we update the backend
 FRONTEND_VERSION = 1
 
+PROVIDERS_QUERY = {
+    'query': {
+        'match_all': {}
+    },
+    'size': 10000
+}
+
+# Counters of the cached results served by this process, see `get_cache_stats`
+CACHE_STATS = collections.Counter()
+
 
 @requires_search
 def search(query, raw=False, index='share'):
@@ -74,15 +92,60 @@ def count(query, index='share'):
     }
 
 
+def get_cache_key(name, query):
+    # Hashed as JSON with sorted keys, so equal queries share a key however their dicts are ordered
+    return '/'.join([name, hash_document(query)])
+
+
+def cached(name, query):
+    """The result of the query `name` for `query`, cached for `settings.SHARE_CACHE_TTL` seconds.
+
+    A result up to `settings.SHARE_CACHE_STALE_TTL` seconds older than that is still served, while
+    `refresh_cache` computes a new one in the background.
+    """
+    compute = CACHED_QUERIES[name]
+    if not settings.SHARE_CACHE_TTL:
+        return compute(query)
+    key = get_cache_key(name, query)
+    value, cached_at = CachedSearchResult.get_result(key)
+    if value is not None:
+        age = (dt.datetime.utcnow() - cached_at).total_seconds()
+        if age < settings.SHARE_CACHE_TTL:
+            CACHE_STATS['hits'] += 1
+            return value
+        if age < settings.SHARE_CACHE_TTL + settings.SHARE_CACHE_STALE_TTL:
+            CACHE_STATS['stale_hits'] += 1
+            if CachedSearchResult.claim_refresh(key, settings.SHARE_CACHE_TTL):
+                enqueue_task(refresh_cache.s(name, query))
+            return value
+    CACHE_STATS['misses'] += 1
+    value = compute(query)
+    CachedSearchResult.set_result(key, value)
+    return value
+
+
+@celery_app.task(max_retries=0)
+def refresh_cache(name, query):
+    CachedSearchResult.set_result(get_cache_key(name, query), CACHED_QUERIES[name](query))
+    CACHE_STATS['refreshes'] += 1
+
+
+def get_cache_stats():
+    """Cached results served by this process, fresh or stale, and the ratio of requests they served."""
+    stats = dict(CACHE_STATS)
+    served = CACHE_STATS['hits'] + CACHE_STATS['stale_hits']
+    requests = served + CACHE_STATS['misses']
+    stats['hit_ratio'] = served / requests if requests else 0
+    return stats
+
+
 @requires_search
 def providers():
+    return cached('providers', PROVIDERS_QUERY)
 
-    provider_map = share_es.search(index='share_providers', doc_type=None, body={
-        'query': {
-            'match_all': {}
-        },
-        'size': 10000
-    })
+
+def query_providers(query):
+    provider_map = share_es.search(index='share_providers', doc_type=None, body=query)
 
     return {
         'providerMap': {
@@ -93,8 +156,14 @@ def providers():
 
 @requires_search
 def stats(query=None):
-    query = query or {"query": {"match_all": {}}}
+    if query:
+        # Only the default query is cached, so that each distinct query from users doesn't leave a result behind
+        return query_stats(query)
+    return cached('stats', {"query": {"match_all": {}}})
 
+
+def query_stats(query):
+    query = copy.deepcopy(query)
     index = settings.SHARE_ELASTIC_INDEX_TEMPLATE.format(FRONTEND_VERSION)
 
     three_months_ago = timegm((datetime.now() + relativedelta(months=-3)).timetuple()) * 1000
@@ -202,6 +271,13 @@ def stats(query=None):
     return chart_results
 
 
+# Queries whose results `cached` serves, by name
+CACHED_QUERIES = {
+    'providers': query_providers,
+    'stats': query_stats,
+}
+
+
 def data_for_charts(elastic_results):
     source_data = elastic_results['aggregations']['sources']['buckets']
     for_charts = {}
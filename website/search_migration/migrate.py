@@ -4,47 +4,197 @@
 from __future__ import absolute_import
 
 import logging
+import operator
+import collections
+import multiprocessing
 
 from elasticsearch import helpers
 from modularodm.query.querydialect import DefaultQueryDialect as Q
 
 from website import settings
 from framework.auth import User
+from framework.guid.model import ALPHABET
+from framework.mongo import StoredObject
 from website.models import Node
 from website.app import init_app
 import website.search.search as search
 from scripts import utils as script_utils
+from website.search import elastic_search
 from website.search.elastic_search import es
+from website.search.exceptions import ReindexVerificationError
+from website.search.model import IndexedDocument, ReindexCheckpoint
 
 
 logger = logging.getLogger(__name__)
 
-def migrate_nodes(index):
-    logger.info("Migrating nodes to index: {}".format(index))
-    n_iter = 0
-    nodes = Node.find(Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False))
-    for node in nodes:
-        logger.info('Updating node {}'.format(node._id))
-        search.update_node(node, index=index, async=False)
-        n_iter += 1
+# The records of each kind are reindexed in partitions of their ids, split at these characters. GUIDs are
+# drawn from `ALPHABET`, so the partitions are about even; the first and last are unbounded below and above
+# to take in any other ids.
+PARTITION_BOUNDS = list(ALPHABET[1:])
 
-    logger.info('Nodes migrated: {}'.format(n_iter))
 
+def get_partitions():
+    """[start, end) ranges of ids, `None` standing for no bound."""
+    bounds = [None] + PARTITION_BOUNDS + [None]
+    return zip(bounds[:-1], bounds[1:])
 
-def migrate_users(index):
-    logger.info("Migrating users to index: {}".format(index))
-    n_migr = 0
-    n_iter = 0
-    for user in User.find():
-        if user.is_active:
-            search.update_user(user, index=index)
-            n_migr += 1
-        n_iter += 1
 
-    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(n_iter, n_migr))
+def set_up_checkpoints(alias, index):
+    """Create a `ReindexCheckpoint` for each partition of the nodes and users to index into `index`."""
+    checkpoints = []
+    for kind in ('node', 'user'):
+        for start, end in get_partitions():
+            checkpoint = ReindexCheckpoint(
+                _id=ReindexCheckpoint.get_key(index, kind, start),
+                alias=alias,
+                index=index,
+                kind=kind,
+                start=start,
+                end=end,
+                counts={},
+            )
+            checkpoint.save()
+            checkpoints.append(checkpoint)
+    return checkpoints
 
 
-def migrate(delete, index=None, app=None):
+def get_unfinished_index(alias):
+    """The index an interrupted reindex of `alias` was building, or None."""
+    checkpoints = ReindexCheckpoint.find(Q('alias', 'eq', alias))
+    return checkpoints[0].index if checkpoints.count() else None
+
+
+def discard_unfinished(alias):
+    """Delete the index an interrupted reindex of `alias` was building, and its checkpoints."""
+    index = get_unfinished_index(alias)
+    if index is None:
+        return
+    if index not in es.indices.get_aliases(index=alias):
+        logger.info("Deleting unfinished index {}".format(index))
+        search.delete_index(index)
+    ReindexCheckpoint.remove(Q('alias', 'eq', alias))
+
+
+def partition_query(checkpoint):
+    """The records of `checkpoint`'s partition that are left to index."""
+    clauses = []
+    if checkpoint.kind == 'node':
+        clauses.extend([Q('is_public', 'eq', True), Q('is_deleted', 'eq', False)])
+    if checkpoint.last_id is not None:
+        clauses.append(Q('_id', 'gt', checkpoint.last_id))
+    elif checkpoint.start is not None:
+        clauses.append(Q('_id', 'gte', checkpoint.start))
+    if checkpoint.end is not None:
+        clauses.append(Q('_id', 'lt', checkpoint.end))
+    return reduce(operator.and_, clauses)
+
+
+def index_record(kind, record, indexer):
+    if kind == 'node':
+        elastic_search.update_node(record, index=indexer.index_name, indexer=indexer)
+    elif record.is_active:
+        elastic_search.update_user(record, index=indexer.index_name, indexer=indexer)
+
+
+def migrate_partition(checkpoint_id, clear_caches=False):
+    """Index the records of a partition in batches of `settings.ELASTIC_BULK_SIZE`, sending each batch's
+    documents in bulk and recording the progress on the checkpoint once they are sent.
+
+    :param bool clear_caches: Clear the caches of loaded records after each batch, to bound the memory used
+    :return dict: The documents indexed for the partition, by doc type
+    """
+    checkpoint = ReindexCheckpoint.load(checkpoint_id)
+    model = Node if checkpoint.kind == 'node' else User
+    indexer = elastic_search.BulkIndexer(checkpoint.index)
+    while not checkpoint.done:
+        records = list(
+            model.find(partition_query(checkpoint)).sort('_id').limit(settings.ELASTIC_BULK_SIZE)
+        )
+        for record in records:
+            index_record(checkpoint.kind, record, indexer)
+        indexer.flush()
+
+        counts = collections.Counter(checkpoint.counts)
+        counts.update(indexer.indexed)
+        indexer.indexed.clear()
+        checkpoint.counts = dict(counts)
+        if records:
+            checkpoint.last_id = records[-1]._id
+        checkpoint.done = len(records) < settings.ELASTIC_BULK_SIZE
+        checkpoint.save()
+
+        if clear_caches:
+            StoredObject._clear_caches()
+            checkpoint = ReindexCheckpoint.load(checkpoint_id)
+    logger.info('Indexed {0} {1} partition from {2!r}: {3}'.format(
+        checkpoint.index, checkpoint.kind, checkpoint.start, checkpoint.counts
+    ))
+    return checkpoint.counts
+
+
+def init_worker():
+    """Set up a process of the pool: connections to the database are made anew after a fork, those to
+    the search engine are not.
+    """
+    elastic_search.es = elastic_search.create_client()
+    app = init_app("website.settings", set_backends=True, routes=True)
+    app.test_request_context().push()
+
+
+def migrate_worker(checkpoint_id):
+    return migrate_partition(checkpoint_id, clear_caches=True)
+
+
+def migrate_partitions(index, processes=1):
+    """Index every partition of `index` that isn't done, using a pool of `processes` processes if more
+    than one.
+    """
+    checkpoint_ids = [
+        checkpoint._id
+        for checkpoint in ReindexCheckpoint.find(Q('index', 'eq', index) & Q('done', 'eq', False))
+    ]
+    logger.info('Indexing {0} partitions into {1}'.format(len(checkpoint_ids), index))
+    if processes <= 1:
+        for checkpoint_id in checkpoint_ids:
+            migrate_partition(checkpoint_id)
+        return
+    pool = multiprocessing.Pool(processes, initializer=init_worker)
+    try:
+        # Raises the first error of a worker
+        list(pool.imap_unordered(migrate_worker, checkpoint_ids))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def verify_counts(index):
+    """Check that `index` holds the documents the checkpoints recorded as indexed into it, by doc type.
+
+    The first versioned index starts as a copy of the unversioned index, so it may hold more documents
+    than were indexed into it; any other index must hold exactly as many.
+    """
+    expected = collections.Counter()
+    for checkpoint in ReindexCheckpoint.find(Q('index', 'eq', index)):
+        expected.update(checkpoint.counts)
+    es.indices.refresh(index=index)
+    mismatches = {}
+    for doc_type, count in expected.items():
+        actual = es.count(index=index, doc_type=doc_type)['count']
+        if actual < count or (actual > count and not index.endswith('_v1')):
+            mismatches[doc_type] = (count, actual)
+    if mismatches:
+        raise ReindexVerificationError(
+            'Documents indexed and found in {0}, by doc type: {1}'.format(index, mismatches)
+        )
+    logger.info('Verified the documents of {0}: {1}'.format(index, dict(expected)))
+
+
+def migrate(delete, index=None, app=None, processes=1, resume=False):
+    """Reindex the nodes and users into a new version of `index`, then point the `index` alias at it.
+
+    :param int processes: The number of processes to index with
+    :param bool resume: Finish the index an interrupted run was building, rather than starting over
+    """
     index = index or settings.ELASTIC_INDEX
     app = app or init_app("website.settings", set_backends=True, routes=True)
 
@@ -54,18 +204,30 @@ def migrate(delete, index=None, app=None):
     # functions to be triggered
     ctx = app.test_request_context()
     ctx.push()
+    try:
+        new_index = get_unfinished_index(index) if resume else None
+        if new_index is not None:
+            logger.info("Resuming reindex into {}".format(new_index))
+        else:
+            discard_unfinished(index)
+            new_index = set_up_index(index)
+            set_up_checkpoints(index, new_index)
 
-    new_index = set_up_index(index)
-
-    migrate_nodes(new_index)
-    migrate_users(new_index)
-
-    set_up_alias(index, new_index)
+        migrate_partitions(new_index, processes=processes)
+        # The alias is only moved to an index found to hold every document
+        verify_counts(new_index)
 
-    if delete:
-        delete_old(new_index)
+        set_up_alias(index, new_index)
+        ReindexCheckpoint.remove(Q('index', 'eq', new_index))
+        # Documents are written through the alias from now on, and the hashes recorded for it describe
+        # the old index
+        IndexedDocument.forget_index(index)
+        IndexedDocument.forget_index(new_index)
 
-    ctx.pop()
+        if delete:
+            delete_old(new_index)
+    finally:
+        ctx.pop()
 
 def set_up_index(idx):
     alias = es.indices.get_aliases(index=idx)
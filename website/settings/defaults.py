@@ -67,10 +67,26 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Documents per bulk request when indexing
+ELASTIC_BULK_SIZE = 500
+# Refresh the index after each bulk request, so that writes are searchable at once. Off, leaving it to
+# the index's refresh interval, except in tests
+ELASTIC_REFRESH_ON_WRITE = False
+# Skip sending search documents identical to the ones last sent for the same records
+ELASTIC_SKIP_UNCHANGED = True
+# Seconds a node must go without changes before it is reindexed, so that a burst of changes is indexed
+# once. 0 reindexes on every change
+SEARCH_UPDATE_DELAY = 10
+# Seconds after the first change to a node that keeps changing by which it is reindexed all the same
+SEARCH_UPDATE_MAX_WAIT = 60
 SHARE_ELASTIC_URI = ELASTIC_URI
 SHARE_ELASTIC_INDEX = 'share'
 # For old indices
 SHARE_ELASTIC_INDEX_TEMPLATE = 'share_v{}'
+# Seconds the results of SHARE stats and providers queries are cached for, 0 for no caching. Results up to
+# SHARE_CACHE_STALE_TTL seconds older are served while they are refreshed in the background
+SHARE_CACHE_TTL = 300
+SHARE_CACHE_STALE_TTL = 3600
 
 # Sessions
 # TODO: Override OSF_COOKIE_DOMAIN in local.py in production
@@ -136,6 +152,8 @@ DB_PORT = os_env.get('OSF_DB_PORT', 27017)
 DB_NAME = 'osf20130903'
 DB_USER = None
 DB_PASS = None
+# Maximum number of sockets held by each process's pooled MongoDB client
+DB_MAX_POOL_SIZE = int(os_env.get('OSF_DB_MAX_POOL_SIZE', 100))
 
 # Cache settings
 SESSION_HISTORY_LENGTH = 5
@@ -274,6 +292,10 @@ ARCHIVE_TIMEOUT_TIMEDELTA = timedelta(1)  # 24 hours
 
 ENABLE_ARCHIVER = True
 
+# Register node trees by snapshotting them in bulk (see website.project.registrations) rather than
+# registering each component recursively
+BULK_REGISTRATIONS = True
+
 JWT_SECRET = 'changeme'
 JWT_ALGORITHM = 'HS256'
 
@@ -285,15 +307,20 @@ BROKER_URL = 'amqp://'
 # Default RabbitMQ backend
 CELERY_RESULT_BACKEND = 'amqp://'
 
+# Number of unused GUID ids kept ready for new records by the guid-pool task
+GUID_POOL_SIZE = 1000
+
 #  Modules to import when celery launches
 CELERY_IMPORTS = (
     'framework.tasks',
     'framework.tasks.signals',
     'framework.email.tasks',
     'framework.analytics.tasks',
+    'framework.guid.tasks',
     'website.mailchimp_utils',
     'website.notifications.tasks',
     'website.archiver.tasks',
+    'website.project.tasks',
     'website.search.search',
 )
 
@@ -315,6 +342,10 @@ else:
             'schedule': crontab(minute=0, hour=0),
             'args': ('email_digest',),
         },
+        'guid-pool': {
+            'task': 'guid.fill_guid_pool',
+            'schedule': crontab(minute='*'),
+        },
     }
 
 WATERBUTLER_JWE_SALT = 'yusaltydough'
@@ -10,6 +10,7 @@ from modularodm import Q
 
 from framework import sentry
 from framework.auth.decorators import Auth
+from framework.mongo.utils import prefetch
 
 from website.util import paths
 from website.util import sanitize
@@ -172,6 +173,11 @@ class NodeProjectCollector(object):
 
     def _collect_components(self, node, visited):
         rv = []
+        # Load children, pointed-at nodes and the records `_serialize_node`
+        # dereferences for each child in a handful of queries
+        prefetch([node], 'nodes', 'nodes.node')
+        resolved = [child.resolve() for child in node.nodes if child is not None]
+        prefetch(resolved, 'contributors', 'nodes', 'nodes.node', 'node__parent')
         for child in reversed(node.nodes):  # (child.resolve()._id not in visited or node.is_folder) and
             if child is not None and not child.is_deleted and child.resolve().can_view(auth=self.auth) and node.can_view(self.auth):
                 # visited.append(child.resolve()._id)
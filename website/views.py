@@ -46,7 +46,7 @@ def _rescale_ratio(auth, nodes):
     if not nodes:
         return 0
     counts = [
-        len(node.logs)
+        node.get_log_count()
         for node in nodes
         if node.can_view(auth)
     ]